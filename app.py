@@ -1,7 +1,68 @@
 import os
-import streamlit as st
+import time
+
+_t0 = time.perf_counter()
+import streamlit as st  # noqa: E402
+
+from src.startup import get_graph, record_timing, warm_up_models, warm_up_status  # noqa: E402
+from src.progress import StreamlitReporter, use_reporter  # noqa: E402
+from src.metrics import RunMetrics, get_registry, use_metrics  # noqa: E402
+from src.report import build_report  # noqa: E402
+from src.analysis.amounts import format_inr  # noqa: E402
+
+# Heavy modules (langgraph, torch, transformers, groq) are imported by the warm-up thread
+record_timing("import.app", time.perf_counter() - _t0)
+
+# --------------------------- 
+# Timing Panel
+# --------------------------- 
+
+def render_timing_panel(metrics: RunMetrics):
+    summary = metrics.summary()
+    with st.expander(f"⏱️ Timings ({summary['wall_seconds']:.1f}s total)", expanded=False):
+        nodes = [{"node": s["name"][len("node."):], "seconds": s["seconds"], "waited": s.get("waited", 0)}
+                 for s in metrics.spans_named("node.")]
+        if nodes:
+            st.markdown("**Pipeline nodes**")
+            st.dataframe(nodes, use_container_width=True)
+
+        spans = [{"span": name, **stats} for name, stats in summary["spans"].items() if not name.startswith("node.")]
+        if spans:
+            st.markdown("**Operations**")
+            st.dataframe(spans, use_container_width=True)
+
+        fetches = [{"url": s["url"], "status": s.get("status"), "failure": s.get("failure") or s.get("error"),
+                    "bytes": s.get("bytes", 0), "cache": s.get("cache"), "seconds": s["seconds"]}
+                   for s in metrics.spans_named("crawl.fetch")]
+        if fetches:
+            st.markdown("**Fetched URLs**")
+            st.dataframe(fetches, use_container_width=True)
+
+        if summary["counters"]:
+            st.markdown("**Counters**")
+            st.json(summary["counters"])
+
+
+def export_metrics(metrics: RunMetrics):
+    """Append the run to METRICS_JSONL and refresh the METRICS_PROM textfile, when configured"""
+    try:
+        if os.getenv("METRICS_JSONL"):
+            metrics.write_jsonl(os.getenv("METRICS_JSONL"))
+        if os.getenv("METRICS_PROM"):
+            get_registry().write_prometheus(os.getenv("METRICS_PROM"))
+    except OSError as e:
+        print(f"Error exporting metrics: {e}")
+
+
+def render_startup_panel():
+    status = warm_up_status()
+    label = {"idle": "not started", "running": "warming up…", "done": "ready"}[status["state"]]
+    with st.sidebar.expander(f"🚀 Startup ({label})", expanded=False):
+        for name, seconds in sorted(status["timings"].items()):
+            st.text(f"{name}: {seconds:.2f}s")
+        for name, error in status["errors"].items():
+            st.warning(f"{name}: {error}")
 
-from src.graph import build_graph
 
 # --------------------------- 
 # Streamlit App
@@ -9,6 +70,9 @@ from src.graph import build_graph
 
 def main():
     st.set_page_config(page_title="Arbitration Amount Predictor", layout="wide")
+
+    # Compile the graph and load both models in the background while the page renders
+    warm_up_models(background=True)
     
     st.title("⚖️ Arbitration Amount Predictor")
     st.markdown("""
@@ -43,6 +107,10 @@ def main():
     )
     
     run = st.button("🔍 Analyze Case", type="primary", use_container_width=True)
+    refresh_analysis = st.sidebar.checkbox("🔄 Ignore cached analyses", value=False,
+                                           help="Always call the LLM, even for a query analysed before")
+    show_timings = st.sidebar.checkbox("⏱️ Show timing panel", value=os.getenv("METRICS_PANEL", "0") == "1")
+    render_startup_panel()
     
     if run:
         if not query.strip():
@@ -57,11 +125,15 @@ def main():
             st.error("⚠️ GROQ_API_KEY is required. Please set it in your .env file.")
             st.stop()
         
-        with st.spinner("🔍 Searching and analyzing cases..."):
-            graph = build_graph()
-            state = graph.invoke({"query": query})
+        metrics = RunMetrics()
+        with st.spinner("🔍 Searching and analyzing cases..."), use_reporter(StreamlitReporter()), use_metrics(metrics):
+            graph = get_graph()
+            state = graph.invoke({"query": query, "stream_analysis": True, "refresh_analysis": refresh_analysis})
         
         if state.get("error"):
+            export_metrics(metrics)
+            if show_timings:
+                render_timing_panel(metrics)
             st.error(state["error"])
             st.stop()
         
@@ -77,8 +149,16 @@ def main():
                     st.markdown(f"**🔗 URL:** [{doc['url']}]({doc['url']})")
                     st.markdown(f"**🎯 Relevance Score:** {doc.get('similarity', 0):.2%}")
                     st.markdown(f"**📊 Content Score:** {doc.get('score', 0)} points")
+                    if "lexical_score" in doc:
+                        st.markdown(f"**🔤 Lexical Prefilter:** BM25 {doc['lexical_score']:.2f}, blended {doc['prefilter_score']:.2f}")
                     st.markdown(f"**📁 Source Type:** {doc.get('source', 'Unknown')}")
                     st.markdown(f"**📥 Full Fetch:** {'✅ Yes' if doc.get('full_fetch') else '❌ No (snippet only)'}")
+                    if doc.get("from_corpus"):
+                        st.caption("📦 Served from the local case corpus")
+                    
+                    awarded = [a["amount"] for a in doc.get("amounts", []) if a["kind"] == "award"]
+                    if awarded:
+                        st.markdown(f"**💰 Amounts Awarded:** {', '.join(dict.fromkeys(awarded[:5]))}")
                     
                     # Show preview
                     preview = doc.get('text', '')[:500]
@@ -89,29 +169,51 @@ def main():
         # Display LLM analysis
         st.markdown("---")
         st.subheader("🤖 AI Analysis & Estimation")
+
+        estimate = state.get("amount_estimate")
+        if estimate:
+            # Deterministic range from amounts found in the case texts; shown before the LLM responds
+            basis = "awarded amounts" if estimate["basis"] == "awarded" else "amounts mentioned"
+            c1, c2, c3 = st.columns(3)
+            c1.metric("Preliminary low", format_inr(estimate["low"]))
+            c2.metric("Median", format_inr(estimate["median"]))
+            c3.metric("Preliminary high", format_inr(estimate["high"]))
+            st.caption(f"💰 Similarity-weighted quartiles of {basis} in {estimate['n_cases']} retrieved cases")
         
+        cached = state.get("analysis_cache")
+        if cached:
+            age_minutes = cached["age_seconds"] / 60
+            if cached["level"] == "exact":
+                st.info(f"♻️ **Cached analysis** — same query and cases, generated {age_minutes:.0f} min ago. "
+                        "Tick *Ignore cached analyses* in the sidebar to regenerate.")
+            else:
+                st.info(f"♻️ **Cached analysis** from a similar query ({cached['similarity']:.0%} similar, "
+                        f"{cached['overlap']:.0%} of cases shared), generated {age_minutes:.0f} min ago:  \n"
+                        f"_{cached['query'][:200]}_  \n"
+                        "Tick *Ignore cached analyses* in the sidebar to regenerate.")
+
         llm_response = state.get("llm_response", "")
-        if llm_response:
+        if state.get("llm_stream") is not None:
+            # Render tokens as they arrive; keep the assembled text for the report
+            placeholder = st.empty()
+            with use_metrics(metrics):
+                for delta in state["llm_stream"]:
+                    llm_response += delta
+                    placeholder.markdown(llm_response + "▌")
+            placeholder.markdown(llm_response)
+        elif llm_response:
             st.markdown(llm_response)
-        else:
+        if not llm_response:
             st.warning("No analysis generated.")
+
+        export_metrics(metrics)
+        if show_timings:
+            render_timing_panel(metrics)
         
         # Download option
         st.markdown("---")
         if ranked and llm_response:
-            report = f"""# Arbitration Case Analysis Report
-
-## Query
-{query}
-
-## Retrieved Cases
-"""
-            for i, doc in enumerate(ranked, 1):
-                report += f"\n### Case {i}: {doc.get('title', 'Untitled')}\n"
-                report += f"- URL: {doc['url']}\n"
-                report += f"- Relevance: {doc.get('similarity', 0):.2%}\n\n"
-            
-            report += f"\n## AI Analysis\n{llm_response}\n"
+            report = build_report(query, ranked, llm_response, estimate)
             
             st.download_button(
                 label="📥 Download Full Report",
@@ -0,0 +1,42 @@
+"""Throughput of the monetary-amount extractor over full crawled texts.
+
+Usage: python -m benchmarks.bench_amounts [--docs 15] [--chars 50000] [--repeat 5]
+Also prints the size of the compact amount table against the raw top-5 x 8000-char excerpts.
+"""
+import time
+import argparse
+
+from src.analysis.amounts import extract_amounts, amount_table, estimate_range, describe_estimate
+from benchmarks.synthetic import make_docs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=15)
+    parser.add_argument("--chars", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    docs = make_docs(args.docs, args.chars)
+    total_chars = sum(len(d["text"]) for d in docs)
+    timings = []
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        for d in docs:
+            d["amounts"] = extract_amounts(d["text"])
+        timings.append(time.perf_counter() - t0)
+    best = min(timings)
+    found = sum(len(d["amounts"]) for d in docs)
+    print(f"extract: best {best * 1000:.1f} ms  {total_chars / best / 1e6:6.1f} M chars/s  "
+          f"{len(docs) / best:8.1f} docs/s  ({found} amounts)")
+
+    table = amount_table(docs[:10])
+    excerpts = sum(min(len(d["text"]), 8000) for d in docs[:5])
+    print(f"prompt:  amount table {len(table):,} chars vs. raw excerpts {excerpts:,} chars")
+    estimate = estimate_range(docs[:10])
+    if estimate:
+        print(f"estimate: {describe_estimate(estimate)}")
+
+
+if __name__ == "__main__":
+    main()
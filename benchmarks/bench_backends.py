@@ -0,0 +1,94 @@
+"""Compare Legal-BERT inference backends: throughput, peak RSS, and drift from fp32.
+
+Usage: python -m benchmarks.bench_backends [--backends torch,int8,onnx] [--docs 64] [--threads 4]
+Each backend runs in a fresh subprocess so peak RSS is measured in isolation. Cosine drift is
+reported against the fp32 torch vectors for the same inputs.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+
+import numpy as np
+
+from benchmarks.synthetic import make_docs
+
+
+def worker(backend: str, docs: int, batch_size: int, out_path: str) -> None:
+    os.environ["EMBED_CACHE_DIR"] = ""
+    os.environ["LEGAL_BERT_BACKEND"] = backend
+    from src.utils.utils import embed_texts, get_encoder
+
+    texts = [d["text"][:2048] for d in make_docs(docs, 6000)]
+    t0 = time.perf_counter()
+    get_encoder()
+    load_seconds = time.perf_counter() - t0
+    embed_texts(texts[:2], batch_size=batch_size)  # warm-up
+
+    t0 = time.perf_counter()
+    vectors = embed_texts(texts, batch_size=batch_size)
+    elapsed = time.perf_counter() - t0
+
+    np.save(out_path, vectors)
+    print(json.dumps({
+        "backend": backend,
+        "load_seconds": round(load_seconds, 2),
+        "docs_per_sec": round(len(texts) / elapsed, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", default="torch,int8,onnx")
+    parser.add_argument("--docs", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--threads", type=int, default=None, help="Sets TORCH_NUM_THREADS for every backend")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--out", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.docs, args.batch_size, args.out)
+        return
+
+    env = dict(os.environ)
+    if args.threads:
+        env["TORCH_NUM_THREADS"] = str(args.threads)
+
+    backends = args.backends.split(",")
+    if "torch" not in backends:
+        backends.insert(0, "torch")  # fp32 baseline for the drift check
+
+    results, vectors = {}, {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            out = os.path.join(tmp, f"{backend}.npy")
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_backends", "--worker", backend,
+                 "--docs", str(args.docs), "--batch-size", str(args.batch_size), "--out", out],
+                env=env, capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                print(f"{backend:>6}: failed\n{proc.stderr.strip().splitlines()[-1] if proc.stderr else ''}")
+                continue
+            results[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+            vectors[backend] = np.load(out)
+
+    baseline = vectors.get("torch")
+    print(f"{'backend':>8} {'load s':>7} {'docs/s':>8} {'peak MB':>8} {'mean cos':>9} {'min cos':>8}")
+    for backend, r in results.items():
+        if baseline is not None:
+            cos = np.sum(vectors[backend] * baseline, axis=1)
+            drift = f"{cos.mean():9.5f} {cos.min():8.5f}"
+        else:
+            drift = f"{'n/a':>9} {'n/a':>8}"
+        print(f"{backend:>8} {r['load_seconds']:7.2f} {r['docs_per_sec']:8.2f} {r['peak_rss_mb']:8.1f} {drift}")
+
+
+if __name__ == "__main__":
+    main()
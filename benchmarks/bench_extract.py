@@ -0,0 +1,93 @@
+"""Compare HTML-to-text backends on the saved legal pages in benchmarks/fixtures/pages.
+
+Usage: python -m benchmarks.bench_extract [--scale 200] [--repeat 3]
+--scale repeats each page's body to approximate multi-megabyte judgment pages.
+Reports serial throughput per backend, process-pool throughput, output parity against the
+original html.parser backend, and time / peak traced memory of streaming extraction (stopping
+at the --text-cap characters the pipeline keeps) against a full parse.
+"""
+import os
+import re
+import glob
+import time
+import argparse
+import tracemalloc
+
+from src.crawling.extract import BACKENDS, extract_text, extract_texts, extract_text_streaming, _lxml_available
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "pages")
+
+
+def load_pages(scale: int):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            html = f.read()
+        match = re.search(r"<body[^>]*>(.*)</body>", html, re.S | re.I)
+        if match and scale > 1:
+            html = html[:match.start(1)] + match.group(1) * scale + html[match.end(1):]
+        pages.append((os.path.basename(path), html))
+    return pages
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def word_jaccard(a: str, b: str) -> float:
+    wa, wb = set(a.split()), set(b.split())
+    return len(wa & wb) / len(wa | wb) if (wa or wb) else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--text-cap", type=int, default=50000)
+    args = parser.parse_args()
+
+    pages = load_pages(args.scale)
+    htmls = [h for _, h in pages]
+    total_mb = sum(len(h.encode("utf-8")) for h in htmls) / 1e6
+    print(f"{len(pages)} pages, {total_mb:.1f} MB of HTML")
+
+    backends = [b for b in BACKENDS if b != "lxml" or _lxml_available()]
+    for backend in backends:
+        serial = timed(lambda: [extract_text(h, backend) for h in htmls], args.repeat)
+        extract_texts(htmls[:2], backend)  # start pool workers outside the timed region
+        pooled = timed(lambda: extract_texts(htmls, backend), args.repeat)
+        print(f"{backend:>12}: serial {total_mb / serial:6.1f} MB/s  pool {total_mb / pooled:6.1f} MB/s")
+
+    # Parity against the original backend
+    baseline = [extract_text(h, "html.parser") for h in htmls]
+    for backend in backends:
+        if backend == "html.parser":
+            continue
+        for (name, html), base in zip(pages, baseline):
+            out = extract_text(html, backend)
+            status = "identical" if out == base else f"word jaccard {word_jaccard(out, base):.4f}"
+            print(f"{backend:>12} vs html.parser  {name:<24} {status}")
+
+    # Streaming extraction: parse chunk by chunk and stop at the text cap, no tree built
+    for backend in backends:
+        for label, fn in (("full parse", lambda h: extract_text(h, backend)[:args.text_cap]),
+                          ("streaming", lambda h: extract_text_streaming(h, args.text_cap, backend))):
+            best = timed(lambda: [fn(h) for h in htmls], args.repeat)
+            tracemalloc.start()
+            for h in htmls:
+                fn(h)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{backend:>12} {label:>10}: {best * 1000:8.1f} ms  peak {peak / 1e6:7.1f} MB")
+        same = all(extract_text_streaming(h, args.text_cap, backend) == extract_text(h, backend)[:args.text_cap]
+                   for h in htmls)
+        print(f"{backend:>12} streaming output {'identical' if same else 'differs'} (first {args.text_cap:,} chars)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""End-to-end pipeline benchmark against local stand-ins (no network, no API spend).
+
+Usage: python -m benchmarks.e2e.run [--runs 10] [--concurrency 2] [--mode staged|streaming]
+                                    [--save-baseline] [--compare] [--tolerance 0.25]
+
+Runs build_graph() with SerpAPI, Groq and every crawl target served locally (see standins.py),
+then reports per-stage latency percentiles, time-to-first-token, throughput and peak RSS.
+--save-baseline writes benchmarks/baselines/e2e-<mode>.json; --compare exits non-zero when a
+p50/p95 is slower than the saved baseline by more than the tolerance. Baselines are
+machine-specific and not committed: record one on the machine that runs --compare.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+# Dummy keys reach the stand-ins only; caches and the local corpus are off so every run does real work
+os.environ.update({
+    "SERPAPI_API_KEY": "bench", "GROQ_API_KEY": "bench",
+    "SERP_CACHE_PATH": "", "CRAWL_CACHE_PATH": "", "EMBED_CACHE_DIR": "", "CORPUS_DIR": "",
+})
+
+import numpy as np  # noqa: E402
+
+from benchmarks.synthetic import QUERY  # noqa: E402
+from benchmarks.e2e.standins import Standins, StandinConfig  # noqa: E402
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "baselines")
+PERCENTILES = (50, 95, 99)
+
+
+def run_once(graph, query: str) -> Dict[str, float]:
+    from src.progress import CallbackReporter, use_reporter
+
+    timings: Dict[str, float] = {}
+    lock = threading.Lock()
+
+    def collect(event: Dict[str, Any]) -> None:
+        if event["type"] == "timing":
+            with lock:
+                timings[event["stage"]] = event["seconds"]
+
+    t0 = time.perf_counter()
+    with use_reporter(CallbackReporter(collect)):
+        state = graph.invoke({"query": query, "stream_analysis": True})
+        stream = state.get("llm_stream")
+        if stream is not None:
+            t_llm = time.perf_counter()
+            first = None
+            for _ in stream:
+                if first is None:
+                    first = time.perf_counter() - t_llm
+            timings["llm_ttft"] = first or 0.0
+            timings["llm_stream"] = time.perf_counter() - t_llm
+    timings["total"] = time.perf_counter() - t0
+    timings["ranked"] = len(state.get("ranked", []))
+    return timings
+
+
+def summarise(samples: List[Dict[str, float]], wall: float) -> Dict[str, Any]:
+    stages: Dict[str, List[float]] = {}
+    for s in samples:
+        for name, value in s.items():
+            if name != "ranked":
+                stages.setdefault(name, []).append(value)
+    return {
+        "runs": len(samples),
+        "throughput_per_min": round(60 * len(samples) / wall, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "ranked_min": min(s["ranked"] for s in samples),
+        "stages": {
+            name: {f"p{p}": round(float(np.percentile(values, p)), 3) for p in PERCENTILES}
+            for name, values in stages.items()
+        },
+    }
+
+
+def print_summary(summary: Dict[str, Any]) -> None:
+    print(f"{'stage':>14} " + " ".join(f"{'p' + str(p):>8}" for p in PERCENTILES))
+    for name, pct in summary["stages"].items():
+        print(f"{name:>14} " + " ".join(f"{pct['p' + str(p)]:8.3f}" for p in PERCENTILES))
+    print(f"runs {summary['runs']}  throughput {summary['throughput_per_min']:.1f}/min  "
+          f"peak RSS {summary['peak_rss_mb']:.0f} MB  min ranked docs {summary['ranked_min']}")
+
+
+def compare(summary: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, slack: float) -> List[str]:
+    """p50/p95 regressions beyond tolerance (relative) plus slack (absolute seconds, for tiny stages)"""
+    regressions = []
+    for name, base in baseline["stages"].items():
+        current = summary["stages"].get(name)
+        if current is None:
+            regressions.append(f"{name}: missing from this run")
+            continue
+        for key in ("p50", "p95"):
+            limit = base[key] * (1 + tolerance) + slack
+            if current[key] > limit:
+                regressions.append(f"{name} {key}: {current[key]:.3f}s > {limit:.3f}s (baseline {base[key]:.3f}s)")
+    if summary["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + tolerance):
+        regressions.append(f"peak RSS: {summary['peak_rss_mb']:.0f} MB (baseline {baseline['peak_rss_mb']:.0f} MB)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--mode", choices=("staged", "streaming"), default="staged")
+    parser.add_argument("--query", default=QUERY)
+    parser.add_argument("--serp-latency", type=float, default=0.2)
+    parser.add_argument("--ttft", type=float, default=0.5, help="Stand-in Groq time to first token (s)")
+    parser.add_argument("--tokens-per-sec", type=float, default=200.0)
+    parser.add_argument("--slow-delay", type=float, default=3.0, help="Delay of the slow crawl host (s)")
+    parser.add_argument("--baseline", default=None, help="Baseline path (default baselines/e2e-<mode>.json)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--slack", type=float, default=0.05)
+    args = parser.parse_args()
+
+    config = StandinConfig(serp_latency=args.serp_latency, llm_ttft=args.ttft,
+                           llm_tokens_per_sec=args.tokens_per_sec, slow_delay=args.slow_delay)
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, f"e2e-{args.mode}.json")
+    if args.compare and not args.save_baseline and not os.path.exists(baseline_path):
+        # Fail before spending minutes on runs there is nothing to compare against
+        print(f"No baseline at {baseline_path}; record one on this machine first with:\n"
+              f"  python -m benchmarks.e2e.run --mode {args.mode} --runs {args.runs} --save-baseline",
+              file=sys.stderr)
+        sys.exit(2)
+
+    with Standins(config) as standins:
+        os.environ.update(standins.env)
+        from src.graph import build_graph
+
+        graph = build_graph(mode=args.mode)
+        run_once(graph, args.query)  # model loads and connection set-up stay out of the numbers
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            samples = list(pool.map(lambda _: run_once(graph, args.query), range(args.runs)))
+        wall = time.perf_counter() - t0
+        requests_served = dict(standins.requests)
+
+    summary = summarise(samples, wall)
+    summary["config"] = {"mode": args.mode, "concurrency": args.concurrency, **vars(config)}
+    print_summary(summary)
+    print(f"stand-in requests: {json.dumps(requests_served, sort_keys=True)}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"Saved baseline to {baseline_path}")
+
+    if args.compare:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != summary["config"]:
+            print("⚠️ Baseline was recorded with a different configuration; comparison may be meaningless")
+        regressions = compare(summary, baseline, args.tolerance, args.slack)
+        if regressions:
+            print("Regressions against baseline:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print(f"No regressions against {baseline_path} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
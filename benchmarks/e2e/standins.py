@@ -0,0 +1,230 @@
+"""Local stand-ins for the pipeline's external services.
+
+Everything runs on one aiohttp event loop in a background thread:
+  - a SerpAPI-compatible /search.json endpoint whose organic results point at the site servers
+  - a Groq (OpenAI-compatible) /openai/v1/chat/completions endpoint with configurable
+    time-to-first-token and tokens/sec, plain or SSE-streamed
+  - one static server per fake host (each bound to its own 127.0.0.x address so the crawler's
+    per-host limits apply as they would on the web), serving the fixture pages plus generated
+    award pages; the "slow" host delays every response and the "failing" host returns 5xx
+"""
+import json
+import time
+import zlib
+import random
+import asyncio
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+FIXTURES = Path(__file__).resolve().parent.parent / "fixtures" / "pages"
+
+FAST_HOSTS = ("127.0.0.2", "127.0.0.3", "127.0.0.4", "127.0.0.5")
+SLOW_HOST = "127.0.0.6"
+FAILING_HOST = "127.0.0.7"
+
+PARTIES = ["Larsen Infra Ltd", "Coastal Ports Authority", "Deccan Power Corp", "Union of India",
+           "Shree Cement Works", "Northern Railway", "Metro Rail Corp", "Hindustan Dredging Co"]
+TEMPLATES = [
+    "The Arbitral Tribunal has considered the submissions of {a} and {b} under clause {clause}.",
+    "{a} contends that the delay of {days} days in handing over the site was attributable to {b}.",
+    "An amount of INR {crore} crore is awarded to {a} towards extended stay costs with interest at {rate}% per annum.",
+    "{b} relied upon clause {clause} of the General Conditions of Contract to deny liability for {days} days.",
+    "The counter-claim of {b} for liquidated damages of USD {million} million stands rejected.",
+    "The extension of time of {days} days was granted to {a} without prejudice to its claims.",
+    "The petition of {b} under Section 34 of the Arbitration and Conciliation Act, 1996 is dismissed.",
+    "Costs of INR {lakh} lakh shall be borne by {b}.",
+]
+
+
+def award_page(i: int, paragraphs: int = 40) -> str:
+    """A generated award page; fill-ins vary per page so near-duplicate removal keeps them apart"""
+    rng = random.Random(i)
+    a, b = rng.sample(PARTIES, 2)
+    body = []
+    for _ in range(paragraphs):
+        sentence = rng.choice(TEMPLATES).format(
+            a=a, b=b, clause=f"{rng.randint(1, 40)}.{rng.randint(1, 9)}", days=rng.randint(30, 900),
+            crore=round(rng.uniform(1, 500), 2), rate=rng.choice([6, 9, 12, 18]),
+            million=round(rng.uniform(1, 90), 1), lakh=rng.randint(5, 95),
+        )
+        body.append(f"<p>{sentence}</p>")
+    return (f"<html><head><title>{a} v. {b} (Award {i})</title></head><body>"
+            f"<nav>Home | Awards | Search</nav><h1>{a} v. {b}</h1>{''.join(body)}"
+            f"<footer>Arbitration reporter</footer></body></html>")
+
+
+@dataclass
+class StandinConfig:
+    serp_latency: float = 0.2     # seconds per SerpAPI call
+    llm_ttft: float = 0.5         # seconds before the first token
+    llm_tokens_per_sec: float = 200.0
+    llm_tokens: int = 600         # tokens in the analysis answer
+    slow_delay: float = 3.0       # seconds per response on the slow host
+    flaky_every: int = 2          # the failing host returns 503 on every n-th request, 500 otherwise
+    pages_per_host: int = 4       # generated award pages on each fast host
+
+
+class Standins:
+    """Start with `with Standins(config) as s:`; s.env holds the variables that point the app at them"""
+
+    def __init__(self, config: Optional[StandinConfig] = None):
+        self.config = config or StandinConfig()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="standins", daemon=True)
+        self.runners: List[web.AppRunner] = []
+        self.ports: Dict[str, int] = {}
+        self.requests: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    # ---------------------------
+    # Lifecycle
+    # ---------------------------
+
+    def __enter__(self) -> "Standins":
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self.loop).result()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        asyncio.run_coroutine_threadsafe(self._stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+
+    async def _serve(self, name: str, host: str, app: web.Application) -> None:
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, host, 0)
+        await site.start()
+        self.runners.append(runner)
+        self.ports[name] = runner.addresses[0][1]
+
+    async def _start(self) -> None:
+        api = web.Application()
+        api.router.add_get("/search.json", self._serp)
+        api.router.add_post("/openai/v1/chat/completions", self._chat)
+        await self._serve("api", "127.0.0.1", api)
+        for host in FAST_HOSTS + (SLOW_HOST, FAILING_HOST):
+            app = web.Application()
+            app.router.add_get("/{path:.*}", self._page)
+            await self._serve(host, host, app)
+
+    async def _stop(self) -> None:
+        for runner in self.runners:
+            await runner.cleanup()
+
+    @property
+    def env(self) -> Dict[str, str]:
+        base = f"http://127.0.0.1:{self.ports['api']}"
+        return {"SERPAPI_URL": f"{base}/search.json", "GROQ_BASE_URL": base}
+
+    def _count(self, key: str) -> int:
+        with self._lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+            return self.requests[key]
+
+    # ---------------------------
+    # Fake SerpAPI
+    # ---------------------------
+
+    def site_urls(self) -> List[Dict[str, str]]:
+        """Every crawlable page, fast hosts first, then the slow and failing hosts"""
+        fixtures = sorted(p.name for p in FIXTURES.glob("*.html"))
+        urls = []
+        for h, host in enumerate(FAST_HOSTS):
+            base = f"http://{host}:{self.ports[host]}"
+            if h < len(fixtures):
+                urls.append({"link": f"{base}/fixtures/{fixtures[h]}", "title": fixtures[h]})
+            for i in range(self.config.pages_per_host):
+                n = h * 100 + i
+                urls.append({"link": f"{base}/awards/{n}", "title": f"Arbitral award {n}"})
+        for host in (SLOW_HOST, FAILING_HOST):
+            base = f"http://{host}:{self.ports[host]}"
+            urls.extend({"link": f"{base}/awards/{host[-1]}{i}", "title": f"Arbitral award {host} {i}"}
+                        for i in range(2))
+        return urls
+
+    async def _serp(self, request: web.Request) -> web.Response:
+        self._count("serp")
+        await asyncio.sleep(self.config.serp_latency)
+        # Each query gets a different rotation so the four searches overlap only partly
+        urls = self.site_urls()
+        shift = sum(map(ord, request.query.get("q", ""))) % len(urls)
+        rotated = urls[shift:] + urls[:shift]
+        organic = [{
+            "position": i + 1,
+            "title": u["title"],
+            "link": u["link"],
+            "snippet": "Arbitral tribunal awarded damages of INR 12.5 crore with interest; final award.",
+        } for i, u in enumerate(rotated[:int(request.query.get("num", 10))])]
+        return web.json_response({"organic_results": organic})
+
+    # ---------------------------
+    # Fake Groq chat completions
+    # ---------------------------
+
+    def _answer(self, body: dict) -> List[str]:
+        system = body.get("messages", [{}])[0].get("content", "")
+        if "search expert" in system:
+            return [json.dumps({
+                "main_query": "construction arbitration delay claims damages India",
+                "amount_query": "construction arbitration award amount INR crore damages",
+            })]
+        words = ("The tribunal in [C1-P1] awarded INR 12.5 crore for prolonged stay costs, "
+                 "which is the closest analogue to the user's claim. ").split()
+        return [words[i % len(words)] + " " for i in range(self.config.llm_tokens)]
+
+    async def _chat(self, request: web.Request) -> web.StreamResponse:
+        self._count("groq")
+        body = await request.json()
+        tokens = self._answer(body)
+        model = body.get("model", "stand-in")
+        created = int(time.time())
+        await asyncio.sleep(self.config.llm_ttft)
+
+        if not body.get("stream"):
+            await asyncio.sleep(len(tokens) / self.config.llm_tokens_per_sec)
+            return web.json_response({
+                "id": "chatcmpl-standin", "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for token in tokens:
+            chunk = {"id": "chatcmpl-standin", "object": "chat.completion.chunk", "created": created,
+                     "model": model, "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            await asyncio.sleep(1 / self.config.llm_tokens_per_sec)
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    # ---------------------------
+    # Crawl targets
+    # ---------------------------
+
+    async def _page(self, request: web.Request) -> web.Response:
+        host = request.url.host
+        path = request.match_info["path"]
+        n = self._count(host)
+        if host == FAILING_HOST:
+            return web.Response(status=503 if n % self.config.flaky_every == 0 else 500, text="upstream error")
+        if host == SLOW_HOST:
+            await asyncio.sleep(self.config.slow_delay)
+
+        if path.startswith("fixtures/"):
+            page = FIXTURES / Path(path).name
+            if not page.is_file():
+                raise web.HTTPNotFound()
+            return web.Response(body=page.read_bytes(), content_type="text/html", charset="utf-8")
+        if path.startswith("awards/"):
+            # crc32 rather than a character sum: paths that are anagrams must not share a page
+            seed = zlib.crc32((host + path).encode("utf-8"))
+            return web.Response(text=award_page(seed), content_type="text/html")
+        raise web.HTTPNotFound()
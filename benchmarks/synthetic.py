@@ -0,0 +1,29 @@
+"""Synthetic award-like documents shared by the embedding benchmarks."""
+import random
+
+QUERY = "Construction contract dispute involving delay claims and cost overruns, claimant seeks damages"
+
+SENTENCES = [
+    "The Arbitral Tribunal has carefully considered the submissions of the parties.",
+    "The Claimant contends that the delay in handing over the site was attributable to the Respondent.",
+    "An amount of INR 12.5 crore is awarded towards extended stay costs along with interest at 9% per annum.",
+    "The Respondent relied upon clause 17.3 of the General Conditions of Contract to deny liability.",
+    "In view of the foregoing, the counter-claim for liquidated damages stands rejected.",
+    "The Tribunal finds that the extension of time was granted without prejudice to the Claimant's claims.",
+    "The petition under Section 34 of the Arbitration and Conciliation Act, 1996 is dismissed.",
+    "Costs of the arbitration shall be borne equally by the parties.",
+]
+
+
+def make_docs(n: int, chars: int, seed: int = 7):
+    rng = random.Random(seed)
+    docs = []
+    for i in range(n):
+        parts, size = [], 0
+        target = rng.randint(chars // 4, chars)
+        while size < target:
+            s = rng.choice(SENTENCES)
+            parts.append(s)
+            size += len(s) + 1
+        docs.append({"url": f"https://example.org/{i}", "title": f"Case {i}", "text": " ".join(parts)})
+    return docs
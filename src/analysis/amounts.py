@@ -0,0 +1,214 @@
+import os
+import re
+import math
+import functools
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# ---------------------------
+# Monetary Amount Extraction
+# ---------------------------
+# One compiled pattern finds award/claim keywords, sentence ends and amounts in a single
+# left-to-right scan. An amount takes the kind of the closest keyword in its sentence: the last
+# one before it (within CONTEXT_BEFORE chars) or one right after it ("INR 5 crore was awarded").
+# Amounts with neither are "other".
+
+_AWARD = (r"awarded|award(?:s|ed)? (?:a |the )?(?:sum|amount) of|award of|is awarded|are awarded|shall pay|"
+          r"directed to pay|liable to pay|granted|decreed|entitled to")
+_CLAIM = r"claimed|claims?|claiming|seeks?|sought|demanded|prayed for|counter-?claims?"
+_PRE = r"(?<![a-z])(?:₹|rs\.?|inr|usd|us\s?\$|\$|eur|€|gbp|£)"
+_NUM = r"\d{1,3}(?:,\d{2,3})+(?:\.\d+)?|\d+(?:\.\d+)?"
+_SCALE = r"crores?|cr\.?(?![a-z])|lakhs?|lacs?|millions?|mn(?![a-z])|billions?|bn(?![a-z])|thousand"
+_POST = r"rupees|dollars|usd|inr|euros?"
+
+AMOUNT_SCAN_RE = re.compile(
+    rf"(?P<award>\b(?:{_AWARD})\b)"
+    rf"|(?P<claim>\b(?:{_CLAIM})\b)"
+    rf"|(?P<stop>[.!?;]\s+(?=[A-Z(]))"
+    rf"|(?P<pre>{_PRE})\s*(?P<num1>{_NUM})(?:\s*(?P<scale1>{_SCALE}))?(?:\s*(?P<post1>{_POST})\b)?"
+    rf"|(?<![\w.,])(?P<num2>{_NUM})\s*(?P<scale2>{_SCALE})(?:\s*(?P<post2>{_POST})\b)?"
+    rf"|(?<![\w.,])(?P<num3>{_NUM})\s*(?P<post3>{_POST})\b",
+    re.IGNORECASE,
+)
+
+SCALES = {"crore": 1e7, "cr": 1e7, "lakh": 1e5, "lac": 1e5, "million": 1e6, "mn": 1e6,
+          "billion": 1e9, "bn": 1e9, "thousand": 1e3}
+CURRENCIES = {"₹": "INR", "rs": "INR", "inr": "INR", "rupees": "INR",
+              "$": "USD", "usd": "USD", "us$": "USD", "dollars": "USD",
+              "€": "EUR", "eur": "EUR", "euro": "EUR", "euros": "EUR",
+              "£": "GBP", "gbp": "GBP"}
+
+CONTEXT_BEFORE = 160
+CONTEXT_AFTER = 40
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_fx(spec: str) -> Tuple[Tuple[str, float], ...]:
+    """Valid CODE=rate pairs of an AMOUNT_FX value; bad entries are reported once and skipped"""
+    pairs = []
+    for pair in spec.split(","):
+        if not pair.strip():
+            continue
+        code, _, rate = pair.partition("=")
+        try:
+            value = float(rate)
+        except ValueError:
+            value = 0.0
+        if not code.strip() or not (value > 0 and math.isfinite(value)):
+            print(f"Ignoring malformed AMOUNT_FX entry '{pair.strip()}' (expected CODE=rate)")
+            continue
+        pairs.append((code.strip().upper(), value))
+    return tuple(pairs)
+
+
+def fx_rates() -> Dict[str, float]:
+    """INR per unit of each currency; AMOUNT_FX overrides, e.g. "USD=83,EUR=90,GBP=105" """
+    rates = {"INR": 1.0, "USD": 83.0, "EUR": 90.0, "GBP": 105.0}
+    rates.update(_parse_fx(os.getenv("AMOUNT_FX", "")))
+    return rates
+
+
+def _scale(word: Optional[str]) -> float:
+    if not word:
+        return 1.0
+    word = word.lower().rstrip(".")
+    return SCALES.get(word) or SCALES.get(word.rstrip("s"), 1.0)
+
+
+def _currency(symbol: Optional[str], scale_word: Optional[str]) -> Optional[str]:
+    if symbol:
+        symbol = re.sub(r"\s+", "", symbol.lower()).rstrip(".")
+        return CURRENCIES.get(symbol)
+    if scale_word and scale_word.lower()[:2] in ("cr", "la"):
+        return "INR"  # crore / lakh imply rupees
+    return None
+
+
+def extract_amounts(text: str, max_records: int = 40) -> List[Dict[str, Any]]:
+    """(amount, currency, normalized value, kind, context span) records in order of appearance"""
+    rates = fx_rates()
+    records: List[Dict[str, Any]] = []
+    last_kind, last_end = None, 0
+    pending: List[Dict[str, Any]] = []  # amounts since the last keyword, which a following keyword may claim
+
+    for m in AMOUNT_SCAN_RE.finditer(text):
+        if m.group("stop"):
+            last_kind, pending = None, []
+            continue
+        if m.group("award") or m.group("claim"):
+            kind = "award" if m.group("award") else "claim"
+            for rec in pending:
+                after = m.start() - rec["end"]
+                if after <= CONTEXT_AFTER and after < rec.pop("_before", CONTEXT_BEFORE + 1):
+                    rec["kind"] = kind
+            last_kind, last_end, pending = kind, m.end(), []
+            continue
+        if len(records) >= max_records:
+            continue
+
+        num = m.group("num1") or m.group("num2") or m.group("num3")
+        scale_word = m.group("scale1") or m.group("scale2")
+        symbol = m.group("pre") or m.group("post1") or m.group("post2") or m.group("post3")
+        try:
+            value = float(num.replace(",", "")) * _scale(scale_word)
+        except ValueError:
+            continue
+        if value <= 0:
+            continue
+        currency = _currency(symbol, scale_word)
+        before = m.start() - last_end
+        rec = {
+            "amount": " ".join(m.group(0).split()),
+            "currency": currency,
+            "value": value,
+            "value_inr": value * rates[currency] if currency in rates else None,
+            "kind": last_kind if last_kind and before <= CONTEXT_BEFORE else "other",
+            "start": m.start(),
+            "end": m.end(),
+            "_before": before if last_kind else CONTEXT_BEFORE + 1,
+        }
+        records.append(rec)
+        pending.append(rec)
+
+    for rec in records:
+        rec.pop("_before", None)
+        rec["context"] = " ".join(text[max(0, rec["start"] - 80):rec["end"] + 80].split())
+    return records
+
+
+def annotate_amounts(docs: List[Dict[str, Any]]) -> int:
+    """Attach "amounts" records to docs that do not have them yet; returns the number found"""
+    found = 0
+    for d in docs:
+        if "amounts" not in d:
+            d["amounts"] = extract_amounts(d.get("text", ""))
+        found += len(d["amounts"])
+    return found
+
+
+# ---------------------------
+# Statistical Estimate
+# ---------------------------
+
+def _weighted_quantiles(values: np.ndarray, weights: np.ndarray, qs) -> List[float]:
+    order = np.argsort(values)
+    values, weights = values[order], weights[order]
+    cum = (np.cumsum(weights) - 0.5 * weights) / weights.sum()
+    return [float(np.interp(q, cum, values)) for q in qs]
+
+
+def estimate_range(docs: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Similarity-weighted 25th/50th/75th percentile of each case's headline award (in INR).
+
+    A case's headline is its largest awarded amount; when no case has one, the largest amount
+    of any kind is used instead (basis "all").
+    """
+    for basis, kinds in (("awarded", ("award",)), ("all", ("award", "claim", "other"))):
+        heads, weights = [], []
+        for d in docs:
+            values = [a["value_inr"] for a in d.get("amounts", []) if a["kind"] in kinds and a["value_inr"]]
+            if values:
+                heads.append(max(values))
+                weights.append(max(d.get("similarity", 0.0), 0.05))
+        if heads:
+            low, median, high = _weighted_quantiles(np.array(heads), np.array(weights), (0.25, 0.5, 0.75))
+            return {"low": low, "median": median, "high": high, "n_cases": len(heads), "basis": basis}
+    return None
+
+
+def format_inr(value: float) -> str:
+    if value >= 1e7:
+        return f"₹{value / 1e7:,.2f} crore"
+    if value >= 1e5:
+        return f"₹{value / 1e5:,.2f} lakh"
+    return f"₹{value:,.0f}"
+
+
+def describe_estimate(estimate: Dict[str, Any]) -> str:
+    usd = fx_rates()["USD"]
+    basis = "awarded amounts" if estimate["basis"] == "awarded" else "amounts mentioned"
+    return (f"{format_inr(estimate['low'])} – {format_inr(estimate['high'])} "
+            f"(median {format_inr(estimate['median'])}, ≈ ${estimate['median'] / usd / 1e6:,.1f}M; "
+            f"from {basis} in {estimate['n_cases']} cases)")
+
+
+# ---------------------------
+# Prompt Table
+# ---------------------------
+
+_KIND_ORDER = {"award": 0, "claim": 1, "other": 2}
+
+
+def amount_table(docs: List[Dict[str, Any]], per_case: int = 4, context_chars: int = 140) -> str:
+    """Compact Markdown table of the extracted amounts, awarded first within each case"""
+    rows = []
+    for ci, d in enumerate(docs, 1):
+        amounts = sorted((a for a in d.get("amounts", []) if a["value_inr"]),
+                         key=lambda a: (_KIND_ORDER[a["kind"]], -a["value_inr"]))
+        for a in amounts[:per_case]:
+            context = a["context"][:context_chars].replace("|", "/")
+            rows.append(f"| C{ci} | {a['kind']} | {a['amount']} | {a['value_inr'] / 1e7:,.2f} | {context} |")
+    if not rows:
+        return ""
+    return "| Case | Kind | Amount | ≈ INR crore | Context |\n| --- | --- | --- | --- | --- |\n" + "\n".join(rows) + "\n"
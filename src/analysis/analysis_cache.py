@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional
+
+from src.crawling.dedup import canonical_url
+
+# ---------------------------
+# Analysis Cache
+# ---------------------------
+# Two levels over one SQLite table of finished analyses:
+#   exact:    normalized query + hash of the analysed case set (+ model and prompt mode)
+#   semantic: a prior query whose Legal-BERT embedding is within ANALYSIS_CACHE_MIN_SIM and
+#             whose case set overlaps the current one by at least ANALYSIS_CACHE_MIN_OVERLAP
+# Entries expire after the TTL; beyond max_entries the least recently used are dropped.
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def case_set(docs: List[Dict[str, Any]]) -> List[str]:
+    return sorted({canonical_url(d["url"]) for d in docs if d.get("url")})
+
+
+def _variant() -> str:
+    """Settings that change the analysis text; entries from other settings never match"""
+    return "|".join((
+        os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile"),
+        os.getenv("ANALYSIS_CONTEXT", "budget"),
+        os.getenv("ANALYSIS_TOKEN_BUDGET", "6000"),
+    ))
+
+
+def exact_key(query: str, urls: List[str], variant: str) -> str:
+    payload = json.dumps([normalize_query(query), urls, variant], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _overlap(a: List[str], b: List[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(set(a) & set(b)) / max(len(a), len(b))
+
+
+class AnalysisCache:
+    """TTL + LRU cache of finished analyses with exact and embedding-similarity lookups"""
+
+    def __init__(self, path: str, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 500,
+                 min_similarity: float = 0.96, min_overlap: float = 0.8):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.min_similarity = min_similarity
+        self.min_overlap = min_overlap
+        self.hits = {"exact": 0, "semantic": 0}
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_cache ("
+            " key TEXT PRIMARY KEY, variant TEXT NOT NULL, query TEXT NOT NULL, query_vec BLOB,"
+            " urls TEXT NOT NULL, response TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS analysis_cache_variant ON analysis_cache(variant)")
+        self._conn.commit()
+
+    def _hit(self, row, level: str, similarity: float, overlap: float) -> Dict[str, Any]:
+        key, query, response, created_at = row
+        self._conn.execute("UPDATE analysis_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._conn.commit()
+        self.hits[level] += 1
+        return {"response": response, "level": level, "query": query, "similarity": similarity,
+                "overlap": overlap, "age_seconds": time.time() - created_at}
+
+    def lookup(self, query: str, docs: List[Dict[str, Any]],
+               embed: Callable[[], np.ndarray]) -> Optional[Dict[str, Any]]:
+        """Exact match first; `embed()` (the query vector) is only called for the semantic level"""
+        urls = case_set(docs)
+        variant = _variant()
+        oldest = time.time() - self.ttl_seconds
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key, query, response, created_at FROM analysis_cache WHERE key = ? AND created_at >= ?",
+                (exact_key(query, urls, variant), oldest),
+            ).fetchone()
+            if row is not None:
+                return self._hit(row, "exact", 1.0, 1.0)
+            rows = self._conn.execute(
+                "SELECT key, query, response, created_at, query_vec, urls FROM analysis_cache"
+                " WHERE variant = ? AND created_at >= ? AND query_vec IS NOT NULL",
+                (variant, oldest),
+            ).fetchall()
+
+        # Case-set overlap is cheap, so it filters candidates before any embedding work
+        candidates = [(r, overlap) for r in rows if (overlap := _overlap(urls, json.loads(r[5]))) >= self.min_overlap]
+        if candidates:
+            q = np.asarray(embed(), dtype=np.float32)
+            q = q / (np.linalg.norm(q) + 1e-9)
+            vecs = np.stack([np.frombuffer(r[4], dtype=np.float32) for r, _ in candidates])
+            sims = vecs @ q / (np.linalg.norm(vecs, axis=1) + 1e-9)
+            best = int(np.argmax(sims))
+            if sims[best] >= self.min_similarity:
+                row, overlap = candidates[best]
+                with self._lock:
+                    return self._hit(row[:4], "semantic", float(sims[best]), overlap)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, query: str, docs: List[Dict[str, Any]], response: str,
+            query_vec: Optional[np.ndarray] = None) -> None:
+        urls = case_set(docs)
+        variant = _variant()
+        blob = np.asarray(query_vec, dtype=np.float32).tobytes() if query_vec is not None else None
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache"
+                " (key, variant, query, query_vec, urls, response, created_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (exact_key(query, urls, variant), variant, query, blob, json.dumps(urls), response, now, now),
+            )
+            self._conn.execute("DELETE FROM analysis_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            # LRU cap: drop the least recently used entries beyond max_entries
+            self._conn.execute(
+                "DELETE FROM analysis_cache WHERE key IN ("
+                " SELECT key FROM analysis_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+            hits = sum(self.hits.values())
+            lookups = hits + self.misses
+            return {
+                "entries": entries,
+                "exact_hits": self.hits["exact"],
+                "semantic_hits": self.hits["semantic"],
+                "misses": self.misses,
+                "hit_ratio": (hits / lookups) if lookups else 0.0,
+            }
+
+
+_cache: Optional[AnalysisCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache() -> Optional[AnalysisCache]:
+    """Process-wide cache; disabled by setting ANALYSIS_CACHE_PATH to an empty string"""
+    global _cache
+    path = os.getenv("ANALYSIS_CACHE_PATH", ".cache/analysis.sqlite3")
+    if not path:
+        return None
+    with _cache_lock:
+        if _cache is None or _cache.path != path:
+            _cache = AnalysisCache(
+                path,
+                ttl_seconds=float(os.getenv("ANALYSIS_CACHE_TTL", str(7 * 24 * 3600))),
+                max_entries=int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "500")),
+                min_similarity=float(os.getenv("ANALYSIS_CACHE_MIN_SIM", "0.96")),
+                min_overlap=float(os.getenv("ANALYSIS_CACHE_MIN_OVERLAP", "0.8")),
+            )
+        return _cache
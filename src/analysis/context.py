@@ -0,0 +1,109 @@
+import re
+import math
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+from src.ranking.ranker import split_passages
+
+# ---------------------------
+# Token-Budgeted Context Builder
+# ---------------------------
+
+MONEY_RE = re.compile(
+    r"(?:₹|\$|\brs\.?|\binr\b|\busd\b|\beur\b|\bgbp\b)\s*[\d,.]+|[\d,.]+\s*(?:crore|cr\b|lakh|lac\b|million|billion|mn\b|bn\b)",
+    re.IGNORECASE,
+)
+OPERATIVE_RE = re.compile(
+    r"\b(?:award(?:ed|s)? (?:a |the )?(?:sum|amount)|is awarded|are awarded|shall pay|directed to pay|"
+    r"liable to pay|stands? modified|set aside|partly allowed|appeal is (?:allowed|dismissed)|"
+    r"petition is (?:allowed|dismissed)|in the result|interest at|counter-?claim)\b",
+    re.IGNORECASE,
+)
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "the", "a", "an", "and", "or", "of", "to", "in", "on", "for", "with", "by", "at", "is", "are", "was",
+    "be", "as", "that", "this", "it", "from", "case", "involving", "around", "seeks",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+def _terms(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def _lexical_scores(query: str, passages: List[str]) -> List[float]:
+    """TF-IDF overlap with the query, scaled to [0, 1]"""
+    q_terms = set(_terms(query))
+    tfs = [Counter(_terms(p)) for p in passages]
+    n = len(passages)
+    df = Counter(t for tf in tfs for t in q_terms if t in tf)
+    raw = []
+    for tf in tfs:
+        score = 0.0
+        for t in q_terms:
+            if tf.get(t):
+                score += (1 + math.log(tf[t])) * math.log(1 + n / df[t])
+        raw.append(score)
+    top = max(raw) if raw else 0.0
+    return [r / top if top else 0.0 for r in raw]
+
+
+def _doc_passages(doc: Dict[str, Any], passage_chars: int) -> List[Tuple[str, float]]:
+    """(passage, embedding score or -1) pairs; reuses passage-mode spans when the ranker kept them"""
+    text = doc.get("text", "")
+    if doc.get("passage_scores"):
+        return [(text[p["start"]:p["end"]].strip(), p["score"]) for p in doc["passage_scores"]]
+    return [(p, -1.0) for _, _, p in split_passages(text, passage_chars, overlap_chars=0, max_passages=64)]
+
+
+def build_context(query: str, docs: List[Dict[str, Any]], token_budget: int = 6000,
+                  max_cases: int = 10, passage_chars: int = 1200) -> Tuple[str, int]:
+    """Fill a token budget with the passages that best match the query.
+
+    Passages mentioning monetary amounts or operative-order language are boosted. Each selected
+    passage is labelled [C<case>-P<passage>] under its case header so the model can cite it.
+    Returns the context and the number of cases that contributed passages.
+    """
+    cases = docs[:max_cases]
+    candidates = []  # (score, case_idx, passage_idx, passage)
+    for ci, d in enumerate(cases):
+        passages = [(p, s) for p, s in _doc_passages(d, passage_chars) if p]
+        lexical = _lexical_scores(query, [p for p, _ in passages])
+        for pi, ((passage, emb_score), lex) in enumerate(zip(passages, lexical)):
+            relevance = max(emb_score, 0.0) if emb_score >= 0 else lex
+            score = relevance + 0.3 * d.get("similarity", 0.0)
+            if MONEY_RE.search(passage):
+                score += 0.5
+            if OPERATIVE_RE.search(passage):
+                score += 0.3
+            candidates.append((score, ci, pi, passage))
+
+    headers = {
+        ci: f"\n### CASE {ci + 1} (Relevance: {d.get('similarity', 0):.1%})\n"
+            f"**Title**: {d.get('title', 'Untitled')}\n**Source**: {d.get('url', '')}\n"
+        for ci, d in enumerate(cases)
+    }
+
+    # Greedy fill by score; a case header is paid for by its first selected passage
+    selected: Dict[int, List[Tuple[int, str]]] = {}
+    used = 0
+    for score, ci, pi, passage in sorted(candidates, key=lambda c: c[0], reverse=True):
+        cost = estimate_tokens(passage) + 6
+        if ci not in selected:
+            cost += estimate_tokens(headers[ci])
+        if used + cost > token_budget:
+            continue
+        selected.setdefault(ci, []).append((pi, passage))
+        used += cost
+
+    parts = []
+    for ci in sorted(selected):
+        parts.append(headers[ci])
+        for pi, passage in sorted(selected[ci]):
+            parts.append(f"[C{ci + 1}-P{pi + 1}] {passage}\n")
+        parts.append("---\n")
+    return "".join(parts), len(selected)
@@ -1,39 +1,61 @@
 import os
-from typing import Dict, List, Any
-from groq import Groq
-from transformers import pipeline
+import time
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+
+from src.analysis.ner import get_ner_engine
+from src.analysis.context import build_context, estimate_tokens
+from src.analysis.amounts import annotate_amounts, amount_table, estimate_range, describe_estimate
+from src.metrics import span, incr, record_span
 
 def _extract_keywords_with_legalbert(user_query: str) -> List[str]:
     """
     Uses LegalBERT to extract key legal terms from a query.
+    The NER pipeline is loaded once per process; failures yield an empty list.
     """
-    try:
-        # Load a pre-trained LegalBERT model for Named Entity Recognition (NER)
-        nlp = pipeline("ner", model="Akshita/legal-ner", aggregation_strategy="simple")
-        entities = nlp(user_query)
-        # Extract unique terms while preserving order
-        extracted_terms = list(dict.fromkeys([entity['word'] for entity in entities]))
-        return extracted_terms
-    except Exception as e:
-        # If there's an error (e.g., model download fails), return an empty list
-        print(f"Error using LegalBERT for keyword extraction: {e}")
-        return []
+    return get_ner_engine().extract(user_query)
+
+
+def extract_keywords_batch(user_queries: List[str]) -> List[List[str]]:
+    """Extract legal keywords for many case descriptions in one forward pass."""
+    return get_ner_engine().extract_batch(user_queries)
+
+def _groq_client(api_key: str):
+    # Deferred: the Groq SDK (httpx, pydantic) is only needed once a query is analysed
+    from groq import Groq
+    return Groq(api_key=api_key)
+
 
-def enhance_query_with_llm(user_query: str) -> Dict[str, str]:
+def _record_tokens(attrs: Dict[str, Any], call: str, usage, messages: List[Dict[str, str]],
+                   completion: Optional[str] = None) -> None:
+    """Token counts from the API's usage block, estimated from the text when it is missing"""
+    tokens_in = getattr(usage, "prompt_tokens", None)
+    tokens_out = getattr(usage, "completion_tokens", None)
+    if tokens_in is None:
+        tokens_in = sum(estimate_tokens(m["content"]) for m in messages)
+    if tokens_out is None:
+        tokens_out = estimate_tokens(completion or "")
+    attrs.update(tokens_in=tokens_in, tokens_out=tokens_out)
+    incr("llm_tokens", tokens_in, call=call, direction="in")
+    incr("llm_tokens", tokens_out, call=call, direction="out")
+
+
+def enhance_query_with_llm(user_query: str, legal_keywords: Optional[List[str]] = None) -> Dict[str, str]:
     """
     Use a hybrid approach (LegalBERT + LLM) to extract key legal terms and 
     generate multiple targeted search queries.
+    Pass legal_keywords when they have already been extracted (speculative search does).
     """
     api_key = os.getenv("GROQ_API_KEY")
     if not api_key:
         return {"main": user_query, "amount_focused": user_query}
 
     # Step 1: Extract precise keywords with LegalBERT
-    legal_keywords = _extract_keywords_with_legalbert(user_query)
+    if legal_keywords is None:
+        legal_keywords = _extract_keywords_with_legalbert(user_query)
     
     # Step 2: Use Groq LLM, enhanced with LegalBERT keywords if available
     model = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
-    client = Groq(api_key=api_key)
+    client = _groq_client(api_key)
     
     # Base prompts
     system_prompt = """You are a legal search expert specializing in finding arbitration awards with monetary damages.
@@ -60,17 +82,20 @@ Return ONLY valid JSON, no other text."""
 
     user_prompt = user_prompt_template.format(user_query=user_query, keyword_section=keyword_section)
 
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.2,
-            max_tokens=200, # Increased slightly for potentially longer queries
-        )
-        content = response.choices[0].message.content.strip() if response.choices else ""
+        with span("llm.enhance", model=model) as attrs:
+            response = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=0.2,
+                max_tokens=200, # Increased slightly for potentially longer queries
+            )
+            content = response.choices[0].message.content.strip() if response.choices else ""
+            _record_tokens(attrs, "enhance", getattr(response, "usage", None), messages, content)
         
         # Try to parse JSON from the response
         import json
@@ -83,14 +108,7 @@ Return ONLY valid JSON, no other text."""
         # Fallback if LLM or JSON parsing fails
         return {"main": user_query, "amount_focused": user_query}
 
-def call_groq_analysis(query: str, docs: List[Dict[str, Any]]) -> str:
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        return "⚠️ GROQ_API_KEY not found. Cannot generate LLM analysis."
-    
-    model = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
-    client = Groq(api_key=api_key)
-    
+def _excerpt_context(docs: List[Dict[str, Any]]) -> str:
     # Take only top 5 most relevant cases (already sorted by similarity)
     top_docs = docs[:5]
     
@@ -111,10 +129,66 @@ def call_groq_analysis(query: str, docs: List[Dict[str, Any]]) -> str:
 ---
 """)
     
-    context = "\n".join(context_parts)
-    
-    system_prompt = """You are an expert arbitration analyst with deep knowledge of case law and dispute resolution. Your task is to:
-1. **Analyze Each Case Thoroughly**: Read all 5 provided cases carefully. For each case, identify:
+    return "\n".join(context_parts)
+
+
+def analysed_docs(docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The ranked docs that can contribute to the analysis prompt"""
+    if os.getenv("ANALYSIS_CONTEXT", "budget") == "excerpts":
+        return docs[:5]
+    return docs[:int(os.getenv("ANALYSIS_MAX_CASES", "10"))]
+
+
+def is_error_response(text: str) -> bool:
+    """Warnings and API errors returned in place of an analysis (never worth caching)"""
+    return (not text.strip() or text.startswith("⚠️") or text == "No response generated."
+            or "⚠️ Error calling Groq API" in text)
+
+
+def _amounts_context(query: str, docs: List[Dict[str, Any]]) -> Tuple[str, int]:
+    """Extracted-amount table and preliminary range, plus a small budget of supporting passages"""
+    max_cases = int(os.getenv("ANALYSIS_MAX_CASES", "10"))
+    cases = docs[:max_cases]
+    annotate_amounts(cases)
+    passages, n_cases = build_context(
+        query,
+        cases,
+        token_budget=int(os.getenv("ANALYSIS_AMOUNTS_TOKEN_BUDGET", "2000")),
+        max_cases=max_cases,
+    )
+    parts = []
+    table = amount_table(cases)
+    if table:
+        parts.append("\n**AMOUNTS EXTRACTED FROM THE FULL CASE TEXTS** (kind = award / claim / other):\n" + table)
+        n_cases = max(n_cases, sum(1 for d in cases if any(a["value_inr"] for a in d["amounts"])))
+    estimate = estimate_range(cases)
+    if estimate:
+        parts.append(f"\n**Preliminary statistical range:** {describe_estimate(estimate)}\n")
+    parts.append(passages)
+    return "".join(parts), n_cases
+
+
+def _build_analysis_messages(query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    mode = os.getenv("ANALYSIS_CONTEXT", "budget")
+    if mode == "excerpts":
+        context = _excerpt_context(docs)
+        n_cases = min(len(docs), 5)
+        citation_note = ""
+    elif mode == "amounts":
+        context, n_cases = _amounts_context(query, docs)
+        citation_note = "\nAmounts come from a table keyed by case [C<case>]; passages are labelled [C<case>-P<passage>]. Cite these labels when you rely on them."
+    else:
+        # Highest-scoring passages across the ranked cases, within a token budget
+        context, n_cases = build_context(
+            query,
+            docs,
+            token_budget=int(os.getenv("ANALYSIS_TOKEN_BUDGET", "6000")),
+            max_cases=int(os.getenv("ANALYSIS_MAX_CASES", "10")),
+        )
+        citation_note = "\nThe case content consists of selected passages labelled [C<case>-P<passage>]; cite these labels when you rely on a passage."
+
+    system_prompt = f"""You are an expert arbitration analyst with deep knowledge of case law and dispute resolution. Your task is to:
+1. **Analyze Each Case Thoroughly**: Read all {n_cases} provided cases carefully. For each case, identify:
    - Parties involved and their relationship
    - Nature of the dispute (construction, commercial, employment, etc.)
    - Key facts and timeline
@@ -135,25 +209,84 @@ def call_groq_analysis(query: str, docs: List[Dict[str, Any]]) -> str:
    - Precedents that favor/disfavor the claim
    - Critical success factors from similar cases
    - Potential risks and opportunities
-Be thorough, specific, and reference exact details from the cases. Use numbers, dates, and facts from the documents."""
+Be thorough, specific, and reference exact details from the cases. Use numbers, dates, and facts from the documents.{citation_note}"""
 
     user_prompt = f"""**USER'S ARBITRATION CASE:**
 {query}
 
-**TOP 5 MOST RELEVANT CASES (Ranked by AI Similarity):**
+**TOP {n_cases} MOST RELEVANT CASES (Ranked by AI Similarity):**
 {context}
 Please provide a comprehensive analysis with detailed analogies to help understand how these cases relate to the user's situation."""
 
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+def call_groq_analysis(query: str, docs: List[Dict[str, Any]]) -> str:
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        return "⚠️ GROQ_API_KEY not found. Cannot generate LLM analysis."
+    
+    model = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+    client = _groq_client(api_key)
+
+    messages = _build_analysis_messages(query, docs)
     try:
-        response = client.chat.completions.create(
+        with span("llm.analysis", model=model) as attrs:
+            response = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=0.3,
+                max_tokens=4000,
+            )
+            content = response.choices[0].message.content if response.choices else None
+            _record_tokens(attrs, "analysis", getattr(response, "usage", None), messages, content)
+        return content or "No response generated."
+    except Exception as e:
+        return f"⚠️ Error calling Groq API: {str(e)}"
+
+
+def stream_groq_analysis(query: str, docs: List[Dict[str, Any]]) -> Iterator[str]:
+    """Same analysis as call_groq_analysis, yielded as token deltas as they are generated.
+
+    The request is only sent once iteration starts; errors are yielded as a final message.
+    """
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        yield "⚠️ GROQ_API_KEY not found. Cannot generate LLM analysis."
+        return
+
+    model = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+    client = _groq_client(api_key)
+
+    # Timed by hand: a `with span()` cannot stay open across yields to the caller
+    messages = _build_analysis_messages(query, docs)
+    attrs: Dict[str, Any] = {"model": model, "stream": True}
+    parts: List[str] = []
+    usage = None
+    t0 = time.perf_counter()
+    try:
+        stream = client.chat.completions.create(
             model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
+            messages=messages,
             temperature=0.3,
             max_tokens=4000,
+            stream=True,
         )
-        return response.choices[0].message.content if response.choices else "No response generated."
+        for chunk in stream:
+            # Groq reports usage on the final chunk
+            usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or usage
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                if not parts:
+                    attrs["ttft_seconds"] = round(time.perf_counter() - t0, 4)
+                parts.append(delta)
+                yield delta
     except Exception as e:
-        return f"⚠️ Error calling Groq API: {str(e)}"
+        attrs["error"] = f"{type(e).__name__}: {e}"
+        yield f"\n\n⚠️ Error calling Groq API: {str(e)}"
+    finally:
+        _record_tokens(attrs, "analysis", usage, messages, "".join(parts))
+        record_span("llm.analysis", time.perf_counter() - t0, start=t0, **attrs)
@@ -0,0 +1,126 @@
+import os
+import time
+import threading
+from typing import Dict, List, Optional
+
+from src.metrics import record_span
+
+# ---------------------------
+# Process-wide Legal NER Engine
+# ---------------------------
+
+class LegalNEREngine:
+    """Loads the legal NER pipeline once and serves single or batched keyword extraction"""
+
+    def __init__(self, model_name: str, retry_seconds: float = 300):
+        self.model_name = model_name
+        self.retry_seconds = retry_seconds
+        self.load_seconds: Optional[float] = None
+        self.load_error: Optional[str] = None
+        self.load_failed_at: Optional[float] = None
+        self.last_inference_seconds: Optional[float] = None
+        self.total_inference_seconds = 0.0
+        self.inference_calls = 0
+        self._pipe = None
+        self._load_lock = threading.Lock()
+        self._infer_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._pipe is not None
+
+    def backing_off(self) -> bool:
+        """True while a failed load is too recent to retry (NER_RETRY_SECONDS)"""
+        failed_at = self.load_failed_at
+        return failed_at is not None and time.monotonic() - failed_at < self.retry_seconds
+
+    def load(self):
+        """Load the pipeline if needed; returns None if loading failed (retried after retry_seconds)"""
+        if self._pipe is not None or self.backing_off():
+            return self._pipe
+        with self._load_lock:
+            if self._pipe is None and not self.backing_off():
+                t0 = time.perf_counter()
+                try:
+                    from transformers import pipeline
+                    self._pipe = pipeline("ner", model=self.model_name, aggregation_strategy="simple")
+                    self.load_error = self.load_failed_at = None
+                except Exception as e:
+                    # A transient failure (hub outage, full disk) must not disable NER for the
+                    # life of the process
+                    self.load_error = str(e)
+                    self.load_failed_at = time.monotonic()
+                    print(f"Error loading legal NER model {self.model_name}: {e}")
+                self.load_seconds = time.perf_counter() - t0
+                record_span("ner.load", self.load_seconds, model=self.model_name, failure=self.load_error)
+        return self._pipe
+
+    def warm_up(self) -> None:
+        """Load the model and run one tiny inference so first-query kernels are initialised"""
+        if self.load() is not None:
+            self.extract_batch(["Arbitration award dispute"])
+
+    def extract_batch(self, texts: List[str], batch_size: int = 8) -> List[List[str]]:
+        """Unique entity words per text, in order of appearance, from one batched forward pass"""
+        if not texts:
+            return []
+        nlp = self.load()
+        if nlp is None:
+            return [[] for _ in texts]
+
+        t0 = time.perf_counter()
+        try:
+            with self._infer_lock:
+                outputs = nlp(list(texts), batch_size=batch_size)
+        except Exception as e:
+            print(f"Error using LegalBERT for keyword extraction: {e}")
+            return [[] for _ in texts]
+        finally:
+            elapsed = time.perf_counter() - t0
+            self.last_inference_seconds = elapsed
+            self.total_inference_seconds += elapsed
+            self.inference_calls += 1
+            record_span("ner.extract", elapsed, texts=len(texts))
+
+        return [list(dict.fromkeys(entity["word"] for entity in entities)) for entities in outputs]
+
+    def extract(self, text: str) -> List[str]:
+        return self.extract_batch([text])[0]
+
+    def timings(self) -> Dict[str, Optional[float]]:
+        return {
+            "load_seconds": self.load_seconds,
+            "last_inference_seconds": self.last_inference_seconds,
+            "total_inference_seconds": self.total_inference_seconds,
+            "inference_calls": self.inference_calls,
+        }
+
+
+_engine: Optional[LegalNEREngine] = None
+_engine_lock = threading.Lock()
+_warmup_thread: Optional[threading.Thread] = None
+
+
+def get_ner_engine() -> LegalNEREngine:
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = LegalNEREngine(os.getenv("LEGAL_NER_MODEL", "Akshita/legal-ner"),
+                                     retry_seconds=float(os.getenv("NER_RETRY_SECONDS", "300")))
+        return _engine
+
+
+def warm_up_ner(background: bool = True) -> Optional[threading.Thread]:
+    """Pre-load the NER engine; safe to call on every Streamlit rerun"""
+    global _warmup_thread
+    engine = get_ner_engine()
+    if engine.loaded or engine.backing_off():
+        return None
+    if not background:
+        engine.warm_up()
+        return None
+    with _engine_lock:
+        if _warmup_thread is None or not _warmup_thread.is_alive():
+            _warmup_thread = threading.Thread(target=engine.warm_up, name="ner-warmup", daemon=True)
+            _warmup_thread.start()
+        return _warmup_thread
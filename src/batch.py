@@ -0,0 +1,146 @@
+"""Headless batch runner.
+
+Reads a JSONL file of case descriptions ({"id": ..., "query": ...} per line), runs them
+concurrently through the graph with bounded parallelism per stage, and writes one Markdown
+report per case plus timings.jsonl with per-stage timings, metrics.jsonl with every timed span
+(per-URL status, bytes, tokens, batch sizes...) and metrics.prom in Prometheus text format.
+
+Usage: python -m src.batch cases.jsonl --out reports/ [--cases 8] [--llm-limit 2]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+from src.graph import build_graph
+from src.progress import LogReporter, use_reporter
+from src.metrics import RunMetrics, get_registry, use_metrics
+from src.report import build_report
+from src.startup import startup_timings, warm_up_models
+
+
+class _CaseReporter(LogReporter):
+    """Logs a case's messages (when verbose) and keeps its stage timings"""
+
+    def __init__(self, case_id: str, verbose: bool):
+        super().__init__(prefix=case_id)
+        self.verbose = verbose
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        if event["type"] == "timing":
+            self.stages[event["stage"]] = {"seconds": round(event["seconds"], 3), "waited": round(event["waited"], 3)}
+        if self.verbose or event["type"] == "error":
+            super().emit(event)
+
+
+def load_cases(path: str) -> List[Dict[str, str]]:
+    cases = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            query = record.get("query") or record.get("description")
+            if not query:
+                raise ValueError(f"{path}:{line_no}: missing 'query'")
+            cases.append({"id": str(record.get("id", line_no)), "query": query})
+    return cases
+
+
+_metrics_lock = threading.Lock()
+
+
+def run_case(graph, case: Dict[str, str], out_dir: str, verbose: bool = False) -> Dict[str, Any]:
+    reporter = _CaseReporter(case["id"], verbose)
+    metrics = RunMetrics(run_id=case["id"])
+    t0 = time.perf_counter()
+    error: Optional[str] = None
+    state: Dict[str, Any] = {}
+    with use_reporter(reporter), use_metrics(metrics):
+        try:
+            state = graph.invoke({"query": case["query"]})
+            error = state.get("error")
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+    total = time.perf_counter() - t0
+
+    ranked = state.get("ranked", [])
+    llm_response = state.get("llm_response", "")
+    if ranked or llm_response:
+        with open(os.path.join(out_dir, f"{case['id']}.md"), "w", encoding="utf-8") as f:
+            f.write(build_report(case["query"], ranked, llm_response, state.get("amount_estimate")))
+    with _metrics_lock:
+        metrics.write_jsonl(os.path.join(out_dir, "metrics.jsonl"))
+
+    return {
+        "id": case["id"],
+        "total_seconds": round(total, 3),
+        "stages": reporter.stages,
+        "counters": metrics.counters,
+        "ranked": len(ranked),
+        "analysis_cache": (state.get("analysis_cache") or {}).get("level"),
+        "error": error,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run arbitration analyses for many cases without the UI")
+    parser.add_argument("input", help="JSONL file with one {\"id\", \"query\"} object per line")
+    parser.add_argument("--out", default="reports", help="Output directory for reports and timings.jsonl")
+    parser.add_argument("--cases", type=int, default=8, help="Cases in flight at once")
+    parser.add_argument("--search-limit", type=int, default=4, help="Concurrent search stages (network-bound)")
+    parser.add_argument("--crawl-limit", type=int, default=4, help="Concurrent crawl stages (network-bound)")
+    parser.add_argument("--rank-limit", type=int, default=1, help="Concurrent embedding stages (CPU-bound)")
+    parser.add_argument("--llm-limit", type=int, default=2, help="Concurrent Groq calls (rate-limited)")
+    parser.add_argument("--mode", choices=["staged", "streaming"], default=None)
+    parser.add_argument("--verbose", action="store_true", help="Log every progress message")
+    args = parser.parse_args(argv)
+
+    cases = load_cases(args.input)
+    os.makedirs(args.out, exist_ok=True)
+    # Models load while the first cases are searching
+    warm_up_models(background=True, graph=False)
+    graph = build_graph(args.mode, stage_limits={
+        "search": args.search_limit,
+        "crawl": args.crawl_limit,
+        "rank": args.rank_limit,
+        "crawl_rank": args.crawl_limit,
+        "llm_analysis": args.llm_limit,
+    })
+
+    timings_path = os.path.join(args.out, "timings.jsonl")
+    metrics_path = os.path.join(args.out, "metrics.jsonl")
+    if os.path.exists(metrics_path):
+        os.remove(metrics_path)  # run_case appends
+    write_lock = threading.Lock()
+    failures = 0
+    t0 = time.perf_counter()
+    with open(timings_path, "w", encoding="utf-8") as timings, \
+            ThreadPoolExecutor(max_workers=max(1, args.cases), thread_name_prefix="case") as pool:
+        futures = [pool.submit(run_case, graph, case, args.out, args.verbose) for case in cases]
+        for done, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            failures += bool(record["error"])
+            with write_lock:
+                timings.write(json.dumps(record) + "\n")
+                timings.flush()
+            status = f"error: {record['error']}" if record["error"] else f"{record['ranked']} cases ranked"
+            print(f"[{done}/{len(cases)}] {record['id']}: {record['total_seconds']:.1f}s, {status}", file=sys.stderr)
+
+    get_registry().write_prometheus(os.path.join(args.out, "metrics.prom"))
+    print(f"Finished {len(cases)} cases in {time.perf_counter() - t0:.1f}s ({failures} with errors). "
+          f"Timings: {timings_path}, metrics: {metrics_path}", file=sys.stderr)
+    startup = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in sorted(startup_timings().items()))
+    if startup:
+        print(f"Startup: {startup}", file=sys.stderr)
+    return 1 if failures == len(cases) and cases else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
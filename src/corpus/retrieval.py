@@ -0,0 +1,74 @@
+import os
+import numpy as np
+from typing import Any, Dict, List
+
+from src.state import WorkflowState
+from src.progress import get_reporter
+from src.corpus.store import get_case_corpus
+from src.utils.utils import embed_texts
+
+
+def corpus_writes(state: WorkflowState) -> bool:
+    """CORPUS_WRITE=1 / 0 turns corpus writes on / off; by default only local_first runs write"""
+    setting = os.getenv("CORPUS_WRITE", "")
+    if setting:
+        return setting == "1"
+    return bool(state.get("local_first"))
+
+
+def remember_docs(state: WorkflowState, docs: List[Dict[str, Any]]) -> int:
+    """Add full-text docs to the local corpus, reusing the vectors the ranker computed"""
+    if not corpus_writes(state):
+        return 0
+    corpus = get_case_corpus()
+    if corpus is None:
+        return 0
+    try:
+        new_docs = [d for d in docs
+                    if d.get("full_fetch") and not d.get("from_corpus") and not corpus.contains(d["url"], d.get("text", ""))]
+        if not new_docs:
+            return 0
+        missing = [d for d in new_docs if d.get("doc_vector") is None]
+        if missing:
+            # Only docs that were never scored (e.g. a stream cut short) need a forward pass
+            for d, vec in zip(missing, embed_texts([d["text"][:2048] for d in missing])):
+                d["doc_vector"] = vec
+        return corpus.add(new_docs, np.stack([d["doc_vector"] for d in new_docs]))
+    except Exception as e:
+        # The corpus is an optimisation; never fail the run because of it
+        print(f"Error adding docs to local corpus: {e}")
+        return 0
+
+
+def node_local_retrieve(state: WorkflowState) -> WorkflowState:
+    """Answer from the local corpus when it holds enough strong matches"""
+    reporter = get_reporter()
+    corpus = get_case_corpus()
+    state["local_docs"] = []
+    state["local_first"] = True
+    if corpus is None or len(corpus) == 0:
+        return state
+
+    top_k = int(os.getenv("CORPUS_TOP_K", "10"))
+    min_similarity = float(os.getenv("CORPUS_MIN_SIM", "0.85"))
+    min_hits = int(os.getenv("CORPUS_MIN_HITS", "5"))
+
+    hits = corpus.search(embed_texts([state["query"]])[0], k=top_k, min_similarity=min_similarity)
+    local_docs = []
+    for doc, similarity in hits:
+        doc.pop("hash", None)
+        doc.pop("row", None)
+        doc.update({"similarity": similarity, "full_fetch": True, "from_corpus": True})
+        local_docs.append(doc)
+    state["local_docs"] = local_docs
+
+    if len(local_docs) >= min_hits:
+        state["ranked"] = local_docs
+        reporter.success(f"📦 Answered from local corpus: {len(local_docs)} strong matches (≥ {min_similarity:.0%})")
+    elif local_docs:
+        reporter.info(f"📦 {len(local_docs)} strong matches in local corpus; searching the web to fill gaps...")
+    return state
+
+
+def route_after_local(state: WorkflowState) -> str:
+    return "llm_analysis" if state.get("ranked") else "search"
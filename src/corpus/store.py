@@ -0,0 +1,259 @@
+import os
+import json
+import hashlib
+import threading
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.utils.filelock import file_lock
+from src.utils.utils import embedding_variant, legal_bert_model_name
+
+# ---------------------------
+# Local Case Corpus
+# ---------------------------
+# Append-only store of crawled cases: docs.jsonl holds text + metadata (one line per row, tagged
+# with its row number), vectors.f32 holds the matching L2-normalised Legal-BERT rows and is
+# searched via memmap. Past max_docs rows the newest max_docs cases are copied into a new
+# generation of both files (docs.<n>.jsonl, vectors.<n>.f32); rewriting meta.json to name the
+# new generation is the commit point, so a crash mid-copy leaves the old files in use.
+
+DOCS_FILE = "docs.jsonl"
+VECTORS_FILE = "vectors.f32"
+META_FILE = "meta.json"
+LOCK_FILE = ".lock"
+DOC_FIELDS = ("url", "title", "text", "source", "score")
+
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _file_id(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns
+
+
+class CaseCorpus:
+    """Shared by every process pointed at the same directory: appends and crash-recovery trims
+    hold an exclusive flock on .lock, and each call first picks up rows other processes added.
+
+    `variant` names the model and backend the vectors come from (see embedding_variant); it is
+    recorded in meta.json and opening the corpus with a different one raises ValueError, since
+    vectors from different backends must not be searched together. Beyond `max_docs` cases the
+    oldest are dropped (0 keeps everything)."""
+
+    def __init__(self, corpus_dir: str, variant: Optional[str] = None, max_docs: int = 20000):
+        self.corpus_dir = corpus_dir
+        self.variant = variant
+        self.max_docs = max_docs
+        self.evicted = 0
+        self._lock = threading.Lock()
+        self._dim: Optional[int] = None
+        self._generation = 0
+        self._meta_id: Optional[Tuple[int, int]] = None  # meta.json last read
+        self._offsets: List[int] = []        # byte offset of each row in docs.jsonl
+        self._latest: Dict[str, int] = {}     # url -> newest row
+        self._hashes: Dict[str, str] = {}     # url -> content hash of newest row
+        self._active: List[bool] = []        # False once a newer row for the same URL exists
+        self._end = 0                         # bytes of docs.jsonl already registered
+        self._matrix: Optional[np.memmap] = None
+        os.makedirs(corpus_dir, exist_ok=True)
+        self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.corpus_dir, name)
+
+    def _files(self, generation: Optional[int] = None) -> Tuple[str, str]:
+        """(docs, vectors) paths of a generation, the current one by default"""
+        generation = self._generation if generation is None else generation
+        if generation == 0:
+            return self._path(DOCS_FILE), self._path(VECTORS_FILE)
+        return self._path(f"docs.{generation}.jsonl"), self._path(f"vectors.{generation}.f32")
+
+    def _reset(self, generation: int) -> None:
+        self._generation = generation
+        self._offsets, self._latest, self._hashes, self._active = [], {}, {}, []
+        self._end = 0
+        self._matrix = None
+
+    def _write_meta(self) -> None:
+        tmp_path = self._path(META_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self._dim, "variant": self.variant, "generation": self._generation}, f)
+        os.replace(tmp_path, self._path(META_FILE))
+
+    def _load(self) -> None:
+        with file_lock(self._path(LOCK_FILE)):
+            self._sync()
+            if self._dim is None:
+                return
+            # Writers hold the lock for a whole append, so anything past the registered rows now
+            # is a crash between the two appends: trim both files back into step
+            docs_path, vectors_path = self._files()
+            with open(docs_path, "ab") as f:
+                f.truncate(self._end)
+            with open(vectors_path, "ab") as f:
+                f.truncate(len(self._offsets) * self._dim * 4)
+
+    def _sync(self) -> None:
+        """Register rows appended since the last call (by this or another process)"""
+        meta_id = _file_id(self._path(META_FILE))
+        if meta_id is not None and meta_id != self._meta_id:
+            with open(self._path(META_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            # Corpora written before backends were recorded hold fp32 vectors of the configured model
+            built_with = meta.get("variant", legal_bert_model_name())
+            if self.variant is not None and built_with != self.variant:
+                raise ValueError(f"Corpus at {self.corpus_dir} holds {built_with} vectors, not {self.variant}")
+            generation = int(meta.get("generation", 0))
+            if generation != self._generation:
+                self._reset(generation)  # another process compacted the corpus
+            self._dim = int(meta["dim"])
+            self._meta_id = meta_id
+        docs_path, vectors_path = self._files()
+        if self._dim is None or not os.path.exists(docs_path) or os.path.getsize(docs_path) == self._end:
+            return
+        n_vectors = os.path.getsize(vectors_path) // (self._dim * 4) if os.path.exists(vectors_path) else 0
+        with open(docs_path, "rb") as f:
+            f.seek(self._end)
+            for line in f:
+                row = len(self._offsets)
+                if row >= n_vectors or not line.endswith(b"\n"):
+                    break
+                record = json.loads(line)
+                if record.get("row", row) != row:
+                    break
+                self._register(record["url"], record["hash"], self._end)
+                self._end += len(line)
+
+    def _register(self, url: str, content_hash: str, offset: int) -> None:
+        row = len(self._offsets)
+        self._offsets.append(offset)
+        if url in self._latest:
+            self._active[self._latest[url]] = False
+        self._active.append(True)
+        self._latest[url] = row
+        self._hashes[url] = content_hash
+
+    def _vectors(self) -> Optional[np.memmap]:
+        rows = len(self._offsets)
+        if rows == 0:
+            return None
+        if self._matrix is None or self._matrix.shape[0] != rows:
+            self._matrix = np.memmap(self._files()[1], dtype=np.float32, mode="r", shape=(rows, self._dim))
+        return self._matrix
+
+    def __len__(self) -> int:
+        with self._lock, file_lock(self._path(LOCK_FILE), exclusive=False):
+            self._sync()
+            return len(self._latest)
+
+    def contains(self, url: str, text: str) -> bool:
+        with self._lock, file_lock(self._path(LOCK_FILE), exclusive=False):
+            self._sync()
+            return self._hashes.get(url) == _content_hash(text)
+
+    def add(self, docs: List[Dict[str, Any]], vectors: np.ndarray) -> int:
+        """Append docs with their vectors; unchanged docs (same URL and text) are skipped"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        added = 0
+        with self._lock, file_lock(self._path(LOCK_FILE)):
+            self._sync()
+            if self._dim is None:
+                self._dim = int(vectors.shape[1])
+                self._write_meta()
+            docs_path, vectors_path = self._files()
+            with open(docs_path, "ab") as docs_f, open(vectors_path, "ab") as vec_f:
+                for doc, vec in zip(docs, vectors):
+                    content_hash = _content_hash(doc.get("text", ""))
+                    if self._hashes.get(doc["url"]) == content_hash:
+                        continue
+                    record = {k: doc.get(k) for k in DOC_FIELDS}
+                    record["hash"] = content_hash
+                    record["row"] = len(self._offsets)
+                    line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+                    vec_f.write((vec / (np.linalg.norm(vec) + 1e-9)).astype(np.float32).tobytes())
+                    docs_f.write(line)
+                    self._register(doc["url"], content_hash, self._end)
+                    self._end += len(line)
+                    added += 1
+            # Some slack past the cap so a full corpus is not rewritten on every add
+            if self.max_docs and len(self._offsets) > self.max_docs + max(1, self.max_docs // 4):
+                self._compact()
+        return added
+
+    def _compact(self) -> None:
+        """Copy the newest max_docs cases into the next generation (exclusive lock held)"""
+        keep = [row for row, active in enumerate(self._active) if active][-self.max_docs:]
+        matrix = self._vectors()
+        old_files = self._files()
+        generation = self._generation + 1
+        docs_path, vectors_path = self._files(generation)
+        with open(old_files[0], "rb") as src, open(docs_path, "wb") as docs_f, open(vectors_path, "wb") as vec_f:
+            for new_row, row in enumerate(keep):
+                src.seek(self._offsets[row])
+                record = json.loads(src.readline())
+                record["row"] = new_row
+                docs_f.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+                vec_f.write(np.asarray(matrix[row], dtype=np.float32).tobytes())
+        self.evicted += len(self._latest) - len(keep)
+        del matrix
+        self._reset(generation)
+        self._write_meta()
+        self._sync()
+        for path in old_files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # still mapped elsewhere (Windows); the next compaction's files replace it
+
+    def _read_doc(self, row: int) -> Dict[str, Any]:
+        with open(self._files()[0], "rb") as f:
+            f.seek(self._offsets[row])
+            return json.loads(f.readline())
+
+    def search(self, q_emb: np.ndarray, k: int = 10, min_similarity: float = 0.0) -> List[Tuple[Dict[str, Any], float]]:
+        """Top-k (doc, cosine similarity) pairs among the newest copy of each URL"""
+        with self._lock, file_lock(self._path(LOCK_FILE), exclusive=False):
+            self._sync()
+            matrix = self._vectors()
+            if matrix is None:
+                return []
+            q = np.asarray(q_emb, dtype=np.float32).reshape(-1)
+            q = q / (np.linalg.norm(q) + 1e-9)
+            sims = matrix @ q
+            sims[~np.array(self._active, dtype=bool)] = -np.inf
+            k = min(k, len(self._latest))
+            if k <= 0:
+                return []
+            top = np.argpartition(-sims, k - 1)[:k]
+            top = top[np.argsort(-sims[top])]
+            return [(self._read_doc(int(i)), float(sims[i])) for i in top if sims[i] >= min_similarity]
+
+
+_corpus: Optional[CaseCorpus] = None
+_refused: Optional[Tuple[str, str]] = None  # (dir, variant) already reported as mismatched
+_corpus_lock = threading.Lock()
+
+
+def get_case_corpus() -> Optional[CaseCorpus]:
+    """Process-wide corpus; disabled by setting CORPUS_DIR to an empty string, or when the corpus
+    there was built with another model or backend"""
+    global _corpus, _refused
+    corpus_dir = os.getenv("CORPUS_DIR", ".cache/corpus")
+    if not corpus_dir:
+        return None
+    variant = embedding_variant()
+    with _corpus_lock:
+        if _refused == (corpus_dir, variant):
+            return None
+        if _corpus is None or _corpus.corpus_dir != corpus_dir or _corpus.variant != variant:
+            try:
+                _corpus = CaseCorpus(corpus_dir, variant, max_docs=int(os.getenv("CORPUS_MAX_DOCS", "20000")))
+            except ValueError as e:
+                print(f"Local corpus disabled: {e}. Point CORPUS_DIR elsewhere or delete it to rebuild.")
+                _corpus, _refused = None, (corpus_dir, variant)
+        return _corpus
@@ -1,43 +1,75 @@
-import re
 import asyncio
-import aiohttp
 import requests
-from typing import List, Dict, Optional
-from bs4 import BeautifulSoup
+from typing import AsyncIterator, List, Dict, Optional
+
+from src.crawling.engine import CrawlerEngine
+from src.crawling.extract import extract_text, extract_text_async
+from src.crawling.page_cache import get_page_cache
+from src.metrics import span, incr
 
 # ---------------------------
 # Async Crawling Functions
 # ---------------------------
 
-async def fetch_url_async(session: aiohttp.ClientSession, url: str, timeout: int = 15) -> Optional[str]:
-    """Async fetch a single URL"""
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-    }
+async def _fetch_and_parse(engine: CrawlerEngine, url: str) -> Dict[str, Optional[str]]:
+    """Fetch one URL and extract its text off the event loop while other downloads continue.
+
+    Streamed pages arrive already extracted; otherwise the raw HTML is parsed here and then
+    released, so crawled items never hold full page bodies.
+    """
+    item = await engine.fetch(url)
+    if item["html"] is not None and item["text"] is None:
+        with span("crawl.extract", url=url) as attrs:
+            item["text"] = await extract_text_async(item["html"])
+            attrs["chars"] = len(item["text"])
+        cache = get_page_cache()
+        if cache:
+            await asyncio.get_running_loop().run_in_executor(None, cache.put_text, url, item["text"])
+    item["html"] = None
+    return item
+
+
+async def _fetch_and_parse_safe(engine: CrawlerEngine, url: str) -> Dict[str, Optional[str]]:
     try:
-        async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout), ssl=False) as response:
-            if response.status == 200:
-                return await response.text()
-    except Exception:
-        return None
-    return None
+        return await _fetch_and_parse(engine, url)
+    except Exception as e:
+        incr("crawl_fetches", outcome=type(e).__name__)
+        return {"url": url, "html": None, "text": None, "status": None, "error": str(e)}
+
+
+async def crawl_iter(urls: List[str], deadline: Optional[float] = None) -> AsyncIterator[Dict[str, Optional[str]]]:
+    """Yield crawled-and-parsed items in completion order.
+
+    Once `deadline` seconds have passed, outstanding fetches are cancelled and iteration stops;
+    URLs that did not finish are simply not yielded.
+    """
+    async with CrawlerEngine.from_env() as engine:
+        tasks = [asyncio.ensure_future(_fetch_and_parse_safe(engine, url)) for url in urls]
+        try:
+            for next_done in asyncio.as_completed(tasks, timeout=deadline):
+                try:
+                    item = await next_done
+                except asyncio.TimeoutError:
+                    return
+                yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
 
 
 async def crawl_all(urls: List[str]) -> List[Dict[str, Optional[str]]]:
-    """Crawl multiple URLs concurrently"""
-    async with aiohttp.ClientSession() as session:
-        tasks = [fetch_url_async(session, url) for url in urls]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Pair URLs with their results
-        crawled = []
-        for url, result in zip(urls, results):
-            if isinstance(result, Exception) or result is None:
-                crawled.append({"url": url, "html": None})
-            else:
-                crawled.append({"url": url, "html": result})
-        
-        return crawled
+    """Crawl and parse multiple URLs concurrently with bounded, per-host-aware fetching"""
+    async with CrawlerEngine.from_env() as engine:
+        results = await asyncio.gather(*(_fetch_and_parse(engine, url) for url in urls), return_exceptions=True)
+
+    crawled = []
+    for url, result in zip(urls, results):
+        if isinstance(result, Exception):
+            crawled.append({"url": url, "html": None, "text": None, "status": None, "error": str(result)})
+        else:
+            crawled.append(result)
+    return crawled
 
 
 # Keep sync version as fallback
@@ -45,19 +77,32 @@ def fetch_url(url: str, timeout: int = 15) -> Optional[str]:
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
     }
-    try:
-        r = requests.get(url, headers=headers, timeout=timeout)
-        if r.status_code == 200 and r.content:
-            return r.text
-    except Exception:
-        return None
+    with span("crawl.fetch", url=url) as attrs:
+        try:
+            r = requests.get(url, headers=headers, timeout=timeout)
+            attrs.update(status=r.status_code, bytes=len(r.content))
+            if r.status_code == 200 and r.content:
+                return r.text
+            attrs["failure"] = f"HTTP {r.status_code}"
+        except Exception as e:
+            attrs["failure"] = f"{type(e).__name__}: {e}"
+        finally:
+            incr("crawl_fetches", outcome=attrs["failure"].split(":")[0] if attrs.get("failure") else "200")
     return None
 
 
-def html_to_text(html: str) -> str:
-    soup = BeautifulSoup(html, "html.parser")
-    for tag in soup(["script", "style", "noscript", "header", "footer", "nav"]):
-        tag.decompose()
-    text = soup.get_text(" ")
-    text = re.sub(r"\s+", " ", text).strip()
+def html_to_text(html: str, backend: Optional[str] = None) -> str:
+    """Extract visible text using the configured backend (HTML_EXTRACTOR, default: lxml if installed)"""
+    return extract_text(html, backend)
+
+
+def page_text(item: Dict[str, Optional[str]]) -> str:
+    """Extracted text for a crawled item, reusing and filling the page cache's text column"""
+    if item.get("text") is not None:
+        return item["text"]
+    with span("crawl.extract", url=item["url"]):
+        text = html_to_text(item["html"])
+    cache = get_page_cache()
+    if cache:
+        cache.put_text(item["url"], text)
     return text
@@ -0,0 +1,100 @@
+import re
+import zlib
+import numpy as np
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# ---------------------------
+# URL Canonicalisation
+# ---------------------------
+
+TRACKING_PARAMS = {"gclid", "fbclid", "ref", "source", "mc_cid", "mc_eid", "amp", "outputtype"}
+HOST_PREFIXES = ("www.", "m.", "amp.")
+
+
+def canonical_url(url: str) -> str:
+    """Normalise mirrors of the same page: scheme, www/m/amp hosts, AMP paths, tracking params, fragments"""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url
+    host = (parts.hostname or "").lower()
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    path = re.sub(r"/amp(?=/|$)|\.amp(?=\.html?$|$)", "", parts.path) or "/"
+    path = path.rstrip("/") or "/"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+
+# ---------------------------
+# MinHash Near-Duplicate Detection
+# ---------------------------
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_WORD_RE = re.compile(r"\w+")
+
+
+def _permutations(num_perm: int, seed: int = 1):
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+    b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+    return a, b
+
+
+def minhash_signature(text: str, num_perm: int = 64, shingle: int = 5) -> Optional[np.ndarray]:
+    """MinHash over word shingles; None for texts too short to compare meaningfully"""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < shingle * 4:
+        return None
+    shingles = {" ".join(words[i:i + shingle]) for i in range(len(words) - shingle + 1)}
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    a, b = _permutations(num_perm)
+    # (a * x + b) mod p for every permutation/shingle pair, then min per permutation
+    return ((np.outer(a, hashes) + b[:, None]) % _MERSENNE).min(axis=1)
+
+
+def _richness(doc: Dict[str, Any]):
+    return (bool(doc.get("full_fetch")), len(doc.get("text", "")), doc.get("score", 0))
+
+
+def dedupe_docs(docs: List[Dict[str, Any]], threshold: float = 0.8, num_perm: int = 64) -> List[Dict[str, Any]]:
+    """Collapse near-duplicate docs (estimated Jaccard >= threshold), keeping the richest copy.
+
+    The kept doc lists the dropped copies' URLs under "duplicates" and takes the best SERP score.
+    Order of the surviving docs is preserved.
+    """
+    sigs = [minhash_signature(d.get("text", ""), num_perm) for d in docs]
+    parent = list(range(len(docs)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    comparable = [i for i, s in enumerate(sigs) if s is not None]
+    if len(comparable) > 1:
+        matrix = np.stack([sigs[i] for i in comparable])
+        for x, i in enumerate(comparable):
+            similar = (matrix[x + 1:] == matrix[x]).mean(axis=1) >= threshold
+            for y in np.nonzero(similar)[0]:
+                parent[find(comparable[x + 1 + y])] = find(i)
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(len(docs)):
+        clusters.setdefault(find(i), []).append(i)
+
+    keep = {}
+    for members in clusters.values():
+        best = max(members, key=lambda i: _richness(docs[i]))
+        doc = docs[best]
+        if len(members) > 1:
+            doc["duplicates"] = [docs[i]["url"] for i in members if i != best]
+            doc["score"] = max(docs[i].get("score", 0) for i in members)
+        keep[best] = doc
+    return [keep[i] for i in sorted(keep)]
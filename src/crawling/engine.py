@@ -0,0 +1,220 @@
+import os
+import codecs
+import random
+import asyncio
+import functools
+import aiohttp
+from typing import List, Dict, Optional, Any, Tuple
+from urllib.parse import urlsplit
+
+from src.crawling.extract import StreamingExtractor
+from src.crawling.page_cache import get_page_cache
+from src.metrics import span, incr
+
+# ---------------------------
+# Bounded Crawler Engine
+# ---------------------------
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+ALLOWED_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CrawlerEngine:
+    """Crawl with global and per-host concurrency limits, jittered retries and capped streaming reads.
+
+    Use as an async context manager so the tuned connector is shared by every fetch:
+
+        async with CrawlerEngine() as engine:
+            results = await engine.crawl(urls)
+    """
+
+    def __init__(self, max_concurrency: int = 16, per_host: int = 2, timeout: float = 15,
+                 max_bytes: int = 5 * 1024 * 1024, retries: int = 2, backoff: float = 0.5,
+                 allowed_types=ALLOWED_CONTENT_TYPES, stream_text: bool = False, text_cap: int = 50000):
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.retries = retries
+        self.backoff = backoff
+        self.allowed_types = allowed_types
+        self.stream_text = stream_text
+        self.text_cap = text_cap
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._global_sem: Optional[asyncio.Semaphore] = None
+        self._host_sems: Dict[str, asyncio.Semaphore] = {}
+
+    @classmethod
+    def from_env(cls) -> "CrawlerEngine":
+        return cls(
+            max_concurrency=int(os.getenv("CRAWL_MAX_CONCURRENCY", "16")),
+            per_host=int(os.getenv("CRAWL_PER_HOST", "2")),
+            timeout=float(os.getenv("CRAWL_TIMEOUT", "15")),
+            max_bytes=int(os.getenv("CRAWL_MAX_BYTES", str(5 * 1024 * 1024))),
+            retries=int(os.getenv("CRAWL_RETRIES", "2")),
+            stream_text=os.getenv("CRAWL_STREAM_EXTRACT", "1") == "1",
+            text_cap=int(os.getenv("CRAWL_TEXT_CAP", "50000")),
+        )
+
+    async def __aenter__(self) -> "CrawlerEngine":
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrency,
+            limit_per_host=self.per_host,
+            ttl_dns_cache=300,
+            keepalive_timeout=30,
+            ssl=False,
+        )
+        self._session = aiohttp.ClientSession(connector=connector, headers={"User-Agent": USER_AGENT})
+        self._global_sem = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self._session.close()
+        self._session = None
+
+    def _host_sem(self, url: str) -> asyncio.Semaphore:
+        host = (urlsplit(url).hostname or "").lower()
+        if host not in self._host_sems:
+            self._host_sems[host] = asyncio.Semaphore(self.per_host)
+        return self._host_sems[host]
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.timeout)
+        return self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    async def _read_capped(self, response: aiohttp.ClientResponse) -> Tuple[str, int]:
+        """Stream the body, stopping once max_bytes have been read; returns (text, bytes read)"""
+        chunks: List[bytes] = []
+        size = 0
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.max_bytes:
+                break
+        body = b"".join(chunks)[:self.max_bytes]
+        try:
+            encoding = response.get_encoding()
+        except Exception:
+            encoding = "utf-8"
+        return body.decode(encoding, errors="replace"), size
+
+    async def _read_text(self, response: aiohttp.ClientResponse) -> Tuple[str, int]:
+        """Stream the body through the incremental extractor; stops reading once text_cap
+        characters of text (or max_bytes of body) are in. Returns (text, bytes read)"""
+        try:
+            encoding = response.get_encoding()
+            codecs.lookup(encoding)
+        except Exception:
+            encoding = "utf-8"
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        extractor = StreamingExtractor(self.text_cap)
+        size = 0
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            size += len(chunk)
+            if extractor.feed(decoder.decode(chunk)) or size >= self.max_bytes:
+                break
+        else:
+            extractor.feed(decoder.decode(b"", final=True))
+        return extractor.close(), size
+
+    async def _get(self, url: str, headers: Dict[str, str]) -> Dict[str, Any]:
+        """One HTTP attempt -> {"status", "html", "text", "bytes", "etag", "last_modified", "error", "retry_after"}
+
+        With stream_text the body is extracted while it downloads: "text" is set and "html" stays None.
+        """
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with self._session.get(url, headers=headers, timeout=timeout) as response:
+            result = {"status": response.status, "html": None, "text": None, "bytes": 0, "error": None,
+                      "etag": response.headers.get("ETag"),
+                      "last_modified": response.headers.get("Last-Modified"),
+                      "retry_after": response.headers.get("Retry-After")}
+            if response.status != 200:
+                result["error"] = f"HTTP {response.status}"
+                return result
+
+            # Reject non-text bodies before reading them
+            content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if content_type and not content_type.startswith(self.allowed_types):
+                result["error"] = f"content-type {content_type}"
+                return result
+
+            if self.stream_text:
+                result["text"], result["bytes"] = await self._read_text(response)
+            else:
+                result["html"], result["bytes"] = await self._read_capped(response)
+            return result
+
+    async def fetch(self, url: str) -> Dict[str, Optional[str]]:
+        """Fetch through the page cache; returns {"url", "html", "text", "status", "error"}"""
+        with span("crawl.fetch", url=url) as attrs:
+            item = await self._fetch(url, attrs)
+            attrs.update(status=item["status"], failure=item["error"])
+        incr("crawl_fetches", outcome=item["error"].split(":")[0] if item["error"] else str(item["status"]))
+        incr("crawl_bytes", attrs.get("bytes", 0))
+        return item
+
+    async def _fetch(self, url: str, attrs: Dict[str, Any]) -> Dict[str, Optional[str]]:
+        cache = get_page_cache()
+        loop = asyncio.get_running_loop()
+        # SQLite reads/writes (and body decompression) stay off the event loop
+        entry = await loop.run_in_executor(None, cache.get, url) if cache else None
+        if entry and entry["fresh"]:
+            cache.record("hit")
+            attrs["cache"] = "hit"
+            return {"url": url, "html": entry["html"], "text": entry["text"], "status": 200, "error": None}
+
+        headers: Dict[str, str] = {}
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        result: Dict[str, Any] = {"status": None, "html": None, "error": None}
+        for attempt in range(self.retries + 1):
+            attrs["attempts"] = attempt + 1
+            # Slots are held per attempt, not across the backoff, so a failing host does not
+            # keep global slots busy while it sleeps
+            async with self._global_sem, self._host_sem(url):
+                try:
+                    result = await self._get(url, headers)
+                except asyncio.TimeoutError as e:
+                    # Not retried: a host that used the whole timeout once would only multiply the wait
+                    result = {"status": None, "html": None, "error": f"{type(e).__name__}: {e}"}
+                    break
+                except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError) as e:
+                    result = {"status": None, "html": None, "error": f"{type(e).__name__}: {e}", "retry_after": None}
+                except Exception as e:
+                    result = {"status": None, "html": None, "error": f"{type(e).__name__}: {e}"}
+                    break
+            if result["status"] not in RETRY_STATUSES and result["status"] is not None:
+                break
+            if attempt < self.retries:
+                await asyncio.sleep(self._retry_delay(attempt, result.get("retry_after")))
+
+        attrs["bytes"] = result.get("bytes", 0)
+        if result["status"] == 304 and entry:
+            await loop.run_in_executor(None, cache.touch, url)
+            cache.record("revalidated")
+            attrs["cache"] = "revalidated"
+            return {"url": url, "html": entry["html"], "text": entry["text"], "status": 304, "error": None}
+        text = result.get("text")
+        if (result["html"] is not None or text is not None) and cache:
+            await loop.run_in_executor(None, functools.partial(
+                cache.put, url, result["html"] or "", result.get("etag"), result.get("last_modified"), text=text))
+            cache.record("miss")
+            attrs["cache"] = "miss"
+        return {"url": url, "html": result["html"], "text": text,
+                "status": result["status"], "error": result["error"]}
+
+    async def crawl(self, urls: List[str]) -> List[Dict[str, Optional[str]]]:
+        results = await asyncio.gather(*(self.fetch(url) for url in urls), return_exceptions=True)
+        crawled = []
+        for url, result in zip(urls, results):
+            if isinstance(result, Exception):
+                crawled.append({"url": url, "html": None, "text": None, "status": None, "error": str(result)})
+            else:
+                crawled.append(result)
+        return crawled
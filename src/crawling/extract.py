@@ -0,0 +1,225 @@
+import os
+import re
+import asyncio
+import threading
+import multiprocessing
+from html.parser import HTMLParser
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+# ---------------------------
+# HTML-to-Text Backends
+# ---------------------------
+
+DROP_TAGS = ["script", "style", "noscript", "header", "footer", "nav"]
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _extract_html_parser(html: str) -> str:
+    """Pure-Python BeautifulSoup backend (original behaviour)"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(DROP_TAGS):
+        tag.decompose()
+    text = soup.get_text(" ")
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _extract_lxml(html: str) -> str:
+    """C-backed lxml backend; same tag filtering, typically several times faster"""
+    import lxml.html
+    from lxml import etree
+    if not html.strip():
+        return ""
+    try:
+        tree = lxml.html.document_fromstring(html)
+    except (etree.ParserError, ValueError):
+        # lxml rejects str input carrying an XML encoding declaration
+        tree = lxml.html.document_fromstring(html.encode("utf-8", errors="replace"))
+    etree.strip_elements(tree, *DROP_TAGS, etree.Comment, with_tail=False)
+    text = " ".join(tree.itertext())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+BACKENDS: Dict[str, Callable[[str], str]] = {
+    "html.parser": _extract_html_parser,
+    "lxml": _extract_lxml,
+}
+
+
+def _lxml_available() -> bool:
+    try:
+        import lxml.html  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def resolve_backend(name: Optional[str] = None) -> str:
+    """Pick a backend name; "auto" prefers lxml and falls back to html.parser"""
+    name = name or os.getenv("HTML_EXTRACTOR", "auto")
+    if name == "auto" or (name == "lxml" and not _lxml_available()):
+        return "lxml" if _lxml_available() else "html.parser"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown HTML extractor '{name}'. Choose from: auto, {', '.join(BACKENDS)}")
+    return name
+
+
+def extract_text(html: str, backend: Optional[str] = None) -> str:
+    name = resolve_backend(backend)
+    try:
+        return BACKENDS[name](html)
+    except Exception:
+        if name == "html.parser":
+            raise
+        return _extract_html_parser(html)
+
+
+# ---------------------------
+# Streaming Extraction
+# ---------------------------
+# Decoded chunks go straight into a SAX-style parser (lxml's target interface, or the stdlib
+# HTMLParser) that keeps only normalised visible text. No tree is built, raw chunks are dropped
+# once fed, and the caller can stop reading the response as soon as the text cap is reached.
+
+class _TextCollector:
+    """Parser target: visible text with whitespace collapsed and a space at element boundaries"""
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.parts: List[str] = []
+        self.size = 0
+        self._skip = 0
+        self._space = False
+
+    def start(self, tag, attrib=None) -> None:
+        if tag in DROP_TAGS:
+            self._skip += 1
+        self._space = True
+
+    def end(self, tag) -> None:
+        if tag in DROP_TAGS and self._skip:
+            self._skip -= 1
+        self._space = True
+
+    def data(self, text: str) -> None:
+        if self._skip or self.size >= self.max_chars:
+            return
+        text = _WHITESPACE.sub(" ", text)
+        if text.startswith(" "):
+            self._space, text = True, text[1:]
+        if not text:
+            return
+        if self._space and self.size:
+            self.parts.append(" ")
+            self.size += 1
+        self._space = text.endswith(" ")
+        text = text.rstrip(" ")
+        self.parts.append(text)
+        self.size += len(text)
+
+    def close(self) -> None:
+        return None
+
+
+class _StdlibFeeder(HTMLParser):
+    def __init__(self, target: _TextCollector):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag)
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+
+class StreamingExtractor:
+    """Incremental HTML-to-text for pages read chunk by chunk.
+
+        extractor = StreamingExtractor(max_chars=50000)
+        for chunk in chunks:
+            if extractor.feed(chunk):
+                break  # text cap reached; stop reading
+        text = extractor.close()
+    """
+
+    def __init__(self, max_chars: int = 50000, backend: Optional[str] = None):
+        self.max_chars = max_chars
+        self._collector = _TextCollector(max_chars)
+        if resolve_backend(backend) == "lxml":
+            from lxml import etree
+            self._parser = etree.HTMLParser(target=self._collector)
+        else:
+            self._parser = _StdlibFeeder(self._collector)
+
+    @property
+    def full(self) -> bool:
+        return self._collector.size >= self.max_chars
+
+    def feed(self, chunk: str) -> bool:
+        """Parse one decoded chunk; True once max_chars of text have been collected"""
+        if chunk and not self.full:
+            self._parser.feed(chunk)
+        return self.full
+
+    def close(self) -> str:
+        try:
+            self._parser.close()
+        except Exception:
+            pass  # lxml complains about empty or truncated documents; the text so far stands
+        return "".join(self._collector.parts)[:self.max_chars]
+
+
+def extract_text_streaming(html: str, max_chars: int = 50000, backend: Optional[str] = None,
+                           chunk_chars: int = 64 * 1024) -> str:
+    """Streaming extraction over an in-memory page (same output as reading it off a socket)"""
+    extractor = StreamingExtractor(max_chars, backend)
+    for start in range(0, len(html), chunk_chars):
+        if extractor.feed(html[start:start + chunk_chars]):
+            break
+    return extractor.close()
+
+
+# ---------------------------
+# Process-Pool Offload
+# ---------------------------
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _extract_workers() -> int:
+    return int(os.getenv("EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+def get_extract_pool() -> Optional[ProcessPoolExecutor]:
+    """Shared process pool for parsing; None when EXTRACT_WORKERS=0"""
+    global _pool
+    workers = _extract_workers()
+    if workers <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn avoids forking a process that holds torch/Streamlit threads
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+async def extract_text_async(html: str, backend: Optional[str] = None) -> str:
+    """Parse off the event loop: in the process pool, or a worker thread if the pool is disabled"""
+    backend = resolve_backend(backend)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_extract_pool(), extract_text, html, backend)
+
+
+def extract_texts(htmls: List[str], backend: Optional[str] = None) -> List[str]:
+    """Parse many pages in parallel across the process pool"""
+    backend = resolve_backend(backend)
+    pool = get_extract_pool()
+    if pool is None or len(htmls) < 2:
+        return [extract_text(h, backend) for h in htmls]
+    return list(pool.map(extract_text, htmls, [backend] * len(htmls)))
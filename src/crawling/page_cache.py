@@ -0,0 +1,193 @@
+import os
+import time
+import zlib
+import sqlite3
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+# ---------------------------
+# Persistent Page Cache
+# ---------------------------
+# Stores crawled bodies (zlib-compressed) with their ETag / Last-Modified validators
+# and, once parsed, the extracted text so a fresh hit skips network and parsing.
+# Entries older than max_age are purged, and the oldest beyond max_entries / max_bytes evicted.
+
+# Freshness windows (seconds) by domain suffix; judgments rarely change, news does
+DEFAULT_FRESHNESS = {
+    "sci.gov.in": 30 * 86400,
+    "hcourt.gov.in": 30 * 86400,
+    "italaw.com": 14 * 86400,
+    "jusmundi.com": 14 * 86400,
+    "manupatra.com": 7 * 86400,
+    "livelaw.in": 3600,
+    "barandbench.com": 3600,
+    "scobserver.in": 3600,
+}
+
+
+def parse_freshness(spec: str) -> Dict[str, float]:
+    """Parse "domain=seconds,domain=seconds" overrides"""
+    windows = {}
+    for part in spec.split(","):
+        if "=" in part:
+            domain, seconds = part.split("=", 1)
+            windows[domain.strip().lower()] = float(seconds)
+    return windows
+
+
+# Pruning runs every PRUNE_EVERY writes rather than on each one (the byte cap needs a scan)
+PRUNE_EVERY = 50
+
+
+class PageCache:
+    def __init__(self, path: str, default_ttl: float = 86400, freshness: Optional[Dict[str, float]] = None,
+                 max_age: float = 90 * 86400, max_entries: int = 20000, max_bytes: int = 512 * 1024 * 1024):
+        self.path = path
+        self.default_ttl = default_ttl
+        self.freshness = dict(DEFAULT_FRESHNESS)
+        self.freshness.update(freshness or {})
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evicted = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, last_modified TEXT,"
+            " fetched_at REAL NOT NULL, text TEXT, size INTEGER)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(pages)")}
+        if "size" not in columns:
+            # Caches written before the size cap: add the column and fill it in
+            self._conn.execute("ALTER TABLE pages ADD COLUMN size INTEGER")
+            self._conn.execute("UPDATE pages SET size = length(body) + COALESCE(length(text), 0)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_fetched ON pages(fetched_at)")
+        with self._lock:
+            self._prune()
+
+    def ttl_for(self, url: str) -> float:
+        host = (urlsplit(url).hostname or "").lower()
+        for domain, ttl in self.freshness.items():
+            if host == domain or host.endswith("." + domain):
+                return ttl
+        return self.default_ttl
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Cached entry with html, validators, text and a `fresh` flag"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, fetched_at, text FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        body, etag, last_modified, fetched_at, text = row
+        return {
+            # The body is only needed until its text has been extracted
+            "html": zlib.decompress(body).decode("utf-8", errors="replace") if text is None else None,
+            "etag": etag,
+            "last_modified": last_modified,
+            "text": text,
+            "fresh": time.time() - fetched_at <= self.ttl_for(url),
+        }
+
+    def put(self, url: str, html: str, etag: Optional[str], last_modified: Optional[str],
+            text: Optional[str] = None) -> None:
+        """Store a new body (empty for pages extracted while streaming, which pass their text);
+        any previously extracted text is dropped with the old body"""
+        body = zlib.compress(html.encode("utf-8"), 6)
+        size = len(body) + len(text or "")
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, body, etag, last_modified, fetched_at, text, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, body, etag, last_modified, time.time(), text, size),
+            )
+            self._writes += 1
+            if self._writes % PRUNE_EVERY == 0:
+                self._prune()
+            else:
+                self._conn.commit()
+
+    def touch(self, url: str) -> None:
+        """Mark an entry fresh again after a 304 Not Modified"""
+        with self._lock:
+            self._conn.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+
+    def put_text(self, url: str, text: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE pages SET text = ?, size = length(body) + ? WHERE url = ?",
+                               (text, len(text), url))
+            self._conn.commit()
+
+    def _prune(self) -> None:
+        """Purge entries past max_age, then evict the oldest beyond max_entries / max_bytes"""
+        before = self._conn.total_changes
+        self._conn.execute("DELETE FROM pages WHERE fetched_at < ?", (time.time() - self.max_age,))
+        self._conn.execute(
+            "DELETE FROM pages WHERE url IN ("
+            " SELECT url FROM pages ORDER BY fetched_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self._conn.execute(
+            "DELETE FROM pages WHERE url IN ("
+            " SELECT url FROM (SELECT url, SUM(size) OVER (ORDER BY fetched_at DESC, url) AS running FROM pages)"
+            " WHERE running > ?)",
+            (self.max_bytes,),
+        )
+        self._conn.commit()
+        self.evicted += self._conn.total_changes - before
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            if outcome == "hit":
+                self.hits += 1
+            elif outcome == "revalidated":
+                self.revalidated += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+            lookups = self.hits + self.revalidated + self.misses
+            return {
+                "entries": entries,
+                "bytes": size,
+                "evicted": self.evicted,
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+                "hit_ratio": ((self.hits + self.revalidated) / lookups) if lookups else 0.0,
+            }
+
+
+_cache: Optional[PageCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """Process-wide cache; disabled by setting CRAWL_CACHE_PATH to an empty string"""
+    global _cache
+    path = os.getenv("CRAWL_CACHE_PATH", ".cache/pages.sqlite3")
+    if not path:
+        return None
+    with _cache_lock:
+        if _cache is None or _cache.path != path:
+            _cache = PageCache(
+                path,
+                default_ttl=float(os.getenv("CRAWL_CACHE_TTL", "86400")),
+                freshness=parse_freshness(os.getenv("CRAWL_CACHE_FRESHNESS", "")),
+                max_age=float(os.getenv("CRAWL_CACHE_MAX_AGE", str(90 * 86400))),
+                max_entries=int(os.getenv("CRAWL_CACHE_MAX_ENTRIES", "20000")),
+                max_bytes=int(float(os.getenv("CRAWL_CACHE_MAX_MB", "512")) * 1024 * 1024),
+            )
+        return _cache
@@ -0,0 +1,120 @@
+import os
+import time
+import uuid
+import asyncio
+import threading
+from concurrent.futures import Future, InvalidStateError
+from typing import Dict, List, Optional
+
+from src.crawling.dedup import canonical_url
+from src.crawling.scheduler import CrawlScheduler
+from src.metrics import bind_context
+
+# ---------------------------
+# Search-time Prefetch
+# ---------------------------
+# Speculative search starts crawling its best early results before the crawl stage runs. A
+# Prefetch fetches them on a background thread and resolves one future per URL; the crawl stage
+# adopts those futures into its own scheduler loop instead of waiting for the whole prefetch.
+# Prefetches are held in a process-wide registry under a per-run token, so graph state only
+# carries that string.
+
+
+class Prefetch:
+    def __init__(self, urls: List[str], scores: Dict[str, float]):
+        self.urls = list(urls)
+        self.created = time.monotonic()
+        self.futures: Dict[str, Future] = {url: Future() for url in self.urls}
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        thread = threading.Thread(target=bind_context(self._main), args=(scores,), name="prefetch", daemon=True)
+        thread.start()
+
+    def _main(self, scores: Dict[str, float]) -> None:
+        try:
+            asyncio.run(self._crawl(scores))
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"Error prefetching pages: {e}")
+        finally:
+            # Anything not fetched resolves to None so an adopting crawl fetches it itself
+            for future in self.futures.values():
+                self._resolve(future, None)
+
+    async def _crawl(self, scores: Dict[str, float]) -> None:
+        with self._lock:
+            if self._cancelled:
+                return
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.current_task()
+        try:
+            scheduler = CrawlScheduler.from_env(self.urls, scores, target=len(self.urls))
+            async for item in scheduler.run():
+                future = self.futures.get(item["url"])
+                if future is not None:
+                    self._resolve(future, item)
+        finally:
+            with self._lock:
+                self._loop = self._task = None
+
+    @staticmethod
+    def _resolve(future: Future, item) -> None:
+        try:
+            future.set_result(item)
+        except InvalidStateError:
+            pass  # already resolved, or cancelled by an adopting crawl that stopped early
+
+    def adopt(self, urls: List[str]) -> Dict[str, Future]:
+        """Futures for those of `urls` (matched by canonical URL) this prefetch is fetching"""
+        by_key = {canonical_url(url): future for url, future in self.futures.items()}
+        adopted = {}
+        for url in urls:
+            future = by_key.get(canonical_url(url))
+            if future is not None:
+                adopted[url] = future
+        return adopted
+
+    def cancel(self) -> None:
+        """Stop outstanding fetches; a no-op once the prefetch has finished"""
+        with self._lock:
+            self._cancelled = True
+            if self._loop is not None and self._task is not None:
+                try:
+                    self._loop.call_soon_threadsafe(self._task.cancel)
+                except RuntimeError:
+                    pass  # loop already closed
+
+
+_prefetches: Dict[str, Prefetch] = {}
+_prefetches_lock = threading.Lock()
+
+
+def start_prefetch(urls: List[str], scores: Dict[str, float]) -> str:
+    """Begin fetching `urls` in the background; returns the token to claim them with"""
+    # A run that failed before its crawl stage never claims its prefetch: drop stale ones
+    max_age = 2 * float(os.getenv("CRAWL_DEADLINE", "20")) + 60
+    now = time.monotonic()
+    with _prefetches_lock:
+        for token, prefetch in list(_prefetches.items()):
+            if now - prefetch.created > max_age:
+                _prefetches.pop(token).cancel()
+        token = uuid.uuid4().hex
+        _prefetches[token] = Prefetch(urls, scores)
+    return token
+
+
+def take_prefetch(token: Optional[str]) -> Optional[Prefetch]:
+    """Claim a run's prefetch; the caller cancels it once it has what it needs"""
+    if not token:
+        return None
+    with _prefetches_lock:
+        return _prefetches.pop(token, None)
+
+
+def discard_prefetch(token: Optional[str]) -> None:
+    prefetch = take_prefetch(token)
+    if prefetch is not None:
+        prefetch.cancel()
@@ -0,0 +1,176 @@
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from src.crawling.crawler import _fetch_and_parse_safe
+from src.crawling.engine import CrawlerEngine
+from src.metrics import span, incr
+
+# ---------------------------
+# Host Health
+# ---------------------------
+# Decayed per-host success/failure counts kept for the life of the process. A host that keeps
+# failing (or hanging until the deadline) sinks in the crawl order instead of taking a slot early.
+
+def host_of(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+class HostHealth:
+    def __init__(self, decay: float = 0.8, penalty: float = 5.0):
+        self.decay = decay
+        self.penalty = penalty
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, url: str, ok: bool, seconds: float) -> None:
+        host = host_of(url)
+        with self._lock:
+            s = self._stats.setdefault(host, {"failures": 0.0, "total": 0.0, "seconds": seconds})
+            s["failures"] = s["failures"] * self.decay + (0.0 if ok else 1.0)
+            s["total"] = s["total"] * self.decay + 1.0
+            s["seconds"] = 0.7 * s["seconds"] + 0.3 * seconds
+
+    def failure_rate(self, url: str) -> float:
+        """Smoothed failure rate; an unseen host counts as healthy"""
+        with self._lock:
+            s = self._stats.get(host_of(url))
+        return s["failures"] / (s["total"] + 1.0) if s else 0.0
+
+    def priority(self, url: str, score: float) -> float:
+        return score - self.penalty * self.failure_rate(url)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {h: {"failure_rate": s["failures"] / (s["total"] + 1.0), "seconds": s["seconds"]}
+                    for h, s in self._stats.items()}
+
+
+_health: Optional[HostHealth] = None
+_health_lock = threading.Lock()
+
+
+def get_host_health() -> HostHealth:
+    global _health
+    with _health_lock:
+        if _health is None:
+            _health = HostHealth(decay=float(os.getenv("CRAWL_HOST_DECAY", "0.8")),
+                                 penalty=float(os.getenv("CRAWL_HOST_PENALTY", "5")))
+        return _health
+
+
+# ---------------------------
+# Deadline-aware Scheduler
+# ---------------------------
+
+def is_quality(item: Dict[str, Any], min_chars: int) -> bool:
+    return bool(item.get("text")) and len(item["text"]) >= min_chars
+
+
+def default_target() -> int:
+    """10 pages, or RANK_TOP_N when the rank prefilter is on so it still has N full texts to choose from"""
+    if os.getenv("RANK_PREFILTER", "1") == "1":
+        return max(10, int(os.getenv("RANK_TOP_N", "15")))
+    return 10
+
+
+class CrawlScheduler:
+    """Fetch URLs best-first and stop once `target` quality pages are in or `deadline` passes.
+
+    At most target + spare fetches are in flight; each failure or thin page frees a slot for the
+    next URL in priority order (SERP score minus the host's failure penalty). Outstanding fetches
+    are cancelled on stop. `stats` holds the outcome after iteration ends.
+
+    `adopted` maps URLs already being fetched elsewhere (a search-time prefetch) to futures of
+    their crawled items. They are awaited in the same loop under the same deadline and count
+    towards the target; one that resolves to None is fetched here instead.
+
+        scheduler = CrawlScheduler(urls, scores)
+        async for item in scheduler.run():
+            ...
+    """
+
+    def __init__(self, urls: List[str], scores: Optional[Dict[str, float]] = None,
+                 target: int = 10, deadline: float = 20, spare: int = 3, min_chars: int = 1000,
+                 health: Optional[HostHealth] = None, adopted: Optional[Dict[str, Future]] = None):
+        self.health = health or get_host_health()
+        scores = scores or {}
+        # sorted() is stable, so equal priorities keep search order
+        self.urls = sorted(urls, key=lambda u: -self.health.priority(u, float(scores.get(u, 0) or 0)))
+        self.target = target
+        self.deadline = deadline
+        self.window = max(1, target + spare)
+        self.min_chars = min_chars
+        self.adopted = adopted or {}
+        self.stats: Dict[str, Any] = {}
+
+    @classmethod
+    def from_env(cls, urls: List[str], scores: Optional[Dict[str, float]] = None, **overrides: Any) -> "CrawlScheduler":
+        settings = dict(
+            target=int(os.getenv("CRAWL_QUALITY_TARGET", str(default_target()))),
+            deadline=float(os.getenv("CRAWL_DEADLINE", "20")),
+            spare=int(os.getenv("CRAWL_SPARE_FETCHES", "3")),
+            min_chars=int(os.getenv("CRAWL_QUALITY_MIN_CHARS", "1000")),
+        )
+        settings.update(overrides)
+        return cls(urls, scores, **settings)
+
+    async def run(self) -> AsyncIterator[Dict[str, Optional[str]]]:
+        queue = [u for u in self.urls if u not in self.adopted]
+        # task -> (url, start time); adopted fetches have no start time and are not ours to score
+        pending: Dict[asyncio.Future, tuple] = {asyncio.wrap_future(f): (url, None)
+                                                for url, f in self.adopted.items()}
+        quality = 0
+        reason = "exhausted"
+        t0 = time.perf_counter()
+        stop_at = t0 + self.deadline
+
+        with span("crawl.schedule", urls=len(queue), target=self.target, deadline=self.deadline) as attrs:
+            async with CrawlerEngine.from_env() as engine:
+                try:
+                    while queue or pending:
+                        while queue and len(pending) < self.window:
+                            url = queue.pop(0)
+                            task = asyncio.ensure_future(_fetch_and_parse_safe(engine, url))
+                            pending[task] = (url, time.perf_counter())
+                        remaining = stop_at - time.perf_counter()
+                        if remaining <= 0:
+                            reason = "deadline"
+                            break
+                        done, _ = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                        for task in done:
+                            url, started = pending.pop(task)
+                            item = None if task.cancelled() else task.result()
+                            if started is None:
+                                if item is None:
+                                    queue.insert(0, url)
+                                    continue
+                                item = {**item, "url": url}
+                            else:
+                                self.health.record(url, not item.get("error"), time.perf_counter() - started)
+                            if is_quality(item, self.min_chars):
+                                quality += 1
+                            yield item
+                        if quality >= self.target:
+                            reason = "target"
+                            break
+                finally:
+                    # A fetch still hanging at the deadline counts against its host; one cut off
+                    # because enough pages arrived does not
+                    for task, (url, started) in pending.items():
+                        task.cancel()
+                        if reason == "deadline" and started is not None:
+                            self.health.record(url, False, time.perf_counter() - started)
+                    await asyncio.gather(*pending, return_exceptions=True)
+
+            launched = len(self.urls) - len(queue)
+            self.stats = {"reason": reason, "quality": quality, "launched": launched,
+                          "cancelled": len(pending), "skipped": len(queue), "adopted": len(self.adopted),
+                          "elapsed": round(time.perf_counter() - t0, 3)}
+            attrs.update(self.stats)
+        incr("crawl_schedules", reason=reason)
+        incr("crawl_cancelled", len(pending))
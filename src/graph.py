@@ -1,54 +1,153 @@
+import os
 import asyncio
-import streamlit as st
-from typing import List, Dict, Any
+import time
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 
 from langgraph.graph import StateGraph, END
 
 from src.state import WorkflowState
-from src.analysis.llm_analysis import enhance_query_with_llm, call_groq_analysis
-from src.searching.serpapi_search import serpapi_multi_search
-from src.crawling.crawler import crawl_all, html_to_text
-from src.ranking.ranker import node_rank
+from src.progress import get_reporter
+from src.metrics import span, incr, bind_context
+from src.analysis.llm_analysis import (
+    enhance_query_with_llm, extract_keywords_batch, call_groq_analysis, stream_groq_analysis, analysed_docs,
+    is_error_response,
+)
+from src.analysis.analysis_cache import get_analysis_cache
+from src.analysis.amounts import annotate_amounts, estimate_range, describe_estimate
+from src.searching.serpapi_search import serpapi_multi_search, new_search_batch, report_serp_cache
+from src.crawling.crawler import crawl_all, crawl_iter, page_text, _fetch_and_parse_safe
+from src.crawling.engine import CrawlerEngine
+from src.crawling.dedup import canonical_url, dedupe_docs
+from src.crawling.scheduler import CrawlScheduler
+from src.crawling.prefetch import Prefetch, start_prefetch, take_prefetch, discard_prefetch
+from src.ranking.ranker import node_rank, IncrementalRanker
+from src.utils.utils import embed_texts
+from src.corpus.retrieval import node_local_retrieve, route_after_local, remember_docs
 
 
 def node_search(state: WorkflowState) -> WorkflowState:
+    if os.getenv("SEARCH_SPECULATIVE", "0") == "1":
+        return node_search_speculative(state)
+    reporter = get_reporter()
     q = state["query"]
     
     # Enhance query using LLM
-    st.info("🧠 Analyzing case to generate optimized search queries...")
+    reporter.info("🧠 Analyzing case to generate optimized search queries...")
     queries = enhance_query_with_llm(q)
     state["enhanced_query"] = queries.get("main", q)
     
-    st.success(f"✨ **Main Query:** {queries['main'][:100]}...")
-    st.success(f"💰 **Amount-Focused Query:** {queries['amount_focused'][:100]}...")
+    reporter.success(f"✨ **Main Query:** {queries['main'][:100]}...")
+    reporter.success(f"💰 **Amount-Focused Query:** {queries['amount_focused'][:100]}...")
     
     # Multi-source search
-    st.info("🔍 Searching across legal databases and case law repositories...")
-    results = serpapi_multi_search(queries, n=15)
+    reporter.info("🔍 Searching across legal databases and case law repositories...")
+    results = serpapi_multi_search(queries, n=int(os.getenv("CRAWL_CANDIDATES", "15")))
     state["search_results"] = results
     
-    if not results:
+    if not results and not state.get("local_docs"):
         state["error"] = "No search results found."
     else:
-        st.success(f"✅ Found {len(results)} results from authenticated sources")
+        reporter.success(f"✅ Found {len(results)} results from authenticated sources")
     
     return state
 
-def node_crawl(state: WorkflowState) -> WorkflowState:
-    results = state.get("search_results", [])
-    docs: List[Dict[str, Any]] = []
-    
-    if not results:
-        state["docs"] = docs
+def _keywords(query: str) -> List[str]:
+    try:
+        return extract_keywords_batch([query])[0]
+    except Exception as e:
+        print(f"Error extracting keywords: {e}")
+        return []
+
+
+def _enhance(query: str, keywords_future) -> Dict[str, str]:
+    return enhance_query_with_llm(query, keywords_future.result() if keywords_future else None)
+
+
+def node_search_speculative(state: WorkflowState) -> WorkflowState:
+    """Search for the case as written (and its NER keywords) while the LLM enhances the query,
+    then issue only the enhanced searches that add something new and merge everything.
+
+    The best raw-query results start crawling as soon as they arrive; state["prefetch_id"] is
+    the token the crawl stage claims them with.
+    """
+    reporter = get_reporter()
+    q = state["query"]
+    batch = new_search_batch()
+    if batch is None:
+        state["search_results"] = []
+        if not state.get("local_docs"):
+            state["error"] = "No search results found."
         return state
-    
-    # Extract URLs and metadata
+
+    pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="enhance")
+    try:
+        with span("search.speculative") as attrs:
+            reporter.info("⚡ Searching for the case as written while the query is being optimized...")
+            attrs["raw"] = batch.submit({"main": q, "amount_focused": q}, "raw")
+            # Keywords (and the LLM) only run when enhancement is available, as in node_search
+            keywords_future = pool.submit(bind_context(_keywords), q) if os.getenv("GROQ_API_KEY") else None
+            enhanced_future = pool.submit(bind_context(_enhance), q, keywords_future)
+
+            keywords = keywords_future.result() if keywords_future else None
+            if keywords:
+                joined = " ".join(keywords)
+                attrs["keywords"] = batch.submit({"main": joined, "amount_focused": joined}, "keywords")
+
+            prefetch_n = int(os.getenv("SEARCH_PREFETCH", "5"))
+            if prefetch_n > 0:
+                batch.wait("raw")
+                top = batch.results(prefetch_n, round_name="raw")
+                if top:
+                    state["prefetch_id"] = start_prefetch([r["url"] for r in top],
+                                                          {r["url"]: r["score"] for r in top})
+                    attrs["prefetched"] = len(top)
+
+            queries = enhanced_future.result()
+            state["enhanced_query"] = queries.get("main", q)
+            reporter.success(f"✨ **Main Query:** {queries['main'][:100]}...")
+            reporter.success(f"💰 **Amount-Focused Query:** {queries['amount_focused'][:100]}...")
+            attrs["enhanced"] = batch.submit(queries, "enhanced")
+            attrs["skipped"] = batch.skipped
+            batch.wait()
+            results = batch.results(int(os.getenv("CRAWL_CANDIDATES", "15")))
+            reporter.caption(f"⚡ {attrs['raw'] + attrs.get('keywords', 0)} speculative searches, "
+                             f"{attrs['enhanced']} enhanced searches added, {batch.skipped} redundant skipped")
+    except Exception:
+        discard_prefetch(state.get("prefetch_id"))
+        raise
+    finally:
+        batch.close()
+        pool.shutdown(wait=False)
+    report_serp_cache()
+    state["search_results"] = results
+
+    if not results:
+        # Nothing for the crawl stage to adopt
+        discard_prefetch(state.get("prefetch_id"))
+    if not results and not state.get("local_docs"):
+        state["error"] = "No search results found."
+    else:
+        reporter.success(f"✅ Found {len(results)} results from authenticated sources")
+    return state
+
+
+def _crawl_targets(results: List[Dict[str, Any]], limit: int = 15, skip: Optional[set] = None):
+    """Map URL -> search metadata and the ordered list of URLs to crawl.
+
+    URLs in `skip`, and mirrors sharing a canonical URL with an earlier result, are left out.
+    """
     url_map = {}
     urls_to_crawl = []
-    
+    seen = {canonical_url(u) for u in (skip or ())}
+
     for r in results:
         url = r.get("url")
-        if url:
+        key = canonical_url(url) if url else None
+        if url and key not in seen:
+            seen.add(key)
             url_map[url] = {
                 "title": r.get("title", ""),
                 "snippet": r.get("snippet", ""),
@@ -56,83 +155,304 @@ def node_crawl(state: WorkflowState) -> WorkflowState:
                 "source": r.get("source", "Unknown")
             }
             urls_to_crawl.append(url)
+
+    return url_map, urls_to_crawl[:limit]
+
+
+def _make_doc(url: str, metadata: Dict[str, Any], text: Optional[str]) -> Dict[str, Any]:
+    """Full-text doc when the page yielded enough text, else fall back to the search snippet"""
+    if not text or len(text) < 100:
+        return {
+            "url": url,
+            "title": metadata.get("title", ""),
+            "text": metadata.get("snippet", ""),
+            "full_fetch": False,
+            "score": metadata.get("score", 0),
+            "source": metadata.get("source", "Unknown")
+        }
+    return {
+        "url": url,
+        "title": metadata.get("title", ""),
+        "text": text[:50000],  # Limit text size
+        "full_fetch": True,
+        "score": metadata.get("score", 0),
+        "source": metadata.get("source", "Unknown")
+    }
+
+
+def _drop_near_duplicates(docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Keep only the richest copy of each cluster of mirrored documents"""
+    if os.getenv("DEDUP_NEAR_DUPLICATES", "1") != "1":
+        return docs
+    kept = dedupe_docs(docs, threshold=float(os.getenv("DEDUP_THRESHOLD", "0.8")))
+    if len(kept) < len(docs):
+        get_reporter().caption(f"🧹 Dropped {len(docs) - len(kept)} near-duplicate copies")
+    return kept
+
+
+def node_crawl(state: WorkflowState) -> WorkflowState:
+    reporter = get_reporter()
+    results = state.get("search_results", [])
+    # Local-first mode: corpus matches are kept and only the remaining slots are crawled
+    local_docs = state.get("local_docs", [])
+    docs: List[Dict[str, Any]] = []
+    prefetch = take_prefetch(state.get("prefetch_id"))
     
-    if not urls_to_crawl:
-        state["docs"] = docs
+    if not results:
+        _release(prefetch)
+        state["docs"] = local_docs
         return state
     
-    # Limit to top 15 for crawling
-    urls_to_crawl = urls_to_crawl[:15]
+    # Extract URLs and metadata; limit to CRAWL_CANDIDATES (the rank stage prefilters them)
+    candidates = int(os.getenv("CRAWL_CANDIDATES", "15"))
+    url_map, urls_to_crawl = _crawl_targets(results, limit=max(0, candidates - len(local_docs)),
+                                            skip={d["url"] for d in local_docs})
     
-    st.info(f"🚀 Starting async crawl of {len(urls_to_crawl)} URLs...")
+    if not urls_to_crawl:
+        _release(prefetch)
+        state["docs"] = local_docs
+        return state
     
-    # Progress tracking
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+    reporter.info(f"🚀 Starting async crawl of {len(urls_to_crawl)} URLs...")
     
-    # Crawl all URLs concurrently
+    # Crawl best-first under a deadline (CRAWL_SCHEDULER=1), or wait for every URL
     try:
-        status_text.text("⚡ Fetching pages concurrently...")
-        crawled_results = asyncio.run(crawl_all(urls_to_crawl))
+        reporter.progress("crawl", 0, "⚡ Fetching pages concurrently...")
+        adopted = _adopt(prefetch, urls_to_crawl)
+        crawled_results, scheduler = asyncio.run(
+            _crawl_urls(urls_to_crawl, {u: m["score"] for u, m in url_map.items()}, adopted))
         
         # Process results
         for idx, item in enumerate(crawled_results):
             url = item["url"]
-            html = item["html"]
             metadata = url_map.get(url, {})
             
-            progress_bar.progress((idx + 1) / len(crawled_results))
-            status_text.text(f"Processing {idx + 1}/{len(crawled_results)}: {metadata.get('title', '')[:50]}...")
-            
-            if not html:
-                # Store snippet if can't fetch full page
-                docs.append({
-                    "url": url,
-                    "title": metadata.get("title", ""),
-                    "text": metadata.get("snippet", ""),
-                    "full_fetch": False,
-                    "score": metadata.get("score", 0),
-                    "source": metadata.get("source", "Unknown")
-                })
-                continue
-            
-            # Convert HTML to text
-            text = html_to_text(html)
+            reporter.progress("crawl", (idx + 1) / len(crawled_results),
+                              f"Processing {idx + 1}/{len(crawled_results)}: {metadata.get('title', '')[:50]}...")
             
-            if not text or len(text) < 100:
-                docs.append({
-                    "url": url,
-                    "title": metadata.get("title", ""),
-                    "text": metadata.get("snippet", ""),
-                    "full_fetch": False,
-                    "score": metadata.get("score", 0),
-                    "source": metadata.get("source", "Unknown")
-                })
-                continue
-            
-            docs.append({
-                "url": url,
-                "title": metadata.get("title", ""),
-                "text": text[:50000],  # Limit text size
-                "full_fetch": True,
-                "score": metadata.get("score", 0),
-                "source": metadata.get("source", "Unknown")
-            })
+            # Convert HTML to text (cached alongside the page body); store snippet if can't fetch full page
+            text = page_text(item) if item["html"] or item.get("text") is not None else None
+            docs.append(_make_doc(url, metadata, text))
         
-        progress_bar.empty()
-        status_text.empty()
+        # Pages cancelled or never launched fall back to their snippets
+        fetched = {item["url"] for item in crawled_results}
+        docs.extend(_make_doc(url, url_map.get(url, {}), None) for url in urls_to_crawl if url not in fetched)
+        reporter.clear("crawl")
         
-        st.success(f"✅ Successfully crawled {sum(1 for d in docs if d.get('full_fetch'))} pages (full), {sum(1 for d in docs if not d.get('full_fetch'))} snippets")
+        reporter.success(f"✅ Successfully crawled {sum(1 for d in docs if d.get('full_fetch'))} pages (full), {sum(1 for d in docs if not d.get('full_fetch'))} snippets")
+        if scheduler and scheduler.stats.get("reason") != "exhausted":
+            stats = scheduler.stats
+            stopped = "quality target reached" if stats["reason"] == "target" else "deadline"
+            reporter.caption(f"⏱️ Crawl stopped early ({stopped}) after {stats['elapsed']:.1f}s: "
+                             f"{stats['cancelled']} cancelled, {stats['skipped']} not started")
         
     except Exception as e:
-        st.error(f"⚠️ Crawling error: {str(e)}")
-        progress_bar.empty()
-        status_text.empty()
+        reporter.error(f"⚠️ Crawling error: {str(e)}")
+        reporter.clear("crawl")
+    finally:
+        _release(prefetch)
     
-    state["docs"] = docs
+    state["docs"] = _drop_near_duplicates(docs + local_docs)
+    return state
+
+
+async def _crawl_urls(urls: List[str], scores: Dict[str, float], adopted: Optional[Dict[str, Future]] = None
+                      ) -> Tuple[List[Dict[str, Optional[str]]], Optional[CrawlScheduler]]:
+    """Crawl best-first under a deadline (CRAWL_SCHEDULER=1), or wait for every URL.
+
+    `adopted` URLs are already being fetched by the search-time prefetch; their items are merged
+    in as they complete rather than fetched again.
+    """
+    if not urls:
+        return [], None
+    adopted = adopted or {}
+    if os.getenv("CRAWL_SCHEDULER", "1") != "1":
+        left = [u for u in urls if u not in adopted]
+        deadline = float(os.getenv("CRAWL_DEADLINE", "20"))
+        crawled, reused = await asyncio.gather(crawl_all(left), _collect(_adopted_iter(adopted, deadline)))
+        return reused + crawled, None
+    scheduler = CrawlScheduler.from_env(urls, scores, adopted=adopted)
+    return [item async for item in scheduler.run()], scheduler
+
+
+def _adopt(prefetch: Optional[Prefetch], urls: List[str]) -> Dict[str, Future]:
+    if prefetch is None:
+        return {}
+    adopted = prefetch.adopt(urls)
+    if adopted:
+        get_reporter().caption(f"⚡ {len(adopted)} pages were already being fetched during search")
+    return adopted
+
+
+def _release(prefetch: Optional[Prefetch]) -> None:
+    """Stop whatever the prefetch is still fetching once the crawl stage is done with it"""
+    if prefetch is not None:
+        prefetch.cancel()
+
+
+async def _adopted_item(engine: CrawlerEngine, url: str, future: Future) -> Dict[str, Optional[str]]:
+    item = await asyncio.wrap_future(future)
+    if item is None:
+        # The prefetch failed or was stopped before this page: fetch it here, as CrawlScheduler does
+        return await _fetch_and_parse_safe(engine, url)
+    return {**item, "url": url}
+
+
+async def _adopted_iter(adopted: Dict[str, Future], deadline: float):
+    """Yield prefetched items (under this crawl's URL) as they complete, until the deadline"""
+    if not adopted:
+        return
+    async with CrawlerEngine.from_env() as engine:
+        tasks = [asyncio.ensure_future(_adopted_item(engine, url, f)) for url, f in adopted.items()]
+        try:
+            for next_done in asyncio.as_completed(tasks, timeout=deadline):
+                try:
+                    yield await next_done
+                except asyncio.TimeoutError:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _collect(items) -> List[Dict[str, Optional[str]]]:
+    return [item async for item in items]
+
+
+async def _merge(*iterators):
+    """Interleave async iterators, yielding items in the order they arrive"""
+    nexts = {asyncio.ensure_future(it.__anext__()): it for it in iterators}
+    try:
+        while nexts:
+            done, _ = await asyncio.wait(nexts, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                it = nexts.pop(task)
+                try:
+                    item = task.result()
+                except StopAsyncIteration:
+                    continue
+                nexts[asyncio.ensure_future(it.__anext__())] = it
+                yield item
+    finally:
+        for task in nexts:
+            task.cancel()
+
+
+async def _stream_crawl_rank(ranker: IncrementalRanker, url_map: Dict[str, Dict[str, Any]], urls: List[str],
+                             deadline: float, on_item,
+                             local_docs: List[Dict[str, Any]],
+                             adopted: Optional[Dict[str, Future]] = None) -> List[Dict[str, Any]]:
+    """Parse each page as it arrives, embed in micro-batches, and keep an incrementally sorted ranking"""
+    loop = asyncio.get_running_loop()
+    # One embedding thread: batches queue up behind each other instead of oversubscribing the CPU
+    embed_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+    embeds = []
+    seen = set()
+
+    try:
+        adopted = adopted or {}
+        if os.getenv("CRAWL_SCHEDULER", "1") == "1":
+            items = CrawlScheduler.from_env(urls, {u: url_map.get(u, {}).get("score", 0) for u in urls},
+                                            adopted=adopted).run()
+        else:
+            items = _merge(_adopted_iter(adopted, deadline),
+                           crawl_iter([u for u in urls if u not in adopted], deadline=deadline))
+        async for item in items:
+            url = item["url"]
+            seen.add(url)
+            doc = _make_doc(url, url_map.get(url, {}), item.get("text"))
+            on_item(len(seen), doc)
+            batch = ranker.add(doc)
+            if batch:
+                embeds.append(loop.run_in_executor(embed_pool, bind_context(ranker.score_batch), batch))
+
+        # Pages still outstanding at the deadline fall back to their snippets
+        late = [_make_doc(url, url_map.get(url, {}), None) for url in urls if url not in seen]
+        for doc in late + local_docs:
+            batch = ranker.add(doc)
+            if batch:
+                embeds.append(loop.run_in_executor(embed_pool, bind_context(ranker.score_batch), batch))
+        remaining = ranker.take_remaining()
+        if remaining:
+            embeds.append(loop.run_in_executor(embed_pool, bind_context(ranker.score_batch), remaining))
+        await asyncio.gather(*embeds)
+    finally:
+        embed_pool.shutdown(wait=False)
+
+    return ranker.ranked
+
+
+def node_crawl_rank_stream(state: WorkflowState) -> WorkflowState:
+    """Streaming crawl -> parse -> embed -> rank; replaces the crawl and rank nodes"""
+    reporter = get_reporter()
+    results = state.get("search_results", [])
+    local_docs = state.get("local_docs", [])
+    candidates = int(os.getenv("CRAWL_CANDIDATES", "15"))
+    url_map, urls_to_crawl = _crawl_targets(results, limit=max(0, candidates - len(local_docs)),
+                                            skip={d["url"] for d in local_docs})
+    prefetch = take_prefetch(state.get("prefetch_id"))
+
+    if not urls_to_crawl and not local_docs:
+        _release(prefetch)
+        state["docs"] = []
+        state["ranked"] = []
+        return state
+
+    deadline = float(os.getenv("CRAWL_DEADLINE", "20"))
+    batch_size = int(os.getenv("STREAM_EMBED_BATCH", "4"))
+
+    reporter.info(f"🚀 Streaming crawl of {len(urls_to_crawl)} URLs (deadline {deadline:.0f}s)...")
+    def on_item(done: int, doc: Dict[str, Any]) -> None:
+        reporter.progress("crawl", done / len(urls_to_crawl),
+                          f"Ranked as it arrived {done}/{len(urls_to_crawl)}: {doc.get('title', '')[:50]}...")
+
+    # Held out here so whatever was ranked before a failure survives it
+    ranker: Optional[IncrementalRanker] = None
+    try:
+        ranker = IncrementalRanker(state["query"], batch_size)
+        ranked = asyncio.run(_stream_crawl_rank(ranker, url_map, urls_to_crawl, deadline, on_item,
+                                                local_docs, _adopt(prefetch, urls_to_crawl)))
+    except Exception as e:
+        reporter.error(f"⚠️ Crawling error: {str(e)}")
+        ranked = ranker.ranked if ranker else []
+        # Corpus matches are already scored against the query; keep any not ranked yet
+        ranked_urls = {d["url"] for d in ranked}
+        ranked = sorted(ranked + [d for d in local_docs if d["url"] not in ranked_urls],
+                        key=lambda d: -d.get("similarity", 0.0))
+    finally:
+        _release(prefetch)
+        reporter.clear("crawl")
+
+    ranked = _drop_near_duplicates(ranked)
+    full = sum(1 for d in ranked if d.get("full_fetch"))
+    reporter.success(f"✅ Streamed and ranked {full} pages (full), {len(ranked) - full} snippets")
+    remember_docs(state, ranked)
+
+    state["docs"] = ranked
+    state["ranked"] = ranked
     return state
 
 
+def _cache_analysis(query: str, docs: List[Dict[str, Any]], response: str) -> None:
+    cache = get_analysis_cache()
+    if cache is None or is_error_response(response):
+        return
+    try:
+        cache.put(query, docs, response, embed_texts([query])[0])
+    except Exception as e:
+        print(f"Error caching analysis: {e}")
+
+
+def _caching_stream(stream, query: str, docs: List[Dict[str, Any]]):
+    """Pass deltas through and cache the full analysis once the stream is exhausted"""
+    parts = []
+    for delta in stream:
+        parts.append(delta)
+        yield delta
+    _cache_analysis(query, docs, "".join(parts))
+
+
 def node_llm_analysis(state: WorkflowState) -> WorkflowState:
     ranked = state.get("ranked", [])
     
@@ -141,23 +461,99 @@ def node_llm_analysis(state: WorkflowState) -> WorkflowState:
         return state
     
     query = state["query"]
+    docs = analysed_docs(ranked)
+
+    # Deterministic amounts give a preliminary range before the LLM answers
+    with span("amounts.extract", docs=len(ranked)) as attrs:
+        attrs["amounts"] = annotate_amounts(ranked)
+        estimate = estimate_range(ranked[:int(os.getenv("ANALYSIS_MAX_CASES", "10"))])
+    if estimate:
+        state["amount_estimate"] = estimate
+        get_reporter().success(f"💰 Preliminary range from extracted amounts: {describe_estimate(estimate)}")
+
+    cache = get_analysis_cache()
+    if cache is not None and not state.get("refresh_analysis"):
+        hit = cache.lookup(query, docs, embed=lambda: embed_texts([query])[0])
+        incr("analysis_cache", outcome=hit["level"] if hit else "miss")
+        if hit:
+            state["llm_response"] = hit.pop("response")
+            state["analysis_cache"] = hit
+            label = "same query and cases" if hit["level"] == "exact" else \
+                f"{hit['similarity']:.0%} similar query, {hit['overlap']:.0%} same cases"
+            get_reporter().success(f"♻️ Reused a cached analysis ({label})")
+            return state
+
+    if state.get("stream_analysis"):
+        # Lazy generator: tokens are requested when the caller starts rendering
+        state["llm_stream"] = _caching_stream(stream_groq_analysis(query, ranked), query, docs)
+        return state
+
     llm_response = call_groq_analysis(query, ranked)
     state["llm_response"] = llm_response
+    _cache_analysis(query, docs, llm_response)
     
     return state
 
 
-def build_graph():
+def _stage(name: str, fn, limit: Optional[threading.Semaphore] = None):
+    """Wrap a node so it reports its run time (and time spent waiting for a stage slot)"""
+    @functools.wraps(fn)
+    def run(state: WorkflowState) -> WorkflowState:
+        reporter = get_reporter()
+        t0 = time.perf_counter()
+        if limit is not None:
+            limit.acquire()
+        waited = time.perf_counter() - t0
+        try:
+            with span(f"node.{name}", waited=round(waited, 4)):
+                return fn(state)
+        finally:
+            if limit is not None:
+                limit.release()
+            reporter.timing(name, time.perf_counter() - t0 - waited, waited)
+    return run
+
+
+def build_graph(mode: Optional[str] = None, stage_limits: Optional[Dict[str, int]] = None,
+                retrieval: Optional[str] = None):
+    """Compile the workflow. mode "streaming" (or PIPELINE_MODE=streaming) fuses crawl and rank.
+
+    retrieval "local_first" (or RETRIEVAL_MODE=local_first) consults the local case corpus
+    first and skips search and crawl when it already holds enough strong matches.
+
+    stage_limits caps how many graph runs may execute a node at once (e.g. {"rank": 1}); the
+    limits are shared by every invocation of the compiled graph.
+    """
+    mode = mode or os.getenv("PIPELINE_MODE", "staged")
+    retrieval = retrieval or os.getenv("RETRIEVAL_MODE", "web")
+    limits = {name: threading.Semaphore(n) for name, n in (stage_limits or {}).items()}
+
     g = StateGraph(WorkflowState)
-    g.add_node("search", node_search)
-    g.add_node("crawl", node_crawl)
-    g.add_node("rank", node_rank)
-    g.add_node("llm_analysis", node_llm_analysis)
-
-    g.set_entry_point("search")
-    g.add_edge("search", "crawl")
-    g.add_edge("crawl", "rank")
-    g.add_edge("rank", "llm_analysis")
+
+    def add_node(name: str, fn) -> None:
+        g.add_node(name, _stage(name, fn, limits.get(name)))
+
+    add_node("search", node_search)
+    add_node("llm_analysis", node_llm_analysis)
+
+    if retrieval == "local_first":
+        add_node("local_retrieve", node_local_retrieve)
+        g.set_entry_point("local_retrieve")
+        g.add_conditional_edges("local_retrieve", route_after_local,
+                                {"search": "search", "llm_analysis": "llm_analysis"})
+    else:
+        g.set_entry_point("search")
+
+    if mode == "streaming":
+        add_node("crawl_rank", node_crawl_rank_stream)
+        g.add_edge("search", "crawl_rank")
+        g.add_edge("crawl_rank", "llm_analysis")
+    else:
+        add_node("crawl", node_crawl)
+        add_node("rank", node_rank)
+        g.add_edge("search", "crawl")
+        g.add_edge("crawl", "rank")
+        g.add_edge("rank", "llm_analysis")
     g.add_edge("llm_analysis", END)
     
     return g.compile()
@@ -0,0 +1,208 @@
+import os
+import re
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# ---------------------------
+# Pipeline Metrics
+# ---------------------------
+# span() times a block, incr() bumps a counter. Both always feed the process-wide registry
+# (exported in Prometheus text format); a RunMetrics installed with use_metrics() also keeps
+# every span of one run, with its attributes (URL, status, bytes, tokens, batch size...), for
+# JSON-lines export and the app's timing panel.
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _sample_value(value: float) -> str:
+    """Exact sample text: integers in full (crawl_bytes passes 1e6 quickly), floats round-tripped"""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _label_str(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    escaped = []
+    for k, v in labels:
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{k}="{v}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+class MetricsRegistry:
+    """Process-wide counters and span-duration summaries"""
+
+    def __init__(self, prefix: str = "legal_pipeline"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._spans: Dict[str, List[float]] = {}  # name -> [count, sum, max]
+
+    def incr(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = (_metric_name(name), tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe_span(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stats = self._spans.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+    def prometheus_text(self) -> str:
+        p = self.prefix
+        lines: List[str] = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            spans = sorted(self._spans.items())
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {p}_{name}_total counter")
+                typed.add(name)
+            lines.append(f"{p}_{name}_total{_label_str(labels)} {_sample_value(value)}")
+        if spans:
+            lines.append(f"# HELP {p}_span_seconds Wall time of instrumented pipeline spans")
+            lines.append(f"# TYPE {p}_span_seconds summary")
+            for name, (count, total, _) in spans:
+                lines.append(f'{p}_span_seconds_count{{span="{name}"}} {count}')
+                lines.append(f'{p}_span_seconds_sum{{span="{name}"}} {total:.6f}')
+            lines.append(f"# TYPE {p}_span_seconds_max gauge")
+            for name, (_, _, longest) in spans:
+                lines.append(f'{p}_span_seconds_max{{span="{name}"}} {longest:.6f}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Atomic write, suitable for a node_exporter textfile collector"""
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+
+class RunMetrics:
+    """Spans and counters of a single pipeline run"""
+
+    def __init__(self, run_id: Optional[str] = None):
+        self.run_id = run_id
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.spans: List[Dict[str, Any]] = []
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self.spans.append(record)
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def absorb(self, other: "RunMetrics", parent: Optional[str] = None) -> None:
+        """Add another run's spans and counters, e.g. work a shared worker thread did for this run"""
+        offset = other.started - self.started
+        with other._lock:
+            spans = list(other.spans)
+            counters = dict(other.counters)
+        with self._lock:
+            for s in spans:
+                self.spans.append({**s, "start": round(s["start"] + offset, 4), "parent": s["parent"] or parent})
+            for name, value in counters.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def spans_named(self, prefix: str) -> List[Dict[str, Any]]:
+        return [s for s in self.spans if s["name"].startswith(prefix)]
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-span-name count / total / max seconds, plus the counters"""
+        by_name: Dict[str, Dict[str, float]] = {}
+        for s in self.spans:
+            stats = by_name.setdefault(s["name"], {"count": 0, "seconds": 0.0, "max": 0.0})
+            stats["count"] += 1
+            stats["seconds"] = round(stats["seconds"] + s["seconds"], 4)
+            stats["max"] = max(stats["max"], s["seconds"])
+        return {"run_id": self.run_id, "wall_seconds": round(time.perf_counter() - self.started, 4),
+                "spans": by_name, "counters": dict(self.counters)}
+
+    def records(self) -> List[Dict[str, Any]]:
+        base = {"run_id": self.run_id, "run_started_at": self.started_at}
+        rows = [{**base, "kind": "span", **s} for s in self.spans]
+        rows.append({**base, "kind": "summary", **self.summary()})
+        return rows
+
+    def write_jsonl(self, path: str) -> None:
+        """Append one line per span plus a summary line"""
+        with open(path, "a", encoding="utf-8") as f:
+            for row in self.records():
+                f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+
+
+_registry = MetricsRegistry()
+_run: contextvars.ContextVar = contextvars.ContextVar("run_metrics", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+def get_registry() -> MetricsRegistry:
+    return _registry
+
+
+def get_run_metrics() -> Optional[RunMetrics]:
+    return _run.get()
+
+
+@contextmanager
+def use_metrics(run: RunMetrics) -> Iterator[RunMetrics]:
+    """Collect the spans of the current context (thread / task) into `run`"""
+    token = _run.set(run)
+    try:
+        yield run
+    finally:
+        _run.reset(token)
+
+
+def incr(name: str, value: float = 1, **labels: Any) -> None:
+    _registry.incr(name, value, **labels)
+    run = _run.get()
+    if run is not None:
+        suffix = "".join(f"|{k}={v}" for k, v in sorted(labels.items()))
+        run.incr(name + suffix, value)
+
+
+def record_span(name: str, seconds: float, start: Optional[float] = None, **attrs: Any) -> None:
+    """Record an already-measured span (for work that cannot sit inside a `with` block)"""
+    _registry.observe_span(name, seconds)
+    run = _run.get()
+    if run is not None:
+        start = (start if start is not None else time.perf_counter() - seconds) - run.started
+        run.add_span({"name": name, "parent": _current_span.get(), "start": round(start, 4),
+                      "seconds": round(seconds, 4), **attrs})
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+    """Time a block. The yielded dict holds the span's attributes; callers may add to it"""
+    token = _current_span.set(name)
+    t0 = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException as e:
+        attrs.setdefault("error", f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        _current_span.reset(token)
+        record_span(name, time.perf_counter() - t0, start=t0, **attrs)
+
+
+def bind_context(fn):
+    """Carry the caller's metrics context into a worker thread (executors do not copy contextvars)"""
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
@@ -0,0 +1,112 @@
+import sys
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+# ---------------------------
+# Progress Reporting
+# ---------------------------
+# Pipeline code reports through get_reporter() instead of calling Streamlit directly,
+# so the same graph runs in the UI, in batch mode, or silently.
+
+class ProgressReporter:
+    """Base reporter: every event is forwarded to emit(); the default implementation drops them"""
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        pass
+
+    def info(self, message: str) -> None:
+        self.emit({"type": "info", "message": message})
+
+    def success(self, message: str) -> None:
+        self.emit({"type": "success", "message": message})
+
+    def warning(self, message: str) -> None:
+        self.emit({"type": "warning", "message": message})
+
+    def error(self, message: str) -> None:
+        self.emit({"type": "error", "message": message})
+
+    def caption(self, message: str) -> None:
+        self.emit({"type": "caption", "message": message})
+
+    def progress(self, key: str, fraction: float, text: Optional[str] = None) -> None:
+        self.emit({"type": "progress", "key": key, "fraction": fraction, "message": text})
+
+    def clear(self, key: str) -> None:
+        self.emit({"type": "clear", "key": key})
+
+    def timing(self, stage: str, seconds: float, waited: float = 0.0) -> None:
+        self.emit({"type": "timing", "stage": stage, "seconds": seconds, "waited": waited})
+
+
+class CallbackReporter(ProgressReporter):
+    """Forwards each event dict to a callback"""
+
+    def __init__(self, callback: Callable[[Dict[str, Any]], None]):
+        self.callback = callback
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        self.callback(event)
+
+
+class LogReporter(ProgressReporter):
+    """Prints messages (not progress ticks) with an optional prefix, e.g. a case id"""
+
+    def __init__(self, prefix: str = "", stream=None):
+        self.prefix = f"[{prefix}] " if prefix else ""
+        self.stream = stream or sys.stderr
+        self._lock = threading.Lock()
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        if event["type"] in ("progress", "clear"):
+            return
+        if event["type"] == "timing":
+            line = f"{event['stage']}: {event['seconds']:.2f}s (waited {event['waited']:.2f}s)"
+        else:
+            line = event["message"]
+        with self._lock:
+            print(f"{self.prefix}{line}", file=self.stream, flush=True)
+
+
+class StreamlitReporter(ProgressReporter):
+    """Renders events with Streamlit elements; progress keys map to a bar plus a status line"""
+
+    def __init__(self):
+        import streamlit as st
+        self.st = st
+        self._bars: Dict[str, Any] = {}
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        st = self.st
+        kind = event["type"]
+        if kind in ("info", "success", "warning", "error", "caption"):
+            getattr(st, kind)(event["message"])
+        elif kind == "progress":
+            if event["key"] not in self._bars:
+                self._bars[event["key"]] = (st.progress(0), st.empty())
+            bar, status = self._bars[event["key"]]
+            bar.progress(min(1.0, max(0.0, event["fraction"])))
+            if event.get("message"):
+                status.text(event["message"])
+        elif kind == "clear":
+            for element in self._bars.pop(event["key"], ()):
+                element.empty()
+
+
+_reporter: contextvars.ContextVar = contextvars.ContextVar("progress_reporter", default=ProgressReporter())
+
+
+def get_reporter() -> ProgressReporter:
+    return _reporter.get()
+
+
+@contextmanager
+def use_reporter(reporter: ProgressReporter) -> Iterator[ProgressReporter]:
+    """Route pipeline progress to `reporter` for the current context (thread / task)"""
+    token = _reporter.set(reporter)
+    try:
+        yield reporter
+    finally:
+        _reporter.reset(token)
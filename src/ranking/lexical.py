@@ -0,0 +1,88 @@
+import os
+import re
+import numpy as np
+from typing import Any, Dict, List, Tuple
+
+# ---------------------------
+# BM25 Prefilter
+# ---------------------------
+# An in-memory inverted index over the crawled docs, stored as flat numpy posting arrays
+# sorted by term id (CSC layout), so scoring a query is a few vectorised gathers per term.
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "the", "a", "an", "and", "or", "of", "to", "in", "on", "for", "with", "by", "at", "is", "are", "was",
+    "be", "as", "that", "this", "it", "from", "has", "had", "have", "not", "which", "its", "been",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+class BM25Index:
+    def __init__(self, texts: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocab: Dict[str, int] = {}
+        doc_ids, term_ids, tfs = [], [], []
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        for i, text in enumerate(texts):
+            ids = np.fromiter((self.vocab.setdefault(t, len(self.vocab)) for t in tokenize(text)), dtype=np.int64)
+            lengths[i] = len(ids)
+            if len(ids):
+                terms, counts = np.unique(ids, return_counts=True)
+                term_ids.append(terms)
+                tfs.append(counts)
+                doc_ids.append(np.full(len(terms), i, dtype=np.int64))
+
+        self.n_docs = len(texts)
+        self.lengths = lengths
+        self.avg_length = float(lengths.mean()) if len(texts) and lengths.mean() > 0 else 1.0
+        if term_ids:
+            terms = np.concatenate(term_ids)
+            order = np.argsort(terms, kind="stable")
+            self.post_docs = np.concatenate(doc_ids)[order]
+            self.post_tf = np.concatenate(tfs)[order].astype(np.float32)
+            df = np.bincount(terms, minlength=len(self.vocab))
+        else:
+            self.post_docs = np.zeros(0, dtype=np.int64)
+            self.post_tf = np.zeros(0, dtype=np.float32)
+            df = np.zeros(len(self.vocab), dtype=np.int64)
+        self.term_ptr = np.concatenate(([0], np.cumsum(df)))
+        self.idf = np.log(1 + (self.n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+    def scores(self, query: str) -> np.ndarray:
+        out = np.zeros(self.n_docs, dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * self.lengths / self.avg_length)
+        for term in set(tokenize(query)):
+            t = self.vocab.get(term)
+            if t is None:
+                continue
+            lo, hi = self.term_ptr[t], self.term_ptr[t + 1]
+            docs, tf = self.post_docs[lo:hi], self.post_tf[lo:hi]
+            # Postings hold one entry per (term, doc), so plain fancy-index addition is safe
+            out[docs] += self.idf[t] * tf * (self.k1 + 1) / (tf + norm[docs])
+        return out
+
+
+def _unit_scale(values: np.ndarray) -> np.ndarray:
+    top = values.max() if len(values) else 0.0
+    return values / top if top > 0 else np.zeros_like(values)
+
+
+def prefilter(query: str, docs: List[Dict[str, Any]], top_n: int,
+              serp_weight: float = 0.3) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Score every doc with BM25 blended with its SERP score; return (top_n survivors, the rest).
+
+    Sets doc["lexical_score"] (raw BM25) and doc["prefilter_score"] (blend, 0..1) on every doc.
+    """
+    max_chars = int(os.getenv("RANK_LEXICAL_CHARS", "50000"))
+    bm25 = BM25Index([d.get("text", "")[:max_chars] for d in docs]).scores(query)
+    serp = np.array([float(d.get("score", 0) or 0) for d in docs], dtype=np.float32)
+    combined = (1 - serp_weight) * _unit_scale(bm25) + serp_weight * _unit_scale(serp)
+    for d, lexical, blended in zip(docs, bm25, combined):
+        d["lexical_score"] = float(lexical)
+        d["prefilter_score"] = float(blended)
+    order = np.argsort(-combined, kind="stable")
+    return [docs[i] for i in order[:top_n]], [docs[i] for i in order[top_n:]]
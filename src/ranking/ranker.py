@@ -1,24 +1,177 @@
+import os
+import bisect
+import threading
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+
 from src.state import WorkflowState
 from src.utils.utils import embed_texts, cosine_sim
+from src.corpus.retrieval import remember_docs
+from src.ranking.lexical import prefilter
+from src.progress import get_reporter
+from src.metrics import span
+
+# ---------------------------
+# Passage Chunking
+# ---------------------------
+
+def split_passages(text: str, passage_chars: int = 1500, overlap_chars: int = 200,
+                   max_passages: int = 16) -> List[Tuple[int, int, str]]:
+    """Split text into overlapping (start, end, passage) windows, breaking on whitespace"""
+    text = text or ""
+    if len(text) <= passage_chars:
+        return [(0, len(text), text)]
+
+    passages = []
+    step = max(1, passage_chars - overlap_chars)
+    start = 0
+    while start < len(text) and len(passages) < max_passages:
+        end = min(len(text), start + passage_chars)
+        if end < len(text):
+            cut = text.rfind(" ", start + step, end)
+            if cut > start:
+                end = cut
+        passages.append((start, end, text[start:end].strip()))
+        if end >= len(text):
+            break
+        start = max(start + 1, end - overlap_chars)
+        # Begin the next window on a word boundary
+        space = text.find(" ", start, end)
+        if space != -1:
+            start = space + 1
+    return passages
+
+
+def _aggregate(scores: np.ndarray, agg: str, top_k: int) -> float:
+    if agg == "topk":
+        k = min(top_k, len(scores))
+        return float(np.mean(np.sort(scores)[-k:]))
+    return float(np.max(scores))
+
+
+# ---------------------------
+# Ranking Node
+# ---------------------------
+
+def _rank_single(q_emb: np.ndarray, docs: List[Dict[str, Any]]) -> None:
+    doc_texts = [d["text"][:2048] for d in docs]
+    doc_embs = embed_texts(doc_texts)
+    sims = cosine_sim(q_emb, doc_embs).flatten()
+
+    for d, s, vec in zip(docs, sims, doc_embs):
+        d["similarity"] = float(s)
+        d["doc_vector"] = vec
+
+
+def _rank_passages(q_emb: np.ndarray, docs: List[Dict[str, Any]]) -> None:
+    passage_chars = int(os.getenv("RANK_PASSAGE_CHARS", "1500"))
+    overlap_chars = int(os.getenv("RANK_PASSAGE_OVERLAP", "200"))
+    max_passages = int(os.getenv("RANK_MAX_PASSAGES", "16"))
+    batch_size = int(os.getenv("RANK_BATCH_SIZE", "16"))
+    agg = os.getenv("RANK_PASSAGE_AGG", "max")
+    top_k = int(os.getenv("RANK_PASSAGE_TOPK", "3"))
+
+    spans: List[Tuple[int, int, int]] = []  # (doc index, start, end)
+    passages: List[str] = []
+    for i, d in enumerate(docs):
+        for start, end, passage in split_passages(d.get("text", ""), passage_chars, overlap_chars, max_passages):
+            spans.append((i, start, end))
+            passages.append(passage)
+
+    passage_embs = embed_texts(passages, batch_size=batch_size)
+    sims = cosine_sim(q_emb, passage_embs).flatten()
+
+    per_doc: Dict[int, List[Dict[str, Any]]] = {}
+    for (i, start, end), s, vec in zip(spans, sims, passage_embs):
+        if i not in per_doc:
+            docs[i]["doc_vector"] = vec  # the opening passage stands in for the whole doc
+        per_doc.setdefault(i, []).append({"start": start, "end": end, "score": float(s)})
+
+    for i, d in enumerate(docs):
+        scores = per_doc.get(i, [])
+        d["passage_scores"] = scores
+        d["similarity"] = _aggregate(np.array([p["score"] for p in scores]), agg, top_k) if scores else 0.0
+
+
+def score_docs(q_emb: np.ndarray, docs: List[Dict[str, Any]]) -> None:
+    """Set doc["similarity"] (and passage scores in passage mode) against a query embedding.
+
+    doc["doc_vector"] keeps the doc's embedding so the local corpus can store it without
+    another forward pass.
+    """
+    if os.getenv("RANK_MODE", "single") == "passages":
+        _rank_passages(q_emb, docs)
+    else:
+        _rank_single(q_emb, docs)
+
+
+class IncrementalRanker:
+    """Ranks docs as they stream in: embeds in micro-batches and keeps a sorted list.
+
+    add() returns a full batch ready for scoring (or None); score_batch() may run in a
+    worker thread while more docs arrive.
+    """
+
+    def __init__(self, query: str, batch_size: int = 4):
+        self.q_emb = embed_texts([query])
+        self.batch_size = batch_size
+        self._pending: List[Dict[str, Any]] = []
+        self._ranked: List[Dict[str, Any]] = []
+        self._keys: List[float] = []  # negated similarities, ascending
+        self._lock = threading.Lock()
+
+    def add(self, doc: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            self._pending.append(doc)
+            if len(self._pending) < self.batch_size:
+                return None
+            batch, self._pending = self._pending, []
+            return batch
+
+    def take_remaining(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            batch, self._pending = self._pending, []
+            return batch
+
+    def score_batch(self, batch: List[Dict[str, Any]]) -> None:
+        score_docs(self.q_emb, batch)
+        with self._lock:
+            for d in batch:
+                key = -d.get("similarity", 0.0)
+                pos = bisect.bisect_right(self._keys, key)
+                self._keys.insert(pos, key)
+                self._ranked.insert(pos, d)
+
+    @property
+    def ranked(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._ranked)
+
 
 def node_rank(state: WorkflowState) -> WorkflowState:
     q = state["query"]
     docs = state.get("docs", [])
-    
+
     if not docs:
         state["ranked"] = []
         return state
-    
-    # Embed query and docs
+
+    # Stage 1: BM25 + SERP score over every candidate; only the top-N go on to Legal-BERT
+    top_n = int(os.getenv("RANK_TOP_N", "15"))
+    if os.getenv("RANK_PREFILTER", "1") == "1":
+        with span("rank.prefilter", docs=len(docs), top_n=top_n):
+            docs, dropped = prefilter(q, docs, top_n, serp_weight=float(os.getenv("RANK_SERP_WEIGHT", "0.3")))
+        if dropped:
+            get_reporter().caption(f"🔎 Lexical prefilter kept {len(docs)} of {len(docs) + len(dropped)} candidates for Legal-BERT")
+
+    # Stage 2: embed query and surviving docs
     q_emb = embed_texts([q])
-    doc_texts = [d["text"][:2048] for d in docs]
-    doc_embs = embed_texts(doc_texts)
-    sims = cosine_sim(q_emb, doc_embs).flatten()
-    
-    for d, s in zip(docs, sims):
-        d["similarity"] = float(s)
-    
+    score_docs(q_emb, docs)
+
     docs_sorted = sorted(docs, key=lambda x: x.get("similarity", 0.0), reverse=True)
     state["ranked"] = docs_sorted
-    
+
+    # Keep full-text docs for local-first retrieval on later queries
+    remember_docs(state, docs_sorted)
+
     return state
@@ -0,0 +1,27 @@
+from typing import Any, Dict, List, Optional
+
+from src.analysis.amounts import describe_estimate
+
+
+def build_report(query: str, ranked: List[Dict[str, Any]], llm_response: str,
+                 amount_estimate: Optional[Dict[str, Any]] = None) -> str:
+    """Markdown report offered for download in the UI and written by the batch runner"""
+    report = f"""# Arbitration Case Analysis Report
+
+## Query
+{query}
+"""
+    if amount_estimate:
+        report += f"\n## Preliminary Amount Range\n{describe_estimate(amount_estimate)}\n"
+    report += "\n## Retrieved Cases\n"
+    for i, doc in enumerate(ranked, 1):
+        report += f"\n### Case {i}: {doc.get('title', 'Untitled')}\n"
+        report += f"- URL: {doc['url']}\n"
+        report += f"- Relevance: {doc.get('similarity', 0):.2%}\n"
+        awarded = [a["amount"] for a in doc.get("amounts", []) if a["kind"] == "award"]
+        if awarded:
+            report += f"- Amounts awarded: {', '.join(dict.fromkeys(awarded[:5]))}\n"
+        report += "\n"
+
+    report += f"\n## AI Analysis\n{llm_response}\n"
+    return report
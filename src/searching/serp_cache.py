@@ -0,0 +1,116 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional
+
+# ---------------------------
+# SERP Response Cache
+# ---------------------------
+# SQLite-backed cache of SerpAPI organic results keyed by the normalized request
+# params (api_key excluded), so the same file can be replayed offline.
+
+def normalize_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    normalized = {}
+    for k, v in params.items():
+        if k == "api_key":
+            continue
+        if isinstance(v, str):
+            v = " ".join(v.split())
+            if k == "q":
+                v = v.lower()
+        normalized[k] = v
+    return normalized
+
+
+def params_key(params: Dict[str, Any]) -> str:
+    payload = json.dumps(normalize_params(params), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SerpCache:
+    """TTL + max-size response cache; `offline` serves stale entries and never expires them"""
+
+    def __init__(self, path: str, ttl_seconds: float = 24 * 3600, max_entries: int = 5000,
+                 offline: bool = False):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS serp_cache ("
+            " key TEXT PRIMARY KEY, params TEXT NOT NULL, results TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS serp_cache_created ON serp_cache(created_at)")
+        self._conn.commit()
+
+    def get(self, params: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        key = params_key(params)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results, created_at FROM serp_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (not self.offline and time.time() - row[1] > self.ttl_seconds):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, params: Dict[str, Any], results: List[Dict[str, Any]]) -> None:
+        key = params_key(params)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO serp_cache (key, params, results, created_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(normalize_params(params), sort_keys=True), json.dumps(results), time.time()),
+            )
+            if not self.offline:
+                self._conn.execute(
+                    "DELETE FROM serp_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+                )
+            # Size cap: drop the oldest entries beyond max_entries
+            self._conn.execute(
+                "DELETE FROM serp_cache WHERE key IN ("
+                " SELECT key FROM serp_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM serp_cache").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+_cache: Optional[SerpCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_serp_cache() -> Optional[SerpCache]:
+    """Process-wide cache; disabled by setting SERP_CACHE_PATH to an empty string"""
+    global _cache
+    path = os.getenv("SERP_CACHE_PATH", ".cache/serp.sqlite3")
+    if not path:
+        return None
+    with _cache_lock:
+        if _cache is None or _cache.path != path:
+            _cache = SerpCache(
+                path,
+                ttl_seconds=float(os.getenv("SERP_CACHE_TTL", str(24 * 3600))),
+                max_entries=int(os.getenv("SERP_CACHE_MAX_ENTRIES", "5000")),
+                offline=os.getenv("SERP_CACHE_OFFLINE", "0") == "1",
+            )
+        return _cache
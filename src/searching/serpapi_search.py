@@ -1,109 +1,274 @@
 import os
+import re
+import time
+import threading
 import requests
-import streamlit as st
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Dict, Any, Optional
 
-def serpapi_multi_search(queries: Dict[str, str], n: int = 15) -> List[Dict[str, str]]:
-    """Perform multiple searches targeting different sources"""
-    api_key = os.getenv("SERPAPI_API_KEY")
-    if not api_key:
-        st.error("⚠️ SERPAPI_API_KEY not found!")
-        return []
-    
-    all_results = []
-    seen_urls = set()
-    
-    # Priority legal/arbitration databases and sources
-    priority_sites = [
-        "site:jusmundi.com OR site:italaw.com OR site:iccwbo.org",
-        "site:kluwer.com OR site:sccinstitute.com OR site:hcourt.gov.in",
-        "site:siac.org.sg OR site:diac.in OR site:niac.in",
-        "site:arbitrationindia.com OR site:manupatra.com OR site:sci.gov.in"
-    ]
-    
-    search_configs = [
+from src.crawling.dedup import canonical_url
+from src.progress import get_reporter
+from src.metrics import span, incr, bind_context
+from src.searching.serp_cache import get_serp_cache
+
+SERPAPI_URL = "https://serpapi.com/search.json"
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Shared keep-alive session so concurrent searches reuse pooled connections"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+# Each indicator group is one compiled alternation (substring semantics, as before)
+SCORE_PATTERNS = [
+    (re.compile(r"award|damages|compensation", re.IGNORECASE), 3),
+    (re.compile(r"crore|million|billion|usd|inr|₹|\$", re.IGNORECASE), 5),
+    (re.compile(r"tribunal|arbitration|arbitral", re.IGNORECASE), 2),
+    (re.compile(r"final|decision|order|judgment", re.IGNORECASE), 2),
+]
+AUTHENTIC_SOURCE_RE = re.compile(r"jusmundi|italaw|manupatra|sci\.gov|hcourt|arbitration")
+
+
+def _score_result(title: str, snippet: str, link: str) -> int:
+    """Score based on keywords in title/snippet"""
+    content = title + " " + snippet
+    score = sum(points for pattern, points in SCORE_PATTERNS if pattern.search(content))
+
+    # Authentic source bonus
+    if AUTHENTIC_SOURCE_RE.search(link):
+        score += 4
+
+    return score
+
+
+def _offline_replay() -> bool:
+    """Offline replay serves recorded responses only, so no API key is needed"""
+    cache = get_serp_cache()
+    return cache is not None and cache.offline
+
+
+def _build_search_configs(queries: Dict[str, str]) -> List[Dict[str, str]]:
+    return [
         # Search 1: Amount-focused with priority sites
         {
             "query": f"{queries['amount_focused']} award damages compensation (site:jusmundi.com OR site:italaw.com OR site:arbitrationindia.com)",
-            "label": "Award-focused (Legal DBs)"
+            "label": "Award-focused (Legal DBs)",
+            "base": queries['amount_focused'],
         },
         # Search 2: Main query with case law sites
         {
             "query": f"{queries['main']} arbitration award final decision (site:manupatra.com OR site:sci.gov.in OR site:hcourt.gov.in)",
-            "label": "Case Law Sites"
+            "label": "Case Law Sites",
+            "base": queries['main'],
         },
         # Search 3: Amount-specific terms
         {
             "query": f"{queries['main']} \"awarded\" \"crore\" OR \"million\" OR \"USD\" OR \"INR\" arbitration",
-            "label": "Amount-specific"
+            "label": "Amount-specific",
+            "base": queries['main'],
         },
         # Search 4: News and analysis sites
         {
             "query": f"{queries['main']} arbitration settlement award (site:barandbench.com OR site:livelaw.in OR site:scobserver.in)",
-            "label": "Legal News"
+            "label": "Legal News",
+            "base": queries['main'],
         }
     ]
-    
-    for config in search_configs[:3]:  # Use top 3 searches to stay within limits
-        try:
+
+
+def _fetch_serp(params: Dict[str, Any], timeout: float) -> List[Dict[str, Any]]:
+    """Return organic results for one SerpAPI request, from the response cache when possible.
+
+    Raises on HTTP errors, and on cache misses when SERP_CACHE_OFFLINE=1.
+    """
+    cache = get_serp_cache()
+    with span("serp.fetch", query=params.get("q", "")[:120]) as s:
+        if cache is not None:
+            cached = cache.get(params)
+            if cached is not None:
+                s.update(cache="hit", results=len(cached))
+                incr("serp_requests", outcome="cache_hit")
+                return cached
+            if cache.offline:
+                incr("serp_requests", outcome="offline_miss")
+                raise LookupError("no cached response (offline mode)")
+
+        # SERPAPI_URL can point at a local stand-in for benchmarks
+        r = get_http_session().get(os.getenv("SERPAPI_URL", SERPAPI_URL), params=params, timeout=timeout)
+        s.update(cache="miss", status=r.status_code, bytes=len(r.content))
+        incr("serp_requests", outcome=str(r.status_code))
+        r.raise_for_status()
+        results = r.json().get("organic_results", []) or []
+        s["results"] = len(results)
+        if cache is not None:
+            cache.put(params, results)
+        return results
+
+
+def _query_words(text: str) -> frozenset:
+    return frozenset(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    return len(a & b) / len(a | b) if (a or b) else 1.0
+
+
+class SearchBatch:
+    """SerpAPI searches submitted in rounds and merged into one deduplicated candidate list.
+
+    Each submit() builds the four source-targeted searches for a query pair and skips any whose
+    query words overlap a search already issued for the same source by at least `min_novelty`
+    (SEARCH_DEDUP_JACCARD), so a later round only adds the searches that say something new.
+    Results are merged in arrival order; the deadline runs from the latest round.
+    """
+
+    def __init__(self, api_key: Optional[str], min_novelty: float = 0.8):
+        self.api_key = api_key
+        self.min_novelty = min_novelty
+        self.call_timeout = float(os.getenv("SERP_CALL_TIMEOUT", "20"))
+        self.deadline = float(os.getenv("SERP_DEADLINE", "25"))
+        self.issued: List[Dict[str, Any]] = []
+        self.skipped = 0
+        self._pool = ThreadPoolExecutor(max_workers=12, thread_name_prefix="serp")
+        self._futures: Dict[Any, Dict[str, Any]] = {}
+        self._done_order: List[Any] = []
+        self._lock = threading.Lock()
+        self._last_submit = time.perf_counter()
+
+    def _is_new(self, config: Dict[str, str]) -> bool:
+        words = _query_words(config["base"])
+        return all(_jaccard(words, prev["words"]) < self.min_novelty
+                   for prev in self.issued if prev["label"] == config["label"])
+
+    def _on_done(self, future) -> None:
+        with self._lock:
+            self._done_order.append(future)
+
+    def submit(self, queries: Dict[str, str], round_name: str = "main") -> int:
+        """Start the searches for `queries` that add something new; returns how many were issued"""
+        reporter = get_reporter()
+        issued = 0
+        for config in _build_search_configs(queries):
+            if not self._is_new(config):
+                self.skipped += 1
+                incr("serp_searches", round=round_name, outcome="skipped")
+                continue
             params = {
                 "engine": "google",
                 "q": config["query"],
-                "api_key": api_key,
-                "num": 10,
+                "api_key": self.api_key,
+                "num": int(os.getenv("SERP_RESULTS_PER_QUERY", "10")),
             }
-            
-            st.caption(f"🔍 {config['label']}: {config['query'][:80]}...")
-            
-            r = requests.get("https://serpapi.com/search.json", params=params, timeout=20)
-            if r.status_code == 200:
-                data = r.json()
-                for item in data.get("organic_results", []) or []:
-                    link = item.get("link")
-                    title = item.get("title") or ""
-                    snippet = item.get("snippet") or ""
-                    
-                    if link and link not in seen_urls:
-                        # Score based on keywords in title/snippet
-                        score = 0
-                        content_lower = (title + " " + snippet).lower()
-                        
-                        # High value indicators
-                        if any(x in content_lower for x in ["award", "awarded", "damages", "compensation"]):
-                            score += 3
-                        if any(x in content_lower for x in ["crore", "million", "billion", "usd", "inr", "₹", "$"]):
-                            score += 5
-                        if any(x in content_lower for x in ["tribunal", "arbitration", "arbitral"]):
-                            score += 2
-                        if any(x in content_lower for x in ["final", "decision", "order", "judgment"]):
-                            score += 2
-                        
-                        # Authentic source bonus
-                        if any(domain in link for domain in ["jusmundi", "italaw", "manupatra", "sci.gov", "hcourt", "arbitration"]):
-                            score += 4
-                        
-                        all_results.append({
-                            "title": title,
-                            "url": link,
-                            "snippet": snippet,
-                            "score": score,
-                            "source": config["label"]
-                        })
-                        seen_urls.add(link)
-                        
-        except Exception as e:
-            st.warning(f"Search {config['label']} failed: {str(e)}")
-            continue
-    
-    # Sort by score and return top results
-    all_results.sort(key=lambda x: x.get("score", 0), reverse=True)
-    return all_results[:n]
+            reporter.caption(f"🔍 {config['label']}: {config['query'][:80]}...")
+            future = self._pool.submit(bind_context(_fetch_serp), params, self.call_timeout)
+            self._futures[future] = {**config, "round": round_name}
+            self.issued.append({"label": config["label"], "words": _query_words(config["base"]), "round": round_name})
+            future.add_done_callback(self._on_done)
+            incr("serp_searches", round=round_name, outcome="issued")
+            issued += 1
+        self._last_submit = time.perf_counter()
+        return issued
+
+    def wait(self, round_name: Optional[str] = None) -> bool:
+        """Block until the round's searches (or all) finish or the deadline passes; True if all finished"""
+        futures = [f for f, c in self._futures.items() if round_name is None or c["round"] == round_name]
+        remaining = self._last_submit + self.deadline - time.perf_counter()
+        _, not_done = wait(futures, timeout=max(0.0, remaining))
+        return not not_done
+
+    def results(self, n: Optional[int] = None, round_name: Optional[str] = None) -> List[Dict[str, str]]:
+        """Merged, deduplicated and score-sorted results of the searches finished so far"""
+        reporter = get_reporter()
+        all_results = []
+        seen_urls = set()
+        with self._lock:
+            done = list(self._done_order)
+        for future in done:
+            config = self._futures[future]
+            if round_name is not None and config["round"] != round_name:
+                continue
+            try:
+                items = future.result()
+            except Exception as e:
+                if round_name is None:
+                    reporter.warning(f"Search {config['label']} failed: {str(e)}")
+                continue
+
+            for item in items:
+                link = item.get("link")
+                title = item.get("title") or ""
+                snippet = item.get("snippet") or ""
+
+                # Mirrors (www/AMP/tracking variants) share one canonical URL
+                key = canonical_url(link) if link else None
+                if link and key not in seen_urls:
+                    all_results.append({
+                        "title": title,
+                        "url": link,
+                        "snippet": snippet,
+                        "score": _score_result(title, snippet, link),
+                        "source": config["label"]
+                    })
+                    seen_urls.add(key)
+
+        # Sort by score and return top results
+        all_results.sort(key=lambda x: x.get("score", 0), reverse=True)
+        return all_results[:n] if n is not None else all_results
+
+    def close(self) -> None:
+        pending = [c["label"] for f, c in self._futures.items() if not f.done()]
+        if pending:
+            get_reporter().warning(f"Search deadline of {self.deadline:.0f}s reached; skipped: {', '.join(pending)}")
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def report_serp_cache() -> None:
+    cache = get_serp_cache()
+    if cache is not None:
+        stats = cache.stats()
+        get_reporter().caption(f"♻️ SERP cache: {stats['hits']} hits / {stats['hits'] + stats['misses']} lookups ({stats['hit_ratio']:.0%})")
+
+
+def new_search_batch() -> Optional[SearchBatch]:
+    """A SearchBatch, or None (after reporting it) when there is no API key and no offline replay"""
+    api_key = os.getenv("SERPAPI_API_KEY")
+    if not api_key and not _offline_replay():
+        get_reporter().error("⚠️ SERPAPI_API_KEY not found!")
+        return None
+    return SearchBatch(api_key, min_novelty=float(os.getenv("SEARCH_DEDUP_JACCARD", "0.8")))
+
+
+def serpapi_multi_search(queries: Dict[str, str], n: int = 15) -> List[Dict[str, str]]:
+    """Perform multiple searches targeting different sources concurrently"""
+    batch = new_search_batch()
+    if batch is None:
+        return []
+    batch.submit(queries)
+    try:
+        batch.wait()
+        results = batch.results(n)
+    finally:
+        batch.close()
+    report_serp_cache()
+    return results
 
 
 def serpapi_search(query: str, enhanced_query: str, n: int = 10) -> List[Dict[str, str]]:
+    reporter = get_reporter()
     api_key = os.getenv("SERPAPI_API_KEY")
-    if not api_key:
-        st.error("⚠️ SERPAPI_API_KEY not found in environment variables!")
+    if not api_key and not _offline_replay():
+        reporter.error("⚠️ SERPAPI_API_KEY not found in environment variables!")
         return []
     
     results: List[Dict[str, str]] = []
@@ -117,19 +282,16 @@ def serpapi_search(query: str, enhanced_query: str, n: int = 10) -> List[Dict[st
             "api_key": api_key,
             "num": min(n, 10),
         }
-        r = requests.get("https://serpapi.com/search.json", params=params, timeout=20)
-        if r.status_code == 200:
-            data = r.json()
-            for item in data.get("organic_results", []) or []:
-                link = item.get("link")
-                title = item.get("title") or ""
-                snippet = item.get("snippet") or ""
-                if link:
-                    results.append({"title": title, "url": link, "snippet": snippet})
-                if len(results) >= n:
-                    break
+        for item in _fetch_serp(params, timeout=20):
+            link = item.get("link")
+            title = item.get("title") or ""
+            snippet = item.get("snippet") or ""
+            if link:
+                results.append({"title": title, "url": link, "snippet": snippet})
+            if len(results) >= n:
+                break
     except Exception as e:
-        st.error(f"Search error: {str(e)}")
+        reporter.error(f"Search error: {str(e)}")
         return []
     
     return results[:n]
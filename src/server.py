@@ -0,0 +1,201 @@
+"""Async HTTP API for serving many concurrent analysts from one process.
+
+Identical queries that arrive while one is running share that run. Every run embeds through the
+shared micro-batcher (EMBED_BATCHER, on by default here). Admission control bounds the runs
+executing (--max-inflight) and waiting (--max-queue) and answers 503 beyond that. Per-stage
+limits cap concurrent search / crawl / rank / LLM work across all runs, as in the batch runner.
+
+Usage: python -m src.server [--host 127.0.0.1] [--port 8000] [--max-inflight 8] [--max-queue 32]
+
+    POST /analyze  {"query": "...", "refresh": false}  -> ranked cases, analysis and report
+    GET  /health                                        -> load, coalescing and batcher stats
+    GET  /metrics                                       -> Prometheus text
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from src.graph import build_graph
+from src.progress import CallbackReporter, use_reporter
+from src.metrics import RunMetrics, get_registry, use_metrics, incr
+from src.report import build_report
+from src.startup import warm_up_models, warm_up_status
+from src.analysis.analysis_cache import normalize_query
+from src.utils.utils import get_embed_batcher
+
+DOC_FIELDS = ("url", "title", "source", "score", "similarity", "full_fetch")
+
+
+class Overloaded(Exception):
+    """Raised when a new run would exceed max_inflight + max_queue"""
+
+
+def _doc_summary(doc: Dict[str, Any]) -> Dict[str, Any]:
+    summary = {k: doc.get(k) for k in DOC_FIELDS}
+    summary["amounts_awarded"] = list(dict.fromkeys(a["amount"] for a in doc.get("amounts", []) if a["kind"] == "award"))[:5]
+    return summary
+
+
+class AnalysisService:
+    """Runs the graph in a bounded thread pool, sharing one run between identical queries"""
+
+    def __init__(self, graph, max_inflight: int = 8, max_queue: int = 32):
+        self.graph = graph
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.counts = {"runs": 0, "coalesced": 0, "rejected": 0}
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_inflight), thread_name_prefix="run")
+        self._runs: Dict[str, asyncio.Future] = {}
+
+    def _run(self, query: str, refresh: bool) -> Dict[str, Any]:
+        stages: Dict[str, Dict[str, float]] = {}
+
+        def on_event(event: Dict[str, Any]) -> None:
+            if event["type"] == "timing":
+                stages[event["stage"]] = {"seconds": round(event["seconds"], 3), "waited": round(event["waited"], 3)}
+
+        metrics = RunMetrics()
+        t0 = time.perf_counter()
+        state: Dict[str, Any] = {}
+        error: Optional[str] = None
+        with use_reporter(CallbackReporter(on_event)), use_metrics(metrics):
+            try:
+                state = self.graph.invoke({"query": query, "refresh_analysis": refresh})
+                error = state.get("error")
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+
+        ranked = state.get("ranked", [])
+        llm_response = state.get("llm_response", "")
+        return {
+            "query": query,
+            "error": error,
+            "ranked": [_doc_summary(d) for d in ranked],
+            "llm_response": llm_response,
+            "amount_estimate": state.get("amount_estimate"),
+            "analysis_cache": state.get("analysis_cache"),
+            "report": build_report(query, ranked, llm_response, state.get("amount_estimate")) if ranked else "",
+            "total_seconds": round(time.perf_counter() - t0, 3),
+            "stages": stages,
+            "counters": metrics.counters,
+        }
+
+    async def analyze(self, query: str, refresh: bool = False) -> Tuple[Dict[str, Any], bool]:
+        """(result, coalesced); coalesced is True when the result came from another request's run"""
+        key = json.dumps([normalize_query(query), refresh])
+        run = self._runs.get(key)
+        if run is not None:
+            self.counts["coalesced"] += 1
+            return await asyncio.shield(run), True
+        if len(self._runs) >= self.max_inflight + self.max_queue:
+            self.counts["rejected"] += 1
+            raise Overloaded()
+
+        run = asyncio.get_running_loop().run_in_executor(self._pool, self._run, query, refresh)
+        self._runs[key] = run
+        run.add_done_callback(lambda _: self._runs.pop(key, None))
+        self.counts["runs"] += 1
+        # Shielded: a client disconnecting must not cancel a run other requests are waiting on
+        return await asyncio.shield(run), False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counts,
+            "admitted": len(self._runs),
+            "max_inflight": self.max_inflight,
+            "max_queue": self.max_queue,
+        }
+
+
+# ---------------------------
+# HTTP Handlers
+# ---------------------------
+
+def _json(data: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> web.Response:
+    return web.json_response(data, status=status, headers=headers,
+                             dumps=lambda o: json.dumps(o, ensure_ascii=False, default=str))
+
+
+async def handle_analyze(request: web.Request) -> web.Response:
+    service: AnalysisService = request.app["service"]
+    try:
+        body = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return _json({"error": "Body must be a JSON object"}, status=400)
+    query = body.get("query") if isinstance(body, dict) else None
+    if not isinstance(query, str) or not query.strip():
+        return _json({"error": "Missing 'query'"}, status=400)
+
+    try:
+        result, coalesced = await service.analyze(query.strip(), refresh=bool(body.get("refresh")))
+    except Overloaded:
+        incr("serve_requests", outcome="rejected")
+        return _json({"error": "Too many analyses in progress; retry shortly"}, status=503,
+                     headers={"Retry-After": "5"})
+    incr("serve_requests", outcome="coalesced" if coalesced else "run")
+    return _json({**result, "coalesced": coalesced})
+
+
+async def handle_health(request: web.Request) -> web.Response:
+    service: AnalysisService = request.app["service"]
+    batcher = get_embed_batcher()
+    return _json({
+        "status": "ok",
+        "service": service.stats(),
+        "warm_up": warm_up_status()["state"],
+        "embed_batcher": batcher.stats() if batcher else None,
+    })
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(text=get_registry().prometheus_text(), content_type="text/plain")
+
+
+def create_app(service: AnalysisService) -> web.Application:
+    app = web.Application()
+    app["service"] = service
+    app.router.add_post("/analyze", handle_analyze)
+    app.router.add_get("/health", handle_health)
+    app.router.add_get("/metrics", handle_metrics)
+    return app
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve arbitration analyses over HTTP")
+    parser.add_argument("--host", default=os.getenv("SERVE_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVE_PORT", "8000")))
+    parser.add_argument("--max-inflight", type=int, default=8, help="Graph runs executing at once")
+    parser.add_argument("--max-queue", type=int, default=32, help="Runs waiting for a slot before 503s")
+    parser.add_argument("--search-limit", type=int, default=4, help="Concurrent search stages (network-bound)")
+    parser.add_argument("--crawl-limit", type=int, default=4, help="Concurrent crawl stages (network-bound)")
+    parser.add_argument("--rank-limit", type=int, default=4,
+                        help="Concurrent rank stages (their embeddings merge in the shared batcher)")
+    parser.add_argument("--llm-limit", type=int, default=2, help="Concurrent Groq calls (rate-limited)")
+    parser.add_argument("--mode", choices=["staged", "streaming"], default=None)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("EMBED_BATCHER", "1")
+    warm_up_models(background=True, graph=False)
+    graph = build_graph(args.mode, stage_limits={
+        "search": args.search_limit,
+        "crawl": args.crawl_limit,
+        "rank": args.rank_limit,
+        "crawl_rank": args.crawl_limit,
+        "llm_analysis": args.llm_limit,
+    })
+    service = AnalysisService(graph, max_inflight=args.max_inflight, max_queue=args.max_queue)
+    print(f"Serving on http://{args.host}:{args.port} (max {args.max_inflight} runs, "
+          f"{args.max_queue} queued)", file=sys.stderr)
+    web.run_app(create_app(service), host=args.host, port=args.port, print=None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
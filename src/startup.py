@@ -0,0 +1,137 @@
+import os
+import time
+import importlib
+import threading
+from typing import Any, Dict, Optional
+
+from src.metrics import record_span
+
+# ---------------------------
+# Process Startup
+# ---------------------------
+# Everything here happens at most once per process: the compiled graph is shared by every
+# query, and the models are loaded (and run once) in a background thread while the UI renders.
+# Import, compile and warm-up times are kept for display in the app and batch logs.
+
+_timings: Dict[str, float] = {}
+_timings_lock = threading.Lock()
+
+
+def record_timing(name: str, seconds: float) -> None:
+    """Keep the first measurement of a startup step (later calls are warm no-ops)"""
+    with _timings_lock:
+        if name not in _timings:
+            _timings[name] = seconds
+            record_span(f"startup.{name}", seconds)
+
+
+def startup_timings() -> Dict[str, float]:
+    with _timings_lock:
+        return dict(_timings)
+
+
+def timed_import(module: str):
+    """Import a module, recording how long the first import took"""
+    t0 = time.perf_counter()
+    mod = importlib.import_module(module)
+    record_timing(f"import.{module}", time.perf_counter() - t0)
+    return mod
+
+
+# ---------------------------
+# Compiled Graph
+# ---------------------------
+
+_graphs: Dict[tuple, Any] = {}
+_graphs_lock = threading.Lock()
+
+
+def get_graph(mode: Optional[str] = None, retrieval: Optional[str] = None):
+    """Process-wide compiled graph for (mode, retrieval); compiled on first use"""
+    mode = mode or os.getenv("PIPELINE_MODE", "staged")
+    retrieval = retrieval or os.getenv("RETRIEVAL_MODE", "web")
+    key = (mode, retrieval)
+    with _graphs_lock:
+        if key not in _graphs:
+            build_graph = timed_import("src.graph").build_graph
+            t0 = time.perf_counter()
+            _graphs[key] = build_graph(mode=mode, retrieval=retrieval)
+            record_timing(f"compile_graph.{mode}.{retrieval}", time.perf_counter() - t0)
+        return _graphs[key]
+
+
+# ---------------------------
+# Model Warm-up
+# ---------------------------
+
+_warmup_thread: Optional[threading.Thread] = None
+_warmup_lock = threading.Lock()
+_warmup_errors: Dict[str, str] = {}
+
+
+def _warm_up(legal_bert: bool, ner: bool, graph: bool) -> None:
+    t0 = time.perf_counter()
+    if graph:
+        try:
+            get_graph()
+        except Exception as e:
+            _warmup_errors["graph"] = str(e)
+    for module in ("torch", "transformers"):
+        try:
+            timed_import(module)
+        except ImportError as e:
+            _warmup_errors[f"import.{module}"] = str(e)
+    # NER first: the search node needs it before ranking needs Legal-BERT
+    if ner:
+        from src.analysis.ner import warm_up_ner, get_ner_engine
+        t1 = time.perf_counter()
+        try:
+            warm_up_ner(background=False)
+            if get_ner_engine().load_error:
+                _warmup_errors["ner"] = get_ner_engine().load_error
+            record_timing("warm_up.ner", time.perf_counter() - t1)
+        except Exception as e:
+            _warmup_errors["ner"] = str(e)
+            print(f"Error warming up NER: {e}")
+    if legal_bert:
+        try:
+            from src.utils.utils import warm_up_legal_bert
+            t1 = time.perf_counter()
+            warm_up_legal_bert()
+            record_timing("warm_up.legal_bert", time.perf_counter() - t1)
+        except Exception as e:
+            _warmup_errors["legal_bert"] = str(e)
+            print(f"Error warming up Legal-BERT: {e}")
+    record_timing("warm_up.total", time.perf_counter() - t0)
+
+
+def warm_up_models(background: bool = True, legal_bert: Optional[bool] = None,
+                   ner: Optional[bool] = None, graph: bool = True) -> Optional[threading.Thread]:
+    """Compile the default graph (unless graph=False), then load and run both models once;
+    safe to call on every Streamlit rerun.
+
+    legal_bert / ner default to LEGAL_BERT_WARMUP / NER_WARMUP (both on).
+    """
+    global _warmup_thread
+    if legal_bert is None:
+        legal_bert = os.getenv("LEGAL_BERT_WARMUP", "1") == "1"
+    if ner is None:
+        ner = os.getenv("NER_WARMUP", "1") == "1"
+    if not (legal_bert or ner):
+        return None
+    if not background:
+        _warm_up(legal_bert, ner, graph)
+        return None
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=_warm_up, args=(legal_bert, ner, graph),
+                                              name="model-warmup", daemon=True)
+            _warmup_thread.start()
+        return _warmup_thread
+
+
+def warm_up_status() -> Dict[str, Any]:
+    """Warm-up state ("idle", "running" or "done"), timings so far and any load errors"""
+    thread = _warmup_thread
+    state = "idle" if thread is None else ("running" if thread.is_alive() else "done")
+    return {"state": state, "timings": startup_timings(), "errors": dict(_warmup_errors)}
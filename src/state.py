@@ -1,10 +1,18 @@
-from typing import TypedDict, List, Dict, Any, Optional
+from typing import TypedDict, List, Dict, Any, Iterator, Optional
 
 class WorkflowState(TypedDict, total=False):
     query: str
     enhanced_query: str
     search_results: List[Dict[str, str]]
+    prefetch_id: str  # speculative search: token for claiming pages prefetched during search
     docs: List[Dict[str, Any]]
+    local_docs: List[Dict[str, Any]]  # strong matches from the local case corpus
+    local_first: bool  # set by local_retrieve: the run adds its full-text docs to the corpus
     ranked: List[Dict[str, Any]]
+    amount_estimate: Dict[str, Any]  # low / median / high (INR), n_cases, basis; from extracted amounts
     llm_response: str
+    stream_analysis: bool  # input flag: return llm_stream instead of a finished llm_response
+    llm_stream: Iterator[str]
+    refresh_analysis: bool  # input flag: skip analysis cache lookups (fresh results are still stored)
+    analysis_cache: Dict[str, Any]  # set on a cache hit: level (exact|semantic), query, similarity, overlap, age
     error: Optional[str]
@@ -0,0 +1,140 @@
+import os
+import hashlib
+import numpy as np
+from typing import Optional
+
+# ---------------------------
+# Legal-BERT Inference Backends
+# ---------------------------
+# Each encoder maps a tokenizer batch to L2-normalised mean-pooled float32 vectors.
+#   torch: fp32 eager PyTorch (baseline)
+#   int8:  dynamic int8 quantisation of the Linear layers
+#   onnx:  ONNX Runtime graph exported once and cached on disk
+
+BACKENDS = ("torch", "int8", "onnx")
+
+
+def backend_name() -> str:
+    name = os.getenv("LEGAL_BERT_BACKEND", "torch")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LEGAL_BERT_BACKEND '{name}'. Choose from: {', '.join(BACKENDS)}")
+    return name
+
+
+def _thread_setting(var: str) -> Optional[int]:
+    value = os.getenv(var)
+    return int(value) if value else None
+
+
+def configure_torch_threads() -> None:
+    """Apply TORCH_NUM_THREADS / TORCH_INTEROP_THREADS (inter-op can only be set once per process)"""
+    import torch
+    intra = _thread_setting("TORCH_NUM_THREADS")
+    inter = _thread_setting("TORCH_INTEROP_THREADS")
+    if intra:
+        torch.set_num_threads(intra)
+    if inter:
+        try:
+            torch.set_num_interop_threads(inter)
+        except RuntimeError:
+            pass  # already started parallel work in this process
+
+
+def _l2_normalize(x: np.ndarray) -> np.ndarray:
+    return x / np.clip(np.linalg.norm(x, axis=1, keepdims=True), 1e-12, None)
+
+
+class TorchEncoder:
+    def __init__(self, model, quantize: bool = False, inplace: bool = False):
+        import torch
+        if quantize:
+            # In place when the caller has no further use for the fp32 weights: no second copy
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8,
+                                                        inplace=inplace)
+        self.model = model
+
+    def __call__(self, enc) -> np.ndarray:
+        import torch
+        with torch.no_grad():
+            out = self.model(**enc)
+            mask = enc["attention_mask"].unsqueeze(-1).expand(out.last_hidden_state.size()).float()
+            summed = (out.last_hidden_state * mask).sum(dim=1)
+            pooled = summed / torch.clamp(mask.sum(dim=1), min=1e-9)
+            pooled = torch.nn.functional.normalize(pooled, p=2, dim=1)
+        return pooled.cpu().numpy().astype(np.float32)
+
+
+def _weights_fingerprint(model) -> str:
+    """The hub revision the weights came from, or a hash of the weights themselves"""
+    revision = getattr(model.config, "_commit_hash", None)
+    if revision:
+        return revision
+    digest = hashlib.sha1()
+    for name, tensor in sorted(model.state_dict().items()):
+        digest.update(name.encode("utf-8"))
+        digest.update(tensor.detach().cpu().contiguous().numpy().tobytes())
+    return digest.hexdigest()
+
+
+class OnnxEncoder:
+    INPUTS = ("input_ids", "attention_mask", "token_type_ids")
+    OPSET = 14
+
+    def __init__(self, model, model_name: str):
+        import onnxruntime as ort
+        path = self._export(model, model_name)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        intra = _thread_setting("TORCH_NUM_THREADS")
+        inter = _thread_setting("TORCH_INTEROP_THREADS")
+        if intra:
+            options.intra_op_num_threads = intra
+        if inter:
+            options.inter_op_num_threads = inter
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    @classmethod
+    def _export(cls, model, model_name: str) -> str:
+        """Export to ONNX_CACHE_DIR once; later processes load the saved graph.
+
+        The file name carries the opset, torch version and weights fingerprint, so changing any
+        of them exports a fresh graph instead of reusing a stale one.
+        """
+        import torch
+        cache_dir = os.getenv("ONNX_CACHE_DIR", ".cache/onnx")
+        os.makedirs(cache_dir, exist_ok=True)
+        key = hashlib.sha1(f"{cls.OPSET}\0{torch.__version__}\0{_weights_fingerprint(model)}".encode("utf-8"))
+        path = os.path.join(cache_dir, f"{model_name.replace('/', '__')}-{key.hexdigest()[:12]}.onnx")
+        if os.path.exists(path):
+            return path
+        dummy = {name: torch.ones((1, 8), dtype=torch.long) for name in cls.INPUTS}
+        dynamic = {name: {0: "batch", 1: "sequence"} for name in cls.INPUTS}
+        dynamic["last_hidden_state"] = {0: "batch", 1: "sequence"}
+        tmp_path = path + ".tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                model, (dummy,), tmp_path,
+                input_names=list(cls.INPUTS),
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic,
+                opset_version=cls.OPSET,
+            )
+        os.replace(tmp_path, path)
+        return path
+
+    def __call__(self, enc) -> np.ndarray:
+        feeds = {name: enc[name].cpu().numpy() for name in self.INPUTS if name in self.input_names and name in enc}
+        hidden = self.session.run(["last_hidden_state"], feeds)[0]
+        mask = feeds["attention_mask"][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return _l2_normalize(pooled).astype(np.float32)
+
+
+def load_encoder(model, model_name: str, backend: Optional[str] = None, inplace: bool = False):
+    """`inplace` lets the int8 backend quantise `model` itself instead of a copy"""
+    backend = backend or backend_name()
+    configure_torch_threads()
+    if backend == "onnx":
+        return OnnxEncoder(model, model_name)
+    return TorchEncoder(model, quantize=(backend == "int8"), inplace=inplace)
@@ -0,0 +1,150 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.metrics import RunMetrics, get_run_metrics, use_metrics
+
+# ---------------------------
+# Dynamic Embedding Batcher
+# ---------------------------
+# Concurrent runs (Streamlit sessions, API requests, batch cases) each embed a handful of texts.
+# Submitting through one batcher lets a single worker thread merge whatever arrives within
+# max_wait into one forward pass, instead of every run padding and running its own small batch.
+
+
+class _Request:
+    def __init__(self, texts: List[str], max_length: int, batch_size: Optional[int]):
+        self.texts = texts
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.future: Future = Future()
+        self.submitted = time.perf_counter()
+        self.stats: Dict[str, Any] = {}
+        self.metrics: Optional[RunMetrics] = get_run_metrics()  # the caller's run, if any
+
+
+class EmbeddingBatcher:
+    """Merge embed requests into shared model calls.
+
+    `run(texts, max_length, batch_size)` is the model call. The worker takes the first waiting
+    request, keeps collecting for up to max_wait seconds or until max_texts texts are queued,
+    then runs each max_length group once (identical texts are embedded once) and hands every
+    caller its rows. The spans and counters of a shared call are copied into the metrics of
+    every run it served. A failing call fails only the requests it was serving, and a worker
+    that dies is replaced on the next submit.
+    """
+
+    def __init__(self, run: Callable[[List[str], int, Optional[int]], np.ndarray],
+                 max_wait: float = 0.01, max_texts: int = 64, micro_batch: int = 16,
+                 timeout: Optional[float] = 120.0):
+        self.run = run
+        self.max_wait = max_wait
+        self.max_texts = max_texts
+        self.micro_batch = micro_batch
+        self.timeout = timeout
+        self.counts = {"requests": 0, "batches": 0, "texts": 0, "failed": 0, "timeouts": 0, "restarts": 0}
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, texts: List[str], max_length: int,
+               batch_size: Optional[int] = None) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Queue texts and block until their vectors are ready; returns (vectors, batch stats).
+
+        Raises TimeoutError if the worker has not answered within `timeout` seconds.
+        """
+        req = _Request(list(texts), max_length, batch_size)
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                if self._thread is not None:
+                    self.counts["restarts"] += 1
+                self._thread = threading.Thread(target=self._work, name="embed-batcher", daemon=True)
+                self._thread.start()
+            self.counts["requests"] += 1
+        self._queue.put(req)
+        try:
+            vectors = req.future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # Still queued: the worker skips it. Already running: its result is dropped.
+            req.future.cancel()
+            with self._lock:
+                self.counts["timeouts"] += 1
+            raise TimeoutError(f"Embedding batcher did not answer within {self.timeout:g}s") from None
+        req.stats["waited"] = round(req.stats.pop("started") - req.submitted, 4)
+        return vectors, req.stats
+
+    def _collect(self) -> List[_Request]:
+        batch = [self._queue.get()]
+        n_texts = len(batch[0].texts)
+        deadline = time.perf_counter() + self.max_wait
+        while n_texts < self.max_texts:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                req = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(req)
+            n_texts += len(req.texts)
+        # Requests whose callers timed out are dropped; the rest can no longer be cancelled
+        return [req for req in batch if req.future.set_running_or_notify_cancel()]
+
+    def _work(self) -> None:
+        while True:
+            batch: List[_Request] = []
+            try:
+                batch = self._collect()
+                groups: Dict[int, List[_Request]] = {}
+                for req in batch:
+                    groups.setdefault(req.max_length, []).append(req)
+                for max_length, reqs in groups.items():
+                    self._run_group(max_length, reqs)
+            except BaseException as e:
+                self._fail(batch, e)
+                if not isinstance(e, Exception):
+                    raise
+
+    def _fail(self, reqs: List[_Request], error: BaseException) -> None:
+        failed = 0
+        for req in reqs:
+            if not req.future.done():
+                req.future.set_exception(error)
+                failed += 1
+        with self._lock:
+            self.counts["failed"] += failed
+
+    def _run_group(self, max_length: int, reqs: List[_Request]) -> None:
+        started = time.perf_counter()
+        try:
+            unique = list(dict.fromkeys(t for req in reqs for t in req.texts))
+            sizes = [req.batch_size for req in reqs if req.batch_size]
+            # Merged requests mix lengths, so length-bucketed micro-batches keep padding down
+            batch_size = max(sizes) if sizes else (self.micro_batch if len(reqs) > 1 else None)
+            shared = RunMetrics()
+            with use_metrics(shared):
+                vectors = self.run(unique, max_length, batch_size)
+            row = {t: i for i, t in enumerate(unique)}
+            results = [vectors[[row[t] for t in req.texts]] for req in reqs]
+        except Exception as e:
+            self._fail(reqs, e)
+            return
+        with self._lock:
+            self.counts["batches"] += 1
+            self.counts["texts"] += len(unique)
+        for req, result in zip(reqs, results):
+            if req.metrics is not None:
+                req.metrics.absorb(shared, parent="embed.batcher")
+            req.stats.update(started=started, merged_requests=len(reqs), merged_texts=len(unique))
+            req.future.set_result(result)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            counts = dict(self.counts)
+        counts["queued"] = self._queue.qsize()
+        counts["texts_per_batch"] = counts["texts"] / counts["batches"] if counts["batches"] else 0.0
+        return counts
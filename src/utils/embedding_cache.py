@@ -0,0 +1,286 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from src.utils.filelock import file_lock
+
+# ---------------------------
+# Persistent Embedding Cache
+# ---------------------------
+# Vectors live in a memory-mapped float32 matrix (vectors.f32). index.log is an append-only
+# journal of JSON records: {"dim", "capacity"} when the matrix is created or grown,
+# {"put", "slot"} when a key is written to a row, {"clear"} to drop everything. Replaying it
+# in order rebuilds the key -> slot map with recency order for LRU eviction. Several processes
+# can share one cache directory: writers hold an exclusive flock on .lock, and every call first
+# replays records the other processes appended since it last looked.
+
+LOG_FILE = "index.log"
+VECTORS_FILE = "vectors.f32"
+LOCK_FILE = ".lock"
+INITIAL_ROWS = 1024
+COMPACT_SLACK = 4096
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different copies share a key"""
+    return " ".join(text.split())
+
+
+def cache_key(text: str, model_name: str, max_length: int) -> str:
+    payload = f"{model_name}\0{max_length}\0{normalize_text(text)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Content-addressed on-disk store of embedding vectors with LRU eviction"""
+
+    def __init__(self, cache_dir: str, max_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._reset()
+        with file_lock(self._lock_path, exclusive=False):
+            self._sync()
+
+    # -- persistence --------------------------------------------------------
+
+    @property
+    def _log_path(self) -> str:
+        return os.path.join(self.cache_dir, LOG_FILE)
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.cache_dir, VECTORS_FILE)
+
+    @property
+    def _lock_path(self) -> str:
+        return os.path.join(self.cache_dir, LOCK_FILE)
+
+    def _reset(self) -> None:
+        self._dim: Optional[int] = None
+        self._capacity = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> slot, least recent first
+        self._slots: Dict[int, str] = {}
+        self._free: Set[int] = set()
+        self._matrix: Optional[np.memmap] = None
+        self._log_id: Optional[Tuple[int, int]] = None  # (device, inode) of the replayed log
+        self._log_offset = 0
+        self._log_records = 0
+        self._stale_log = False
+
+    def _sync(self) -> None:
+        """Replay journal records appended (by any process) since the last sync"""
+        try:
+            st = os.stat(self._log_path)
+        except FileNotFoundError:
+            if self._log_id is not None:
+                self._reset()
+            return
+        if (st.st_dev, st.st_ino) != self._log_id:
+            # First load, or another process compacted the journal: rebuild from the start
+            self._reset()
+            self._log_id = (st.st_dev, st.st_ino)
+        if st.st_size == self._log_offset:
+            return
+        with open(self._log_path, "rb") as f:
+            f.seek(self._log_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # a writer died mid-record; the next compaction drops it
+                self._log_offset += len(line)
+                self._log_records += 1
+                try:
+                    self._apply(json.loads(line))
+                except (ValueError, KeyError, TypeError):
+                    continue
+        if self._dim is not None and self._vectors_size() < self._capacity * self._dim * 4:
+            # Vector file lost or truncated behind the journal: start empty and let the next
+            # writer replace the journal
+            log_id = self._log_id
+            self._reset()
+            self._log_id = log_id
+            self._log_offset = st.st_size
+            self._stale_log = True
+
+    def _vectors_size(self) -> int:
+        try:
+            return os.path.getsize(self._vectors_path)
+        except OSError:
+            return 0
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        if "capacity" in record:
+            self._dim = int(record["dim"])
+            capacity = int(record["capacity"])
+            if capacity > self._capacity:
+                self._free.update(range(self._capacity, capacity))
+                self._capacity = capacity
+                self._matrix = None
+        elif "put" in record:
+            key, slot = record["put"], int(record["slot"])
+            previous = self._slots.get(slot)
+            if previous is not None and previous != key:
+                del self._entries[previous]  # evicted by the writer
+            old_slot = self._entries.pop(key, None)
+            if old_slot is not None and old_slot != slot:
+                del self._slots[old_slot]
+                self._free.add(old_slot)
+            self._entries[key] = slot
+            self._slots[slot] = key
+            self._free.discard(slot)
+        elif record.get("clear"):
+            self._entries.clear()
+            self._slots.clear()
+            self._free = set(range(self._capacity))
+
+    def _append(self, records: List[Dict[str, Any]]) -> None:
+        """Append records to the journal; callers hold the exclusive file lock and have synced"""
+        data = "".join(json.dumps(r) + "\n" for r in records).encode("utf-8")
+        with open(self._log_path, "ab") as f:
+            f.write(data)
+            self._log_offset = f.tell()
+        self._log_records += len(records)
+        if self._log_id is None:
+            st = os.stat(self._log_path)
+            self._log_id = (st.st_dev, st.st_ino)
+
+    def _compact(self) -> None:
+        """Rewrite the journal as one record per live entry once it is mostly superseded records"""
+        records = [{"dim": self._dim, "capacity": self._capacity}]
+        records += [{"put": k, "slot": s} for k, s in self._entries.items()]
+        tmp_path = self._log_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(r) + "\n" for r in records)
+        os.replace(tmp_path, self._log_path)
+        st = os.stat(self._log_path)
+        self._log_id = (st.st_dev, st.st_ino)
+        self._log_offset = st.st_size
+        self._log_records = len(records)
+
+    def _vectors(self) -> np.memmap:
+        if self._matrix is None:
+            self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r+",
+                                     shape=(self._capacity, self._dim))
+        return self._matrix
+
+    def _max_rows(self) -> int:
+        return max(1, self.max_bytes // (self._dim * 4))
+
+    def _grow(self, needed: int) -> None:
+        """Extend the backing file so at least `needed` rows fit, up to the size limit"""
+        new_capacity = min(max(needed, self._capacity * 2, INITIAL_ROWS), self._max_rows())
+        if new_capacity <= self._capacity:
+            return
+        if self._matrix is not None:
+            self._matrix.flush()
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(new_capacity * self._dim * 4)
+        record = {"dim": self._dim, "capacity": new_capacity}
+        self._apply(record)
+        self._append([record])
+
+    def _allocate_slot(self) -> int:
+        if not self._free:
+            self._grow(self._capacity + 1)
+        if not self._free:
+            # At the size limit: evict the least recently used entry
+            victim, slot = self._entries.popitem(last=False)
+            del self._slots[slot]
+            self._free.add(slot)
+            self.evictions += 1
+        return self._free.pop()
+
+    # -- public API -----------------------------------------------------------
+
+    def get_many(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        """Return a copy of the cached vector for each key, or None on a miss"""
+        out: List[Optional[np.ndarray]] = []
+        with self._lock, file_lock(self._lock_path, exclusive=False):
+            self._sync()
+            for key in keys:
+                slot = self._entries.get(key)
+                if slot is None:
+                    self.misses += 1
+                    out.append(None)
+                    continue
+                # Recency of reads is tracked per process; only writes reach the journal
+                self._entries.move_to_end(key)
+                self.hits += 1
+                out.append(np.array(self._vectors()[slot]))
+        return out
+
+    def put_many(self, keys: List[str], vectors: np.ndarray) -> None:
+        if not keys:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock, file_lock(self._lock_path):
+            self._sync()
+            if self._dim is None:
+                self._dim = int(vectors.shape[1])
+            elif vectors.shape[1] != self._dim:
+                return
+            if self._stale_log:
+                self._compact()
+                self._stale_log = False
+            records = []
+            for key, vec in zip(keys, vectors):
+                slot = self._entries.get(key)
+                if slot is None:
+                    slot = self._allocate_slot()
+                self._vectors()[slot] = vec
+                record = {"put": key, "slot": slot}
+                self._apply(record)
+                records.append(record)
+            self._vectors().flush()
+            self._append(records)
+            if self._log_records > 2 * len(self._entries) + COMPACT_SLACK:
+                self._compact()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "capacity": self._capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock, file_lock(self._lock_path):
+            self._sync()
+            record = {"clear": True}
+            self._apply(record)
+            self._append([record])
+
+    def dim(self) -> Optional[int]:
+        """Vector width of the stored rows, or None while the cache is empty"""
+        with self._lock:
+            return self._dim
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Process-wide cache; disabled by setting EMBED_CACHE_DIR to an empty string"""
+    global _cache
+    cache_dir = os.getenv("EMBED_CACHE_DIR", ".cache/embeddings")
+    if not cache_dir:
+        return None
+    with _cache_lock:
+        if _cache is None or _cache.cache_dir != cache_dir:
+            max_mb = float(os.getenv("EMBED_CACHE_MAX_MB", "256"))
+            _cache = EmbeddingCache(cache_dir, max_bytes=int(max_mb * 1024 * 1024))
+        return _cache
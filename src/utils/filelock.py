@@ -0,0 +1,28 @@
+import os
+from contextlib import contextmanager
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single-process use only
+    fcntl = None
+
+# ---------------------------
+# Cross-process File Locks
+# ---------------------------
+# On-disk caches shared by several processes (Streamlit workers, the batch runner, the HTTP
+# server) take an advisory flock on a sidecar file around every read-modify-write.
+
+
+@contextmanager
+def file_lock(path: str, exclusive: bool = True) -> Iterator[None]:
+    """Hold a shared or exclusive flock on `path` (created if missing) for the block"""
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+    finally:
+        os.close(fd)  # closing the descriptor releases the lock
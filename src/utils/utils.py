@@ -1,40 +1,186 @@
 import os
-import torch
+import threading
 import numpy as np
-import streamlit as st
+from typing import Optional
 from dotenv import load_dotenv
-from transformers import AutoTokenizer, AutoModel
+
+from src.utils.backends import backend_name, load_encoder
+from src.utils.embedding_cache import get_embedding_cache, cache_key
+from src.utils.batcher import EmbeddingBatcher
+from src.metrics import span, incr
 
 # ---------------------------
 # Environment & Caching
 # ---------------------------
 load_dotenv()
 
-@st.cache_resource(show_spinner=False)
-def get_legal_bert():
-    model_name = os.getenv("LEGAL_BERT_MODEL", "nlpaueb/legal-bert-base-uncased")
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModel.from_pretrained(model_name)
+def legal_bert_model_name() -> str:
+    return os.getenv("LEGAL_BERT_MODEL", "nlpaueb/legal-bert-base-uncased")
+
+
+def embedding_variant() -> str:
+    """Model plus backend: quantised / ONNX vectors drift slightly from fp32, so anything storing
+    vectors keeps each backend's apart"""
+    model_name = legal_bert_model_name()
+    if backend_name() != "torch":
+        model_name = f"{model_name}#{backend_name()}"
+    return model_name
+
+
+_legal_bert = None
+_legal_bert_lock = threading.Lock()
+
+
+def _load_model():
+    # Deferred: importing transformers (and torch) costs seconds at startup
+    from transformers import AutoModel
+    model = AutoModel.from_pretrained(legal_bert_model_name())
     model.eval()
-    return tokenizer, model
+    return model
+
+
+def get_legal_bert():
+    """Process-wide (tokenizer, model), loaded on first use"""
+    global _legal_bert
+    with _legal_bert_lock:
+        if _legal_bert is None:
+            from transformers import AutoTokenizer
+            tokenizer = AutoTokenizer.from_pretrained(legal_bert_model_name())
+            _legal_bert = (tokenizer, _load_model())
+        return _legal_bert
+
+
+_encoders = {}
+
+
+def get_encoder(backend: Optional[str] = None):
+    """Process-wide encoder for the selected inference backend (LEGAL_BERT_BACKEND)"""
+    backend = backend or backend_name()
+    _, model = get_legal_bert()
+    with _legal_bert_lock:
+        if backend not in _encoders:
+            int8 = _encoders.get("int8")
+            if int8 is not None and model is int8.model:
+                model = _load_model()  # the shared fp32 weights were quantised in place
+            # The first encoder built is int8: quantise the shared model in place so the fp32
+            # weights are not kept alongside the int8 ones for the life of the process
+            inplace = backend == "int8" and not _encoders
+            _encoders[backend] = load_encoder(model, legal_bert_model_name(), backend, inplace=inplace)
+        return _encoders[backend]
+
+
+def warm_up_legal_bert() -> None:
+    """Load the tokenizer, model and encoder, and run one tiny forward pass (bypassing the cache)"""
+    get_encoder()
+    _run_legal_bert(["Arbitration award dispute"], max_length=32)
+
+
+def _forward(enc) -> np.ndarray:
+    batch, seq_len = enc["input_ids"].shape
+    incr("embed_batches")
+    incr("embed_batch_texts", int(batch))
+    with span("embed.forward", batch_size=int(batch), seq_len=int(seq_len)):
+        return get_encoder()(enc)
+
+
+def _run_legal_bert(texts: list[str], max_length: int, batch_size: Optional[int] = None) -> np.ndarray:
+    tokenizer, _ = get_legal_bert()
+    if not batch_size or len(texts) <= batch_size:
+        enc = tokenizer(texts, padding=True, truncation=True, max_length=max_length, return_tensors="pt")
+        return _forward(enc)
+
+    # Length-bucketed micro-batches: sorting by token count keeps padding per batch small
+    enc = tokenizer(texts, truncation=True, max_length=max_length)
+    features = [{k: enc[k][i] for k in enc.keys()} for i in range(len(texts))]
+    order = sorted(range(len(texts)), key=lambda i: len(features[i]["input_ids"]))
+    out = np.zeros((len(texts), 0), dtype=np.float32)
+    for start in range(0, len(order), batch_size):
+        idx = order[start:start + batch_size]
+        batch = tokenizer.pad([features[i] for i in idx], padding=True, return_tensors="pt")
+        pooled = _forward(batch)
+        if out.shape[1] == 0:
+            out = np.zeros((len(texts), pooled.shape[1]), dtype=np.float32)
+        out[idx] = pooled
+    return out
+
+
+_batcher: Optional[EmbeddingBatcher] = None
+
+
+def get_embed_batcher() -> Optional[EmbeddingBatcher]:
+    """Process-wide batcher shared by concurrent runs; None unless EMBED_BATCHER=1"""
+    global _batcher
+    if os.getenv("EMBED_BATCHER", "0") != "1":
+        return None
+    with _legal_bert_lock:
+        if _batcher is None:
+            _batcher = EmbeddingBatcher(
+                _run_legal_bert,
+                max_wait=float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "10")) / 1000,
+                max_texts=int(os.getenv("EMBED_BATCH_MAX_TEXTS", "64")),
+                micro_batch=int(os.getenv("EMBED_BATCH_MICRO", "16")),
+                timeout=float(os.getenv("EMBED_BATCH_TIMEOUT", "120")) or None,
+            )
+        return _batcher
+
+
+def _infer(texts: list[str], max_length: int, batch_size: Optional[int]) -> np.ndarray:
+    """Run the model directly, or through the shared batcher when it is enabled"""
+    batcher = get_embed_batcher()
+    if batcher is None:
+        return _run_legal_bert(texts, max_length, batch_size)
+    with span("embed.batcher", texts=len(texts)) as attrs:
+        vectors, stats = batcher.submit(texts, max_length, batch_size)
+        attrs.update(stats)
+    return vectors
+
+
+def embed_texts(texts: list[str], max_length: int = 512, batch_size: Optional[int] = None) -> np.ndarray:
+    """Embed texts with Legal-BERT, running the model only on cache misses.
+
+    With batch_size set, misses are run in length-sorted micro-batches instead of one padded batch.
+    """
+    with span("embed", texts=len(texts)) as attrs:
+        return _embed_texts(texts, max_length, batch_size, attrs)
+
+
+def embedding_dim() -> int:
+    """Vector width, from the cache when it has rows so the model is not loaded just for this"""
+    cache = get_embedding_cache()
+    dim = cache.dim() if cache is not None else None
+    return dim or int(get_legal_bert()[1].config.hidden_size)
+
+
+def _embed_texts(texts: list[str], max_length: int, batch_size: Optional[int], attrs: dict) -> np.ndarray:
+    if not texts:
+        return np.zeros((0, embedding_dim()), dtype=np.float32)
+    cache = get_embedding_cache()
+    if cache is None:
+        attrs["cache_misses"] = len(texts)
+        return _infer(texts, max_length, batch_size)
 
+    keys = [cache_key(t, embedding_variant(), max_length) for t in texts]
+    vectors = cache.get_many(keys)
 
-def _mean_pool(last_hidden_state: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
-    mask = attention_mask.unsqueeze(-1).expand(last_hidden_state.size()).float()
-    masked = last_hidden_state * mask
-    summed = masked.sum(dim=1)
-    counts = torch.clamp(mask.sum(dim=1), min=1e-9)
-    return summed / counts
+    # Unique misses only: repeated texts in one call share a forward pass
+    miss_positions: dict[str, list[int]] = {}
+    for i, (key, vec) in enumerate(zip(keys, vectors)):
+        if vec is None:
+            miss_positions.setdefault(key, []).append(i)
 
+    attrs.update(cache_hits=sum(v is not None for v in vectors), cache_misses=len(miss_positions))
+    incr("embed_cache", attrs["cache_hits"], outcome="hit")
+    incr("embed_cache", len(miss_positions), outcome="miss")
+    if miss_positions:
+        miss_keys = list(miss_positions)
+        miss_texts = [texts[miss_positions[k][0]] for k in miss_keys]
+        fresh = _infer(miss_texts, max_length, batch_size)
+        cache.put_many(miss_keys, fresh)
+        for key, vec in zip(miss_keys, fresh):
+            for i in miss_positions[key]:
+                vectors[i] = vec
 
-def embed_texts(texts: list[str]) -> np.ndarray:
-    tokenizer, model = get_legal_bert()
-    enc = tokenizer(texts, padding=True, truncation=True, max_length=512, return_tensors="pt")
-    with torch.no_grad():
-        out = model(**enc)
-        pooled = _mean_pool(out.last_hidden_state, enc["attention_mask"])
-        pooled = torch.nn.functional.normalize(pooled, p=2, dim=1)
-    return pooled.cpu().numpy()
+    return np.stack(vectors).astype(np.float32)
 
 
 def cosine_sim(a: np.ndarray, b: np.ndarray) -> np.ndarray:
@@ -0,0 +1,83 @@
+import pytest
+
+from src.analysis.amounts import estimate_range, extract_amounts, format_inr, fx_rates
+
+
+def _summary(text):
+    return [(a["amount"], a["currency"], a["value_inr"], a["kind"]) for a in extract_amounts(text)]
+
+
+@pytest.fixture(autouse=True)
+def default_fx(monkeypatch):
+    monkeypatch.delenv("AMOUNT_FX", raising=False)
+
+
+@pytest.mark.parametrize("text, expected", [
+    # Indian digit grouping
+    ("The tribunal awarded Rs. 12,50,000 to the claimant.", ("Rs. 12,50,000", "INR", 1_250_000.0, "award")),
+    ("A sum of ₹ 1,00,00,000 is awarded.", ("₹ 1,00,00,000", "INR", 10_000_000.0, "award")),
+    # Rs. with a scale word
+    ("The claimant sought Rs. 2.5 lakh as costs.", ("Rs. 2.5 lakh", "INR", 250_000.0, "claim")),
+    # Foreign currency with a scale, converted at the default USD rate
+    ("The respondent shall pay $3.5 million.", ("$3.5 million", "USD", 3.5e6 * 83, "award")),
+    # Crore implies rupees without a symbol
+    ("Damages of 12 crore were granted.", ("12 crore", "INR", 1.2e8, "award")),
+])
+def test_amount_formats(text, expected):
+    assert _summary(text)[0] == expected
+
+
+def test_keyword_after_the_amount_claims_it():
+    assert _summary("INR 5 crore was awarded towards costs.") == [("INR 5 crore", "INR", 5e7, "award")]
+    assert _summary("USD 1.2 bn was sought by the respondent.")[0][3] == "claim"
+
+
+def test_sentence_boundary_resets_the_kind():
+    summary = _summary("The claimant claimed INR 10 crore. The tribunal awarded INR 4 crore.")
+    assert [(a, k) for a, _, _, k in summary] == [("INR 10 crore", "claim"), ("INR 4 crore", "award")]
+    # A keyword in the previous sentence does not reach across the full stop
+    assert _summary("The claimant claimed damages. Separately, INR 7 crore was paid.")[0][3] == "other"
+
+
+def test_keyword_too_far_before_the_amount_is_ignored():
+    filler = "the contract was performed over many months " * 5
+    assert _summary(f"The tribunal awarded costs to {filler}and INR 3 crore remains")[0][3] == "other"
+
+
+def test_plain_numbers_are_not_amounts():
+    assert extract_amounts("Clause 12.4 and Section 34 of the 1996 Act; 900 days of delay.") == []
+
+
+def test_malformed_fx_entries_are_skipped(monkeypatch, capsys):
+    monkeypatch.setenv("AMOUNT_FX", "USD=85,EUR=abc,=3,GBP=-1,JPY=0.55,,bogus")
+    rates = fx_rates()
+    assert rates["USD"] == 85 and rates["JPY"] == 0.55
+    assert rates["EUR"] == 90 and rates["GBP"] == 105  # defaults kept
+    assert "EUR=abc" in capsys.readouterr().out
+    assert _summary("The respondent shall pay $2 million.")[0][2] == 2e6 * 85
+
+
+def test_estimate_range_prefers_awarded_amounts_weighted_by_similarity():
+    docs = [
+        {"similarity": 0.9, "amounts": extract_amounts("The tribunal awarded INR 10 crore.")},
+        {"similarity": 0.9, "amounts": extract_amounts("The tribunal awarded INR 20 crore.")},
+        {"similarity": 0.1, "amounts": extract_amounts("The tribunal awarded INR 900 crore.")},
+        {"similarity": 0.9, "amounts": extract_amounts("The claimant claimed INR 5000 crore.")},
+    ]
+    estimate = estimate_range(docs)
+    assert estimate["basis"] == "awarded" and estimate["n_cases"] == 3
+    assert 1e8 <= estimate["low"] <= estimate["median"] <= estimate["high"]
+    assert estimate["median"] < 9e9
+
+
+def test_estimate_range_falls_back_to_all_amounts():
+    docs = [{"similarity": 0.5, "amounts": extract_amounts("The claimant claimed INR 10 crore.")}]
+    estimate = estimate_range(docs)
+    assert estimate["basis"] == "all" and estimate["median"] == 1e8
+    assert estimate_range([{"amounts": []}]) is None
+
+
+def test_format_inr():
+    assert format_inr(1.5e7) == "₹1.50 crore"
+    assert format_inr(2.5e5) == "₹2.50 lakh"
+    assert format_inr(999) == "₹999"
@@ -0,0 +1,53 @@
+import time
+
+import numpy as np
+import pytest
+
+from src.analysis.analysis_cache import AnalysisCache, exact_key, normalize_query
+
+DOCS = [{"url": f"https://example.com/case/{i}"} for i in range(5)]
+
+
+def _set_time(cache, table, column, value):
+    with cache._lock:
+        cache._conn.execute(f"UPDATE {table} SET {column} = ?", (value,))
+        cache._conn.commit()
+
+
+def _vec(*values):
+    return np.array(values, dtype=np.float32)
+
+
+def test_analysis_exact_hit_ignores_query_case_and_doc_order(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "analysis.sqlite3"))
+    cache.put("Delay damages in EPC", DOCS, "analysis")
+    hit = cache.lookup("  delay DAMAGES in epc ", list(reversed(DOCS)), embed=lambda: pytest.fail("embedded"))
+    assert hit["level"] == "exact" and hit["response"] == "analysis"
+    assert normalize_query("  A  b ") == "a b"
+    assert exact_key("q", ["u"], "v") != exact_key("q", ["u"], "w")
+
+
+def test_analysis_semantic_hit_needs_similarity_and_overlap(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "analysis.sqlite3"), min_similarity=0.95, min_overlap=0.8)
+    cache.put("delay damages", DOCS, "analysis", query_vec=_vec(1, 0, 0))
+    near = cache.lookup("damages for delay", DOCS[:4] + [{"url": "https://other/x"}], embed=lambda: _vec(1, 0.1, 0))
+    assert near["level"] == "semantic" and near["overlap"] == 0.8
+    assert cache.lookup("damages for delay", DOCS[:2], embed=lambda: _vec(1, 0, 0)) is None
+    assert cache.lookup("jurisdiction", DOCS, embed=lambda: _vec(0, 1, 0)) is None
+
+
+def test_analysis_cache_ttl_and_lru_cap(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "analysis.sqlite3"), ttl_seconds=60, max_entries=2)
+    cache.put("q1", DOCS, "r1")
+    _set_time(cache, "analysis_cache", "created_at", time.time() - 120)
+    assert cache.lookup("q1", DOCS, embed=lambda: _vec(1)) is None
+
+    cache.put("q2", DOCS, "r2")  # also purges the expired q1
+    assert cache.stats()["entries"] == 1
+    cache.put("q3", DOCS, "r3")
+    time.sleep(0.002)
+    assert cache.lookup("q2", DOCS, embed=lambda: _vec(1))["response"] == "r2"  # q3 is now least recent
+    time.sleep(0.002)
+    cache.put("q4", DOCS, "r4")
+    assert cache.lookup("q3", DOCS, embed=lambda: _vec(1)) is None
+    assert cache.lookup("q2", DOCS, embed=lambda: _vec(1)) is not None
@@ -0,0 +1,129 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from src.metrics import RunMetrics, incr, span, use_metrics
+from src.utils.batcher import EmbeddingBatcher
+
+
+def _fake_model(calls):
+    def run(texts, max_length, batch_size):
+        calls.append(list(texts))
+        incr("embed_batches")
+        with span("embed.forward", batch_size=len(texts)):
+            return np.array([[float(len(t)), float(max_length)] for t in texts], dtype=np.float32)
+    return run
+
+
+def _submit_concurrently(batcher, payloads):
+    results = [None] * len(payloads)
+
+    def worker(i, texts):
+        try:
+            results[i] = batcher.submit(texts, 32)[0]
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i, p)) for i, p in enumerate(payloads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_merges_concurrent_requests_and_returns_each_callers_rows():
+    calls = []
+    batcher = EmbeddingBatcher(_fake_model(calls), max_wait=0.2)
+    payloads = [["a" * (i + 1), "shared"] for i in range(6)]
+    results = _submit_concurrently(batcher, payloads)
+    assert len(calls) < len(payloads)
+    for texts, vectors in zip(payloads, results):
+        assert vectors[:, 0].tolist() == [len(t) for t in texts]
+    assert sum(len(c) for c in calls) == len({t for p in payloads for t in p})
+
+
+def test_model_failure_fails_only_that_batch():
+    fail = {"on": True}
+
+    def run(texts, max_length, batch_size):
+        if fail["on"]:
+            raise RuntimeError("model crashed")
+        return np.zeros((len(texts), 2), dtype=np.float32)
+
+    batcher = EmbeddingBatcher(run, max_wait=0.0)
+    with pytest.raises(RuntimeError, match="model crashed"):
+        batcher.submit(["x"], 32)
+    fail["on"] = False
+    vectors, _ = batcher.submit(["x", "y"], 32)
+    assert vectors.shape == (2, 2)
+    assert batcher.stats()["failed"] == 1
+
+
+def test_bad_model_output_does_not_kill_the_worker():
+    outputs = [np.zeros((0, 2), dtype=np.float32), np.ones((1, 2), dtype=np.float32)]
+    batcher = EmbeddingBatcher(lambda texts, m, b: outputs.pop(0), max_wait=0.0)
+    with pytest.raises(IndexError):
+        batcher.submit(["x"], 32)
+    assert batcher.submit(["x"], 32)[0].tolist() == [[1.0, 1.0]]
+
+
+def test_malformed_queue_entry_does_not_kill_the_worker():
+    batcher = EmbeddingBatcher(lambda texts, m, b: np.zeros((len(texts), 2), dtype=np.float32), max_wait=0.0)
+    batcher.submit(["x"], 32)
+    batcher._queue.put(None)
+    assert batcher.submit(["y"], 32)[0].shape == (1, 2)
+    assert batcher.stats()["restarts"] == 0
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_dead_worker_is_restarted():
+    exits = [True]
+
+    def run(texts, max_length, batch_size):
+        if exits and exits.pop():
+            raise SystemExit()  # not an Exception: the worker thread ends
+        return np.zeros((len(texts), 2), dtype=np.float32)
+
+    batcher = EmbeddingBatcher(run, max_wait=0.0)
+    with pytest.raises(SystemExit):
+        batcher.submit(["x"], 32)
+    batcher._thread.join(timeout=2)
+    assert not batcher._thread.is_alive()
+    assert batcher.submit(["y"], 32)[0].shape == (1, 2)
+    assert batcher.stats()["restarts"] == 1
+
+
+def test_submit_times_out():
+    release = threading.Event()
+
+    def slow(texts, max_length, batch_size):
+        release.wait(5)
+        return np.zeros((len(texts), 2), dtype=np.float32)
+
+    batcher = EmbeddingBatcher(slow, max_wait=0.0, timeout=0.1)
+    with pytest.raises(TimeoutError):
+        batcher.submit(["x"], 32)
+    release.set()
+    assert batcher.stats()["timeouts"] == 1
+
+
+def test_shared_work_is_recorded_in_each_callers_metrics():
+    batcher = EmbeddingBatcher(_fake_model([]), max_wait=0.2)
+    runs = [RunMetrics(), RunMetrics()]
+
+    def worker(run, text):
+        with use_metrics(run):
+            batcher.submit([text], 32)
+
+    threads = [threading.Thread(target=worker, args=(run, t)) for run, t in zip(runs, ["a", "b"])]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for run in runs:
+        assert run.counters.get("embed_batches", 0) >= 1
+        forward = run.spans_named("embed.forward")
+        assert forward and all(s["parent"] == "embed.batcher" for s in forward)
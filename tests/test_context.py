@@ -0,0 +1,47 @@
+import re
+
+from src.analysis.context import build_context, estimate_tokens
+
+FILLER = "The parties exchanged pleadings and the hearing was adjourned on several occasions. " * 12
+
+
+def _doc(title, text, similarity=0.5, **extra):
+    return {"title": title, "url": f"https://example.com/{title}", "text": text, "similarity": similarity, **extra}
+
+
+def test_labels_passages_under_case_headers():
+    docs = [_doc("alpha", "Delay damages were awarded to the contractor."),
+            _doc("beta", "The tribunal rejected the delay claim.")]
+    context, n_cases = build_context("delay damages", docs, token_budget=1000)
+    assert n_cases == 2
+    assert context.index("### CASE 1") < context.index("[C1-P1]") < context.index("### CASE 2")
+    assert "**Source**: https://example.com/beta" in context
+    assert context.count("---") == 2
+
+
+def test_respects_token_budget_and_prefers_amounts_and_operative_text():
+    text = (FILLER + "The respondent shall pay INR 12 crore with interest at 9% per annum. " + FILLER)
+    docs = [_doc("alpha", text)]
+    context, _ = build_context("compensation", docs, token_budget=200, passage_chars=400)
+    assert estimate_tokens(context) <= 200 + 20
+    assert "INR 12 crore" in context
+    assert len(re.findall(r"\[C1-P\d+\]", context)) < 4
+
+
+def test_reuses_passage_scores_from_the_ranker():
+    text = "First passage about costs. Second passage about jurisdiction."
+    doc = _doc("alpha", text, passage_scores=[{"start": 0, "end": 26, "score": 0.1},
+                                              {"start": 27, "end": len(text), "score": 0.9}])
+    header = "\n### CASE 1 (Relevance: 50.0%)\n**Title**: alpha\n**Source**: https://example.com/alpha\n"
+    budget = estimate_tokens(header) + estimate_tokens("Second passage about jurisdiction.") + 6
+    context, _ = build_context("costs", [doc], token_budget=budget)
+    assert "[C1-P2] Second passage about jurisdiction." in context
+    assert "First passage" not in context
+
+
+def test_caps_cases_and_handles_empty_input():
+    docs = [_doc(f"case{i}", f"Award number {i} of INR {i} crore.") for i in range(5)]
+    context, n_cases = build_context("award", docs, token_budget=10000, max_cases=3)
+    assert n_cases == 3 and "CASE 4" not in context
+    assert build_context("award", []) == ("", 0)
+    assert build_context("award", [_doc("empty", "")]) == ("", 0)
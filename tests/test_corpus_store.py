@@ -0,0 +1,146 @@
+import json
+import multiprocessing as mp
+
+import numpy as np
+import pytest
+
+from src.corpus.store import CaseCorpus
+
+
+def _doc(url: str, text: str = "award text") -> dict:
+    return {"url": url, "title": url, "text": text, "source": "test", "score": 1.0}
+
+
+def _vec(seed: int, dim: int = 4) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=(1, dim)).astype(np.float32)
+
+
+def _writer(corpus_dir: str, base: int) -> None:
+    corpus = CaseCorpus(corpus_dir)
+    for i in range(20):
+        corpus.add([_doc(f"https://x/{base}/{i}")], _vec(base * 100 + i))
+
+
+def test_add_search_and_skip_unchanged(tmp_path):
+    corpus = CaseCorpus(str(tmp_path))
+    vec = _vec(1)
+    assert corpus.add([_doc("https://a")], vec) == 1
+    assert corpus.add([_doc("https://a")], vec) == 0
+    assert corpus.add([_doc("https://a", "revised")], vec) == 1
+    assert len(corpus) == 1
+
+    hits = corpus.search(vec[0], k=5)
+    assert len(hits) == 1
+    doc, sim = hits[0]
+    assert doc["text"] == "revised" and doc["row"] == 1 and sim > 0.99
+
+
+def test_picks_up_rows_from_other_instances(tmp_path):
+    first = CaseCorpus(str(tmp_path))
+    second = CaseCorpus(str(tmp_path))
+    first.add([_doc("https://a")], _vec(1))
+    second.add([_doc("https://b")], _vec(2))
+    assert len(first) == 2
+    assert first.search(_vec(2)[0], k=1)[0][0]["url"] == "https://b"
+
+
+def test_open_does_not_truncate_live_appends(tmp_path):
+    writer = CaseCorpus(str(tmp_path))
+    writer.add([_doc("https://a")], _vec(1))
+    CaseCorpus(str(tmp_path))  # a second process starting up
+    writer.add([_doc("https://b")], _vec(2))
+    assert len(CaseCorpus(str(tmp_path))) == 2
+
+
+def test_trims_crash_residue(tmp_path):
+    corpus = CaseCorpus(str(tmp_path))
+    corpus.add([_doc("https://a")], _vec(1))
+    # Vector written but the process died before its docs line
+    with open(tmp_path / "vectors.f32", "ab") as f:
+        f.write(_vec(2).tobytes())
+    reopened = CaseCorpus(str(tmp_path))
+    assert len(reopened) == 1
+    assert (tmp_path / "vectors.f32").stat().st_size == 4 * 4
+    reopened.add([_doc("https://b")], _vec(3))
+    rows = [json.loads(line)["row"] for line in open(tmp_path / "docs.jsonl")]
+    assert rows == [0, 1]
+
+
+def test_concurrent_processes_keep_rows_aligned(tmp_path):
+    procs = [mp.get_context("spawn").Process(target=_writer, args=(str(tmp_path), b)) for b in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    corpus = CaseCorpus(str(tmp_path))
+    assert len(corpus) == 60
+    for b, i in [(0, 0), (1, 7), (2, 19)]:
+        doc, sim = corpus.search(_vec(b * 100 + i)[0], k=1)[0]
+        assert doc["url"] == f"https://x/{b}/{i}" and sim > 0.99
+
+
+def test_refuses_vectors_from_another_backend(tmp_path, monkeypatch):
+    corpus = CaseCorpus(str(tmp_path), "legal-bert#int8")
+    corpus.add([_doc("https://a")], _vec(1))
+    with open(tmp_path / "meta.json") as f:
+        assert json.load(f) == {"dim": 4, "variant": "legal-bert#int8", "generation": 0}
+    assert len(CaseCorpus(str(tmp_path), "legal-bert#int8")) == 1
+    with pytest.raises(ValueError, match="int8"):
+        CaseCorpus(str(tmp_path), "legal-bert#onnx")
+
+    import src.corpus.store as store
+    monkeypatch.setenv("CORPUS_DIR", str(tmp_path))
+    monkeypatch.setenv("LEGAL_BERT_BACKEND", "onnx")
+    monkeypatch.setattr(store, "_corpus", None)
+    monkeypatch.setattr(store, "_refused", None)
+    assert store.get_case_corpus() is None
+    monkeypatch.setattr(store, "embedding_variant", lambda: "legal-bert#int8")
+    assert len(store.get_case_corpus()) == 1
+
+
+def test_compacts_to_the_newest_docs_past_max_docs(tmp_path):
+    corpus = CaseCorpus(str(tmp_path), max_docs=4)
+    other = CaseCorpus(str(tmp_path), max_docs=4)
+    for i in range(6):
+        corpus.add([_doc(f"https://x/{i}")], _vec(i))
+    assert len(corpus) == 4 and corpus.evicted == 2
+    assert not (tmp_path / "docs.jsonl").exists()
+    assert json.load(open(tmp_path / "meta.json"))["generation"] == 1
+
+    # Another instance follows the new generation and keeps appending to it
+    assert other.contains("https://x/5", "award text")
+    assert not other.contains("https://x/0", "award text")
+    other.add([_doc("https://x/6")], _vec(6))
+    assert len(corpus) == 5
+    doc, sim = corpus.search(_vec(3)[0], k=1)[0]
+    assert doc["url"] == "https://x/3" and sim > 0.99
+
+
+def test_remember_docs_reuses_ranker_vectors_and_is_opt_in(tmp_path, monkeypatch):
+    import src.corpus.retrieval as retrieval
+    corpus = CaseCorpus(str(tmp_path))
+    monkeypatch.setattr(retrieval, "get_case_corpus", lambda: corpus)
+    monkeypatch.setattr(retrieval, "embed_texts", lambda texts: pytest.fail("re-embedded"))
+    monkeypatch.delenv("CORPUS_WRITE", raising=False)
+    docs = [{**_doc("https://a"), "full_fetch": True, "doc_vector": _vec(1)[0]},
+            {**_doc("https://b"), "full_fetch": False, "doc_vector": _vec(2)[0]}]
+
+    assert retrieval.remember_docs({}, docs) == 0
+    assert retrieval.remember_docs({"local_first": True}, docs) == 1
+    monkeypatch.setenv("CORPUS_WRITE", "0")
+    assert retrieval.remember_docs({"local_first": True}, [{**docs[0], "url": "https://c"}]) == 0
+    monkeypatch.setenv("CORPUS_WRITE", "1")
+    assert retrieval.remember_docs({}, [{**docs[0], "url": "https://c"}]) == 1
+    assert len(corpus) == 2
+
+
+def test_unrecorded_variant_defaults_to_the_configured_model(tmp_path, monkeypatch):
+    CaseCorpus(str(tmp_path)).add([_doc("https://a")], _vec(1))
+    meta = json.load(open(tmp_path / "meta.json"))
+    del meta["variant"]
+    json.dump(meta, open(tmp_path / "meta.json", "w"))
+
+    monkeypatch.setenv("LEGAL_BERT_MODEL", "org/other-legal-model")
+    assert len(CaseCorpus(str(tmp_path), "org/other-legal-model")) == 1
+    with pytest.raises(ValueError):
+        CaseCorpus(str(tmp_path), "nlpaueb/legal-bert-base-uncased")
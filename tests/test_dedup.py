@@ -0,0 +1,57 @@
+import pytest
+
+from src.crawling.dedup import canonical_url, dedupe_docs, minhash_signature
+
+AWARD = " ".join(f"paragraph {i} the tribunal considered clause {i} of the contract and the delay of {i * 7} days"
+                 for i in range(30))
+
+
+@pytest.mark.parametrize("a, b", [
+    ("http://www.livelaw.in/news/award-upheld/", "https://livelaw.in/news/award-upheld"),
+    ("https://m.example.com/case?id=7&utm_source=x&fbclid=abc", "https://example.com/case?id=7"),
+    ("https://amp.example.com/news/amp/story", "https://example.com/news/story"),
+    ("https://example.com/story.amp.html", "https://example.com/story.html"),
+    ("https://example.com/a?b=2&a=1#section", "https://example.com/a?a=1&b=2"),
+    ("https://EXAMPLE.com", "https://example.com/"),
+])
+def test_mirrors_share_a_canonical_url(a, b):
+    assert canonical_url(a) == canonical_url(b)
+
+
+@pytest.mark.parametrize("a, b", [
+    ("https://example.com/case?id=7", "https://example.com/case?id=8"),
+    ("https://example.com/amplify", "https://example.com/ify"),
+    ("https://example.com/a", "https://other.com/a"),
+])
+def test_distinct_pages_stay_distinct(a, b):
+    assert canonical_url(a) != canonical_url(b)
+
+
+def test_unparseable_url_is_returned_as_is():
+    assert canonical_url("http://[::1") == "http://[::1"
+
+
+def test_minhash_skips_short_texts_and_matches_identical_ones():
+    assert minhash_signature("too short to compare") is None
+    assert (minhash_signature(AWARD) == minhash_signature(AWARD.upper())).all()
+
+
+def test_dedupe_keeps_richest_copy_and_records_duplicates():
+    docs = [
+        {"url": "https://a/1", "text": AWARD[:-40], "full_fetch": True, "score": 0.2},
+        {"url": "https://b/1", "text": AWARD, "full_fetch": True, "score": 0.9},
+        {"url": "https://c/1", "text": "Entirely different judgment text " * 10, "full_fetch": True, "score": 0.5},
+        {"url": "https://d/1", "text": "snippet", "full_fetch": False, "score": 0.1},
+    ]
+    kept = dedupe_docs(docs, threshold=0.8)
+    assert [d["url"] for d in kept] == ["https://b/1", "https://c/1", "https://d/1"]
+    assert kept[0]["duplicates"] == ["https://a/1"]
+    assert kept[0]["score"] == 0.9
+
+
+def test_dedupe_threshold():
+    other = " ".join(f"section {i} the respondent failed to pay invoice {i} within {i * 3} days" for i in range(30))
+    half = AWARD[:len(AWARD) // 2] + " " + other[len(other) // 2:]
+    docs = [{"url": "https://a", "text": AWARD}, {"url": "https://b", "text": half}]
+    assert len(dedupe_docs([dict(d) for d in docs], threshold=0.8)) == 2
+    assert len(dedupe_docs([dict(d) for d in docs], threshold=0.2)) == 1
@@ -0,0 +1,69 @@
+import multiprocessing as mp
+
+import numpy as np
+
+from src.utils.embedding_cache import EmbeddingCache
+
+
+def _row(value: float, dim: int = 8) -> np.ndarray:
+    return np.full((1, dim), value, dtype=np.float32)
+
+
+def _writer(cache_dir: str, base: int) -> None:
+    cache = EmbeddingCache(cache_dir)
+    for i in range(30):
+        cache.put_many([f"{base}-{i}"], _row(base * 100 + i))
+
+
+def test_round_trip_and_reload(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    cache.put_many(["a", "b"], np.vstack([_row(1), _row(2)]))
+    assert cache.get_many(["a", "missing"])[1] is None
+
+    reopened = EmbeddingCache(str(tmp_path))
+    a, b = reopened.get_many(["a", "b"])
+    assert a[0] == 1 and b[0] == 2
+    assert reopened.dim() == 8
+
+
+def test_lru_eviction_at_size_limit(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), max_bytes=4 * 8 * 3)
+    for key in "abc":
+        cache.put_many([key], _row(ord(key)))
+    cache.get_many(["a"])  # "b" is now least recently used
+    cache.put_many(["d"], _row(0))
+    assert cache.get_many(["b"]) == [None]
+    assert all(v is not None for v in cache.get_many(["a", "c", "d"]))
+    assert cache.stats()["evictions"] == 1
+
+
+def test_sees_writes_from_other_instances(tmp_path):
+    first = EmbeddingCache(str(tmp_path))
+    second = EmbeddingCache(str(tmp_path))
+    second.put_many(["k"], _row(7))
+    assert first.get_many(["k"])[0][0] == 7
+    first.clear()
+    assert second.get_many(["k"]) == [None]
+
+
+def test_concurrent_processes_do_not_clobber_rows(tmp_path):
+    procs = [mp.get_context("spawn").Process(target=_writer, args=(str(tmp_path), b)) for b in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    cache = EmbeddingCache(str(tmp_path))
+    keys = [f"{b}-{i}" for b in range(3) for i in range(30)]
+    values = cache.get_many(keys)
+    assert [v[0] for v in values] == [b * 100 + i for b in range(3) for i in range(30)]
+
+
+def test_compaction_keeps_live_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.utils.embedding_cache.COMPACT_SLACK", 4)
+    cache = EmbeddingCache(str(tmp_path))
+    for i in range(40):
+        cache.put_many([str(i % 3)], _row(i))
+    with open(tmp_path / "index.log") as f:
+        assert len(f.readlines()) < 20
+    reopened = EmbeddingCache(str(tmp_path))
+    assert [v[0] for v in reopened.get_many(["0", "1", "2"])] == [39, 37, 38]
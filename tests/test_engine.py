@@ -0,0 +1,57 @@
+import time
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.crawling.engine import CrawlerEngine
+
+PAGE = "<html><body><p>Award text.</p></body></html>"
+HITS = web.AppKey("hits", list)
+
+
+async def _hang(request):
+    await asyncio.sleep(5)
+    return web.Response(text=PAGE, content_type="text/html")
+
+
+async def _unavailable(request):
+    request.app[HITS].append(request.path)
+    return web.Response(status=503, headers={"Retry-After": "1"})
+
+
+async def _ok(request):
+    return web.Response(text=PAGE, content_type="text/html")
+
+
+async def _fetch_all(engine_kwargs, paths):
+    app = web.Application()
+    app[HITS] = []
+    app.router.add_get("/hang", _hang)
+    app.router.add_get("/unavailable", _unavailable)
+    app.router.add_get("/ok", _ok)
+    async with TestServer(app) as server:
+        async with CrawlerEngine(**engine_kwargs) as engine:
+            async def timed(path):
+                t0 = time.perf_counter()
+                item = await engine.fetch(str(server.make_url(path)))
+                return item, time.perf_counter() - t0
+            results = await asyncio.gather(*(timed(p) for p in paths))
+        return results, len(app[HITS])
+
+
+def test_timeouts_are_not_retried(monkeypatch):
+    monkeypatch.setenv("CRAWL_CACHE_PATH", "")
+    [(item, seconds)], _ = asyncio.run(_fetch_all({"timeout": 0.3, "retries": 2}, ["/hang"]))
+    assert "TimeoutError" in item["error"]
+    assert seconds < 1.0
+
+
+def test_backoff_releases_the_global_slot(monkeypatch):
+    monkeypatch.setenv("CRAWL_CACHE_PATH", "")
+    # One global slot: /ok only gets it because /unavailable sleeps its Retry-After outside it
+    results, hits = asyncio.run(_fetch_all({"max_concurrency": 1, "retries": 1, "timeout": 5},
+                                           ["/unavailable", "/ok"]))
+    (failed, failed_seconds), (ok, ok_seconds) = results
+    assert failed["status"] == 503 and hits == 2
+    assert ok["status"] == 200 and ok_seconds < 0.9 < failed_seconds
@@ -0,0 +1,71 @@
+import math
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from src.ranking.lexical import BM25Index, prefilter, tokenize
+
+DOCS = [
+    "The arbitral tribunal awarded damages for delay in the EPC contract.",
+    "Delay damages delay damages: the tribunal awarded liquidated damages for delay.",
+    "A petition under Section 34 challenging the award was dismissed by the High Court.",
+    "Construction contract dispute over extension of time and prolongation costs.",
+    "",
+    "The the the and of",  # only stopwords
+]
+
+
+def naive_bm25(texts, query, k1=1.5, b=0.75):
+    docs = [tokenize(t) for t in texts]
+    n = len(docs)
+    avg = sum(len(d) for d in docs) / n if n and sum(len(d) for d in docs) else 1.0
+    df = Counter(t for d in docs for t in set(d))
+    scores = []
+    for d in docs:
+        tf = Counter(d)
+        score = 0.0
+        for term in set(tokenize(query)):
+            if tf[term]:
+                idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+                score += idf * tf[term] * (k1 + 1) / (tf[term] + k1 * (1 - b + b * len(d) / avg))
+        scores.append(score)
+    return np.array(scores)
+
+
+@pytest.mark.parametrize("query", [
+    "delay damages",
+    "tribunal award petition",
+    "EPC contract extension of time",
+    "unrelated words only",
+    "the and of",
+])
+def test_scores_match_naive_bm25(query):
+    expected = naive_bm25(DOCS, query)
+    got = BM25Index(DOCS).scores(query)
+    np.testing.assert_allclose(got, expected, rtol=1e-5, atol=1e-6)
+    assert list(np.argsort(-got, kind="stable")) == list(np.argsort(-expected, kind="stable"))
+
+
+def test_term_frequency_saturates_and_long_docs_are_normalised():
+    index = BM25Index(["delay " * 2, "delay " * 20, "delay " + "filler " * 50])
+    s = index.scores("delay")
+    assert s[1] > s[0] > s[2]
+    assert s[1] < 2 * s[0]  # k1 saturation
+
+
+def test_empty_index():
+    assert BM25Index([]).scores("delay").shape == (0,)
+    assert BM25Index(["", ""]).scores("delay").tolist() == [0.0, 0.0]
+
+
+def test_prefilter_blends_serp_score_and_keeps_top_n():
+    docs = [{"text": t, "score": s} for t, s in zip(DOCS[:4], [0.1, 0.1, 1.0, 0.0])]
+    kept, dropped = prefilter("delay damages", docs, top_n=2, serp_weight=0.3)
+    assert [d["text"] for d in kept] == [DOCS[1], DOCS[0]]
+    assert len(dropped) == 2
+    assert all(0.0 <= d["prefilter_score"] <= 1.0 for d in docs)
+    assert kept[0]["lexical_score"] == max(d["lexical_score"] for d in docs)
+
+    kept, _ = prefilter("delay damages", docs, top_n=1, serp_weight=1.0)
+    assert kept[0]["text"] == DOCS[2]
@@ -0,0 +1,37 @@
+from src.metrics import MetricsRegistry, RunMetrics, incr, span, use_metrics
+
+
+def _sample(text: str, prefix: str) -> str:
+    return next(line for line in text.splitlines() if line.startswith(prefix)).split()[-1]
+
+
+def test_prometheus_counters_keep_full_precision():
+    registry = MetricsRegistry(prefix="t")
+    registry.incr("crawl_bytes", 123456789)
+    registry.incr("crawl_bytes", 1)
+    registry.incr("tokens", 0.1)
+    registry.incr("tokens", 0.2)
+    text = registry.prometheus_text()
+    assert _sample(text, "t_crawl_bytes_total") == "123456790"
+    assert float(_sample(text, "t_tokens_total")) == 0.1 + 0.2
+
+
+def test_prometheus_escapes_labels_and_types_once():
+    registry = MetricsRegistry(prefix="t")
+    registry.incr("fetches", outcome='HTTP "503"\n')
+    registry.incr("fetches", outcome="200")
+    text = registry.prometheus_text()
+    assert text.count("# TYPE t_fetches_total counter") == 1
+    assert 't_fetches_total{outcome="HTTP \\"503\\"\\n"} 1' in text
+
+
+def test_run_metrics_collect_spans_and_counters():
+    run = RunMetrics(run_id="r1")
+    with use_metrics(run):
+        with span("outer", url="u"):
+            with span("inner"):
+                incr("fetches", outcome="ok")
+    assert [s["name"] for s in run.spans] == ["inner", "outer"]
+    assert run.spans[0]["parent"] == "outer"
+    assert run.counters == {"fetches|outcome=ok": 1}
+    assert run.summary()["spans"]["outer"]["count"] == 1
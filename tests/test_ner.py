@@ -0,0 +1,39 @@
+import sys
+import types
+
+from src.analysis.ner import LegalNEREngine
+
+
+def _fake_transformers(monkeypatch, outcomes):
+    """transformers.pipeline stand-in that raises or returns the next outcome"""
+    module = types.ModuleType("transformers")
+
+    def pipeline(task, model, aggregation_strategy):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    module.pipeline = pipeline
+    monkeypatch.setitem(sys.modules, "transformers", module)
+
+
+def test_failed_load_is_retried_after_backoff(monkeypatch):
+    nlp = lambda texts, batch_size: [[{"word": "award"}, {"word": "award"}] for _ in texts]
+    _fake_transformers(monkeypatch, [OSError("hub unreachable"), nlp])
+    engine = LegalNEREngine("m", retry_seconds=60)
+
+    assert engine.load() is None
+    assert "hub unreachable" in engine.load_error
+    assert engine.extract("text") == []  # still backing off: no second load attempt
+
+    engine.load_failed_at -= 61
+    assert engine.extract("text") == ["award"]
+    assert engine.loaded and engine.load_error is None
+
+
+def test_missing_transformers_counts_as_a_failed_load(monkeypatch):
+    monkeypatch.setitem(sys.modules, "transformers", None)
+    engine = LegalNEREngine("m")
+    assert engine.load() is None
+    assert engine.backing_off()
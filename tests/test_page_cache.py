@@ -0,0 +1,71 @@
+import sqlite3
+import time
+
+import pytest
+
+from src.crawling import page_cache
+from src.crawling.page_cache import PageCache, parse_freshness
+
+HTML = "<html><body><p>Arbitral award</p></body></html>"
+
+
+def _age(cache: PageCache, url: str, seconds: float) -> None:
+    with cache._lock:
+        cache._conn.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time() - seconds, url))
+        cache._conn.commit()
+
+
+def test_round_trip_and_text_replaces_body(tmp_path):
+    cache = PageCache(str(tmp_path / "pages.sqlite3"))
+    cache.put("https://a/1", HTML, '"etag"', None)
+    entry = cache.get("https://a/1")
+    assert entry["html"] == HTML and entry["etag"] == '"etag"' and entry["fresh"]
+    cache.put_text("https://a/1", "Arbitral award")
+    entry = cache.get("https://a/1")
+    assert entry["html"] is None and entry["text"] == "Arbitral award"
+
+
+def test_freshness_window_per_domain(tmp_path):
+    cache = PageCache(str(tmp_path / "pages.sqlite3"), default_ttl=60,
+                      freshness=parse_freshness("example.org=10"))
+    cache.put("https://www.example.org/x", HTML, None, None)
+    cache.put("https://other.net/x", HTML, None, None)
+    _age(cache, "https://www.example.org/x", 30)
+    _age(cache, "https://other.net/x", 30)
+    assert not cache.get("https://www.example.org/x")["fresh"]
+    assert cache.get("https://other.net/x")["fresh"]
+
+
+def test_prune_purges_old_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(page_cache, "PRUNE_EVERY", 1)
+    cache = PageCache(str(tmp_path / "pages.sqlite3"), max_age=100)
+    cache.put("https://a/old", HTML, None, None)
+    _age(cache, "https://a/old", 200)
+    cache.put("https://a/new", HTML, None, None)
+    assert cache.get("https://a/old") is None
+    assert cache.get("https://a/new") is not None
+
+
+@pytest.mark.parametrize("limits", [{"max_entries": 3}, {"max_bytes": 3 * 60}])
+def test_prune_evicts_oldest_beyond_caps(tmp_path, monkeypatch, limits):
+    monkeypatch.setattr(page_cache, "PRUNE_EVERY", 1)
+    cache = PageCache(str(tmp_path / "pages.sqlite3"), **limits)
+    for i in range(5):
+        cache.put(f"https://a/{i}", "", None, None, text="x" * 50)
+        _age(cache, f"https://a/{i}", 10 - i)
+    kept = [i for i in range(5) if cache.get(f"https://a/{i}") is not None]
+    assert kept == [2, 3, 4]
+    assert cache.stats()["evicted"] == 2
+
+
+def test_migrates_cache_without_size_column(tmp_path):
+    path = str(tmp_path / "pages.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE pages (url TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT,"
+                 " last_modified TEXT, fetched_at REAL NOT NULL, text TEXT)")
+    conn.execute("INSERT INTO pages VALUES ('https://a', x'00', NULL, NULL, ?, 'abc')", (time.time(),))
+    conn.commit()
+    conn.close()
+    cache = PageCache(path)
+    assert cache.get("https://a")["text"] == "abc"
+    assert cache.stats()["bytes"] == 4
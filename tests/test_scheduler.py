@@ -0,0 +1,31 @@
+from src.crawling.scheduler import CrawlScheduler, HostHealth, default_target, is_quality
+
+
+def test_default_target_covers_rank_prefilter(monkeypatch):
+    monkeypatch.delenv("CRAWL_QUALITY_TARGET", raising=False)
+    monkeypatch.setenv("RANK_PREFILTER", "1")
+    monkeypatch.setenv("RANK_TOP_N", "15")
+    assert CrawlScheduler.from_env(["http://a/1"]).target == 15
+
+    monkeypatch.setenv("RANK_PREFILTER", "0")
+    assert default_target() == 10
+
+    monkeypatch.setenv("CRAWL_QUALITY_TARGET", "4")
+    assert CrawlScheduler.from_env(["http://a/1"]).target == 4
+
+
+def test_failing_hosts_sink_in_crawl_order():
+    health = HostHealth(decay=0.8, penalty=5)
+    for _ in range(3):
+        health.record("http://bad.example/x", ok=False, seconds=1.0)
+        health.record("http://good.example/x", ok=True, seconds=0.1)
+    urls = ["http://bad.example/1", "http://good.example/1", "http://new.example/1"]
+    scheduler = CrawlScheduler(urls, {u: 1.0 for u in urls}, health=health)
+    assert scheduler.urls[-1] == "http://bad.example/1"
+    assert health.failure_rate("http://new.example/") == 0.0
+
+
+def test_is_quality():
+    assert is_quality({"text": "x" * 10}, 10)
+    assert not is_quality({"text": None}, 1)
+    assert not is_quality({"text": "short"}, 10)
@@ -0,0 +1,43 @@
+import time
+
+from src.searching.serp_cache import SerpCache, params_key
+
+PARAMS = {"engine": "google", "q": "Delay  Damages", "num": 10, "api_key": "secret"}
+
+
+def _set_time(cache, table, column, value):
+    with cache._lock:
+        cache._conn.execute(f"UPDATE {table} SET {column} = ?", (value,))
+        cache._conn.commit()
+
+
+def test_serp_key_ignores_api_key_case_and_spacing():
+    assert params_key(PARAMS) == params_key({**PARAMS, "q": "delay damages", "api_key": "other"})
+    assert params_key(PARAMS) != params_key({**PARAMS, "num": 20})
+
+
+def test_serp_cache_ttl(tmp_path):
+    cache = SerpCache(str(tmp_path / "serp.sqlite3"), ttl_seconds=60)
+    cache.put(PARAMS, [{"link": "https://a"}])
+    assert cache.get(PARAMS) == [{"link": "https://a"}]
+    _set_time(cache, "serp_cache", "created_at", time.time() - 120)
+    assert cache.get(PARAMS) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_serp_cache_offline_serves_stale_entries(tmp_path):
+    path = str(tmp_path / "serp.sqlite3")
+    SerpCache(path, ttl_seconds=60).put(PARAMS, [{"link": "https://a"}])
+    offline = SerpCache(path, ttl_seconds=60, offline=True)
+    _set_time(offline, "serp_cache", "created_at", time.time() - 3600)
+    assert offline.get(PARAMS) == [{"link": "https://a"}]
+
+
+def test_serp_cache_evicts_oldest_beyond_max_entries(tmp_path):
+    cache = SerpCache(str(tmp_path / "serp.sqlite3"), max_entries=3)
+    for i in range(5):
+        cache.put({**PARAMS, "start": i}, [{"i": i}])
+        time.sleep(0.002)
+    assert cache.stats()["entries"] == 3
+    assert cache.get({**PARAMS, "start": 0}) is None
+    assert cache.get({**PARAMS, "start": 4}) == [{"i": 4}]